@@ -15,7 +15,7 @@ from dotenv import load_dotenv
 from flask import Flask, request, Response, url_for, has_request_context, render_template, jsonify, redirect, current_app, make_response, send_from_directory
 import mimetypes
 import requests
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import base64
 import queue
 import subprocess
@@ -69,6 +69,9 @@ USE_FILLER = os.getenv("USE_FILLER", "1") == "1"
 VOICE_SAFE_MODE = _env_bool("VOICE_SAFE_MODE", False)
 DEBUG_RESULT_SAY = _env_bool("DEBUG_RESULT_SAY", False)   # when true, /result speaks its poll count
 MAX_RESULT_POLLS = int(os.getenv("MAX_RESULT_POLLS", "8")) # hard cap on redirects
+# /result long-poll budget (Twilio webhook timeout is 15s). Each wait holds a worker thread, so
+# the Procfile runs gthread workers; set 0 under a sync worker class to poll by redirect instead
+RESULT_WAIT_SEC = float(os.getenv("RESULT_WAIT_SEC", "6"))
 HOLDY_TINY_CDN = os.getenv("HOLDY_TINY_CDN", "https://call-router-audio-2526.twil.io/holdy_tiny.mp3")
 HOLDY_MID_CDN  = os.getenv("HOLDY_MID_CDN",  "https://call-router-audio-2526.twil.io/holdy_mid.mp3")
 HOLD_BG_CDN    = os.getenv("HOLD_BG_CDN",    "")
@@ -243,6 +246,28 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 app.config.setdefault("PREFERRED_URL_SCHEME", "https")
 
+# ===== Background task executor =====
+# One bounded, prioritized pool for reply prep / routing / analytics instead of a raw thread per request
+from task_executor import TaskExecutor, ExecutorBusy, PRIORITY_CONFIRM, PRIORITY_REPLY, PRIORITY_BACKGROUND
+EXECUTOR_WORKERS = max(1, int(os.getenv("EXECUTOR_WORKERS", "8") or 8))
+EXECUTOR_QUEUE_MAX = max(1, int(os.getenv("EXECUTOR_QUEUE_MAX", "200") or 200))
+
+def _in_app_context(call):
+    with app.app_context():
+        call()
+
+EXECUTOR = TaskExecutor(EXECUTOR_WORKERS, EXECUTOR_QUEUE_MAX, name="bg", wrap=_in_app_context)
+
+# ===== Outbound HTTP =====
+# Keep-alive session pool per host, sized to the threads that call out (executor + request threads)
+from http_pool import HttpPool
+HTTP_POOL_SIZE = max(1, int(os.getenv("HTTP_POOL_SIZE", str(EXECUTOR_WORKERS + 4)) or EXECUTOR_WORKERS + 4))
+try:
+    HTTP_TIMEOUTS = json.loads(os.getenv("HTTP_TIMEOUTS_JSON", "{}") or "{}")  # {"elevenlabs": [3.05, 60], ...}
+except Exception:
+    HTTP_TIMEOUTS = {}
+HTTP = HttpPool(HTTP_POOL_SIZE, HTTP_TIMEOUTS)
+
 # Optional Whisper imports - only load if explicitly enabled
 logger = logging.getLogger(__name__)
 FasterWhisper = None
@@ -263,15 +288,32 @@ import wikipedia
 from googlesearch import search
 from typing import Optional, Dict, List, Tuple
 
-from twilio.twiml.voice_response import VoiceResponse, Gather
+from twilio.twiml.voice_response import VoiceResponse, Gather, Start
 
 # ========== TTS CACHING SYSTEM ==========
 
+TTS_STATS_FLUSH_SEC = float(os.getenv("TTS_STATS_FLUSH_SEC", "30"))      # cache_stats.json write-behind delay
+TTS_INDEX_REFRESH_SEC = float(os.getenv("TTS_INDEX_REFRESH_SEC", "300"))  # rescan for files changed by other workers/tools
+TTS_HIT_TEXTS_MAX = 4096  # recent hits whose text is kept for re-synthesis if the file vanished
+
 class TTSCacheManager:
-    """Manages TTS audio file caching to reduce ElevenLabs API calls"""
+    """Manages TTS audio file caching to reduce ElevenLabs API calls.
+
+    Lookups hit an in-memory index of cached file names (one directory scan at
+    startup, updated on every write, rescanned every TTS_INDEX_REFRESH_SEC)
+    instead of touching the disk; only a miss costs a stat. A hit on a file
+    that another worker's GC or manage_tts_cache.py removed since the last
+    rescan is caught where the file is served (stale_hit()), which drops it
+    from the index and hands back the text to synthesize. Stats are counted in memory and
+    written behind on the background executor, merged into cache_stats.json
+    under a file lock so every worker's counts add up.
+    """
     
-    def __init__(self, cache_dir: str = "static/tts_cache"):
+    stats_lock_timeout = 5.0  # seconds to wait for another worker's stats merge
+
+    def __init__(self, cache_dir: str = "static/tts_cache", flush_delay: float = TTS_STATS_FLUSH_SEC):
         self.cache_dir = cache_dir
+        self.flush_delay = flush_delay
         self.stats = {
             "cache_hits": 0,
             "cache_misses": 0,
@@ -279,12 +321,100 @@ class TTSCacheManager:
             "total_chars_synthesized": 0,
             "total_cached_files": 0
         }
+        self._index = set()          # file names present in cache_dir
+        self._hit_texts = OrderedDict()  # file name -> text, for recent hits (stale_hit re-synthesis)
+        self.access_hook = None      # called with the file name on every hit (cache GC recency)
+        self._index_built_at = 0.0
+        self._stats_lock = threading.Lock()
+        self._deltas = {}            # counts not yet merged into cache_stats.json
+        self._flush_pending = False
         self._ensure_cache_dir()
         self._load_stats()
+        self.refresh_index()
     
     def _ensure_cache_dir(self):
         """Ensure cache directory exists"""
         os.makedirs(self.cache_dir, exist_ok=True)
+
+    def refresh_index(self):
+        """Rebuild the in-memory index with one directory scan"""
+        try:
+            with os.scandir(self.cache_dir) as it:
+                names = {e.name for e in it if e.name.endswith(".mp3")}
+        except OSError as e:
+            print(f"[CACHE] Error scanning {self.cache_dir}: {e}")
+            return
+        self._index = names
+        self._index_built_at = time.time()
+
+    def _indexed(self, name: str) -> bool:
+        if name in self._index:
+            return True  # trusted; deletions since the last rescan are handled by stale_hit()
+        # Index miss: one stat so files written by another worker are picked up
+        # (a miss is followed by a multi-second synthesis anyway)
+        if os.path.exists(os.path.join(self.cache_dir, name)):
+            self._index.add(name)
+            return True
+        return False
+
+    def _in_cache_dir(self, path: str) -> bool:
+        return os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.cache_dir)
+
+    def index_add(self, path: str):
+        """Record a file written into cache_dir"""
+        if self._in_cache_dir(path):
+            self._index.add(os.path.basename(path))
+
+    def index_discard(self, path: str):
+        """Forget a file removed from cache_dir"""
+        if self._in_cache_dir(path):
+            self._index.discard(os.path.basename(path))
+
+    def _record_hit(self, name: str, text: str):
+        with self._stats_lock:
+            self._hit_texts[name] = text
+            self._hit_texts.move_to_end(name)
+            while len(self._hit_texts) > TTS_HIT_TEXTS_MAX:
+                self._hit_texts.popitem(last=False)
+        if self.access_hook:
+            self.access_hook(name)
+
+    def stale_hit(self, path: str) -> Optional[str]:
+        """A file the index handed out is missing: forget it and return its text (if this worker knows it)"""
+        if not self._in_cache_dir(path):
+            return None
+        name = os.path.basename(path)
+        self._index.discard(name)
+        with self._stats_lock:
+            return self._hit_texts.pop(name, None)
+
+    def _bump(self, **deltas):
+        """Count stats in memory and schedule a write-behind flush"""
+        with self._stats_lock:
+            for k, v in deltas.items():
+                self.stats[k] = self.stats.get(k, 0) + v
+                self._deltas[k] = self._deltas.get(k, 0) + v
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        with self._stats_lock:
+            if self._flush_pending:
+                return
+            self._flush_pending = True
+        try:
+            EXECUTOR.schedule(self.flush_delay, self.flush_stats, priority=PRIORITY_BACKGROUND, name="tts_stats_flush")
+        except Exception as e:
+            print(f"[CACHE] Could not schedule stats flush: {e}")
+            with self._stats_lock:
+                self._flush_pending = False
+
+    def flush_stats(self):
+        """Write stats now (background task / shutdown)"""
+        with self._stats_lock:
+            self._flush_pending = False
+        self._save_stats()
+        if time.time() - self._index_built_at >= TTS_INDEX_REFRESH_SEC:
+            self.refresh_index()
     
     def _load_stats(self):
         """Load existing stats from cache directory"""
@@ -298,13 +428,39 @@ class TTSCacheManager:
             print(f"[CACHE] Error loading stats: {e}")
     
     def _save_stats(self):
-        """Save stats to cache directory"""
+        """Add this worker's new counts to the stats file (file lock, atomic replace)"""
+        from single_flight import FileLock, fcntl
+        stats_file = os.path.join(self.cache_dir, "cache_stats.json")
+        lock = FileLock(f"{stats_file}.lock")
+        if fcntl is not None and not lock.acquire(timeout=self.stats_lock_timeout):
+            # Writing unlocked could overwrite another worker's merge: keep the deltas and retry later
+            print("[CACHE] Stats file lock busy; retrying flush later")
+            self._schedule_flush()
+            return
+        with self._stats_lock:
+            deltas, self._deltas = self._deltas, {}
         try:
-            stats_file = os.path.join(self.cache_dir, "cache_stats.json")
-            with open(stats_file, 'w') as f:
-                json.dump(self.stats, f, indent=2)
+            saved = {}
+            if os.path.exists(stats_file):
+                with open(stats_file, 'r') as f:
+                    saved = json.load(f)
+            for k, v in deltas.items():
+                saved[k] = saved.get(k, 0) + v
+            tmp = f"{stats_file}.{os.getpid()}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(saved, f, indent=2)
+            os.replace(tmp, stats_file)
+            with self._stats_lock:
+                # Totals from every worker, plus whatever we counted while writing
+                for k, v in saved.items():
+                    self.stats[k] = v + self._deltas.get(k, 0)
         except Exception as e:
             print(f"[CACHE] Error saving stats: {e}")
+            with self._stats_lock:
+                for k, v in deltas.items():
+                    self._deltas[k] = self._deltas.get(k, 0) + v
+        finally:
+            lock.release()
     
     def canonicalize_text(self, text: str) -> str:
         """Normalize text for consistent cache keys"""
@@ -352,14 +508,13 @@ class TTSCacheManager:
         cache_key = self.get_cache_key(text)
         file_path = os.path.join(self.cache_dir, f"{cache_key}.mp3")
         
-        if os.path.exists(file_path):
-            self.stats["cache_hits"] += 1
-            self._save_stats()
+        if self._indexed(f"{cache_key}.mp3"):
+            self._bump(cache_hits=1)
+            self._record_hit(f"{cache_key}.mp3", text)
             print(f"[CACHE] HIT: {text[:50]}... -> {cache_key}.mp3")
             return file_path
         else:
-            self.stats["cache_misses"] += 1
-            self._save_stats()
+            self._bump(cache_misses=1)
             print(f"[CACHE] MISS: {text[:50]}... -> {cache_key}.mp3")
             return None
     
@@ -369,10 +524,21 @@ class TTSCacheManager:
         cache_path = os.path.join(self.cache_dir, f"{cache_key}.mp3")
         
         try:
-            if os.path.exists(file_path) and not os.path.exists(cache_path):
-                shutil.copy2(file_path, cache_path)
-                self.stats["total_cached_files"] += 1
-                self._save_stats()
+            if os.path.abspath(file_path) == os.path.abspath(cache_path):
+                # Synthesized straight to the canonical name: nothing to copy
+                self.index_add(cache_path)
+                self._bump(total_cached_files=1)
+                print(f"[CACHE] STORED: {text[:50]}... -> {cache_key}.mp3")
+            elif os.path.exists(file_path) and not self._indexed(f"{cache_key}.mp3"):
+                # Named per-call file: hard-link (copy across filesystems) under the canonical name
+                tmp = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                try:
+                    os.link(file_path, tmp)
+                except OSError:
+                    shutil.copy2(file_path, tmp)
+                os.replace(tmp, cache_path)
+                self.index_add(cache_path)
+                self._bump(total_cached_files=1)
                 print(f"[CACHE] STORED: {text[:50]}... -> {cache_key}.mp3")
         except Exception as e:
             print(f"[CACHE] Error caching file: {e}")
@@ -389,6 +555,7 @@ class TTSCacheManager:
             "tts_calls": self.stats["tts_calls"],
             "total_chars_synthesized": self.stats["total_chars_synthesized"],
             "total_cached_files": self.stats["total_cached_files"],
+            "indexed_files": len(self._index),
             "cache_dir": self.cache_dir
         }
 
@@ -397,7 +564,10 @@ class TTSCacheManager:
         try:
             cache_key = self.get_cache_key(text)
             path = os.path.join(self.cache_dir, f"{cache_key}.mp3")
-            return path if os.path.exists(path) else None
+            if not self._indexed(f"{cache_key}.mp3"):
+                return None
+            self._record_hit(f"{cache_key}.mp3", text)
+            return path
         except Exception as e:
             print(f"[CACHE] find_cached_path error: {e}")
             return None
@@ -407,6 +577,8 @@ class TTSCacheManager:
         try:
             p = self.find_cached_path(text)
             deleted_any = False
+            if p:
+                self.index_discard(p)
             if p and os.path.exists(p):
                 os.remove(p)
                 deleted_any = True
@@ -414,8 +586,9 @@ class TTSCacheManager:
 
             # Also remove legacy md5-named file if present (older cache path)
             try:
-                legacy_md5 = _tts_cache_filename_for(text)
+                legacy_md5 = _legacy_tts_filename_for(text)
                 legacy_path = os.path.join(app.static_folder, CACHE_SUBDIR, legacy_md5)
+                self.index_discard(legacy_path)
                 if os.path.exists(legacy_path):
                     os.remove(legacy_path)
                     deleted_any = True
@@ -440,38 +613,67 @@ class TTSCacheManager:
     
     def record_tts_call(self, chars_synthesized: int):
         """Record a TTS API call"""
-        self.stats["tts_calls"] += 1
-        self.stats["total_chars_synthesized"] += chars_synthesized
-        self._save_stats()
-    
+        self._bump(tts_calls=1, total_chars_synthesized=chars_synthesized)
+    
+    COMMON_PHRASES = [
+        "Thanks for calling our store. How can I help you today?",
+        "One moment while I check that for you.",
+        "I'm sorry, I didn't catch that. Could you repeat it?",
+        "I'll connect you to an associate who can help with that.",
+        "Is there anything else I can help you with today?",
+        "Thanks, I'll send those coupons now.",
+        "I'm sorry, we're experiencing technical difficulties. Please call back in a moment.",
+        "Our store hours are 7 AM to 10 PM, seven days a week.",
+        "Yes, we have that in stock.",
+        "I'm sorry, that item is currently out of stock."
+    ]
+
     def prewarm_common_phrases(self):
-        """Prewarm cache with common phrases"""
-        common_phrases = [
-            "Thanks for calling our store. How can I help you today?",
-            "One moment while I check that for you.",
-            "I'm sorry, I didn't catch that. Could you repeat it?",
-            "I'll connect you to an associate who can help with that.",
-            "Is there anything else I can help you with today?",
-            "Thanks, I'll send those coupons now.",
-            "I'm sorry, we're experiencing technical difficulties. Please call back in a moment.",
-            "Our store hours are 7 AM to 10 PM, seven days a week.",
-            "Yes, we have that in stock.",
-            "I'm sorry, that item is currently out of stock."
-        ]
-        
-        print(f"[CACHE] Prewarming {len(common_phrases)} common phrases...")
-        for phrase in common_phrases:
-            if not self.get_cached_file(phrase):
-                # Generate and cache the phrase
-                try:
-                    result = elevenlabs_tts_to_file(phrase, f"prewarm_{self.get_cache_key(phrase)}.mp3")
-                    if result and os.path.exists(result):
-                        self.cache_file(phrase, result)
-                except Exception as e:
-                    print(f"[CACHE] Error prewarming '{phrase}': {e}")
+        """Prewarm cache with common phrases (via the prewarm engine; probes don't count as hits/misses)"""
+        if PREWARM.start([PrewarmItem(p, None, "common") for p in self.COMMON_PHRASES]):
+            PREWARM.wait()
 
 # Initialize cache manager
 CACHE_MANAGER = TTSCacheManager()
+import atexit
+atexit.register(CACHE_MANAGER.flush_stats)
+
+# ========== AUDIO CACHE GC ==========
+# Per-call artifacts and recordings are swept by age; the phrase cache is evicted LRU/LFU under a byte budget
+from cache_gc import CacheGC, POOL_RECORDING, POOL_EPHEMERAL, POOL_DURABLE, referenced_assets
+CACHE_GC_ENABLED = os.getenv("CACHE_GC_ENABLED", "1") == "1"
+CACHE_GC_INTERVAL_SEC = float(os.getenv("CACHE_GC_INTERVAL_SEC", "900"))
+CACHE_GC_POLICY = os.getenv("CACHE_GC_POLICY", "lru").strip().lower()  # lru | lfu
+TTS_CACHE_BUDGET_MB = float(os.getenv("TTS_CACHE_BUDGET_MB", "200"))
+EPHEMERAL_AUDIO_BUDGET_MB = float(os.getenv("EPHEMERAL_AUDIO_BUDGET_MB", "100"))
+EPHEMERAL_AUDIO_MAX_AGE_HOURS = float(os.getenv("EPHEMERAL_AUDIO_MAX_AGE_HOURS", "24"))
+RECORDING_MAX_AGE_HOURS = float(os.getenv("RECORDING_MAX_AGE_HOURS", "24"))
+
+CACHE_GC = CacheGC(
+    [app.static_folder, CACHE_MANAGER.cache_dir],
+    budgets={
+        POOL_EPHEMERAL: int(EPHEMERAL_AUDIO_BUDGET_MB * 1024 * 1024),
+        POOL_DURABLE: int(TTS_CACHE_BUDGET_MB * 1024 * 1024),
+    },
+    max_age={
+        POOL_RECORDING: RECORDING_MAX_AGE_HOURS * 3600,
+        POOL_EPHEMERAL: EPHEMERAL_AUDIO_MAX_AGE_HOURS * 3600,
+    },
+    policy=CACHE_GC_POLICY,
+    on_delete=CACHE_MANAGER.index_discard,
+    # Files the code plays by literal name (e.g. the /result fallback greeting) are never evicted
+    protected=referenced_assets([os.path.abspath(__file__)]),
+)
+CACHE_MANAGER.access_hook = CACHE_GC.record_access
+
+def _cache_gc_tick():
+    try:
+        CACHE_GC.run()
+    finally:
+        EXECUTOR.schedule(CACHE_GC_INTERVAL_SEC, _cache_gc_tick, priority=PRIORITY_BACKGROUND, name="cache_gc")
+
+if CACHE_GC_ENABLED:
+    EXECUTOR.schedule(CACHE_GC_INTERVAL_SEC, _cache_gc_tick, priority=PRIORITY_BACKGROUND, name="cache_gc")
 
 # ========== CREDIT TRACKING SYSTEM ==========
 
@@ -633,6 +835,7 @@ try:
         GROCERY_DEPT_RULES,
         GROCERY_AMBIGUOUS_ITEMS,
         classify_grocery_department,
+        classify_grocery_department_scored,
         get_grocery_department_candidates
     )
     GROCERY_ROUTING_AVAILABLE = True
@@ -693,7 +896,7 @@ except ImportError:
 
 # Import coupon system
 try:
-    from coupon_system import handle_coupon_query, CouponQuery, CouponManager
+    from coupon_system import handle_coupon_query, CouponQuery, CouponManager, coupon_manager
     COUPON_AVAILABLE = True
     print("[INFO] Coupon system loaded successfully")
 except ImportError:
@@ -716,76 +919,11 @@ def get_elevenlabs_usage():
             "Content-Type": "application/json"
         }
         
-        response = requests.get(
-            "https://api.elevenlabs.io/v1/user/subscription",
-            headers=headers,
-            timeout=10
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return data.get("character_count", 0)
-        else:
-            print(f"[CREDIT_TRACK] API Error: {response.status_code}")
-            return None
-    except Exception as e:
-        print(f"[CREDIT_TRACK] Error getting usage: {e}")
-        return None
-
-def log_call_credits(call_id, phase="start"):
-    """Log credit usage for a call"""
-    try:
-        usage = get_elevenlabs_usage()
-        if usage is not None:
-            if phase == "start":
-                CALL_CREDITS[call_id] = {"start": usage, "end": None}
-                print(f"[CREDIT_TRACK] Call {call_id} STARTED - Characters: {usage:,}")
-            elif phase == "end":
-                if call_id in CALL_CREDITS:
-                    CALL_CREDITS[call_id]["end"] = usage
-                    start_usage = CALL_CREDITS[call_id]["start"]
-                    usage_diff = usage - start_usage
-                    print(f"[CREDIT_TRACK] Call {call_id} ENDED - Characters: {usage:,} (used: {usage_diff:,})")
-                    
-                    # Log to file for persistent tracking
-                    log_entry = {
-                        "timestamp": datetime.now().isoformat(),
-                        "call_id": call_id,
-                        "start_usage": start_usage,
-                        "end_usage": usage,
-                        "usage_diff": usage_diff
-                    }
-                    
-                    with open("call_credits.log", "a") as f:
-                        f.write(json.dumps(log_entry) + "\n")
-                else:
-                    print(f"[CREDIT_TRACK] Warning: No start record for call {call_id}")
-    except Exception as e:
-        print(f"[CREDIT_TRACK] Error logging credits: {e}")
-
-def schedule_end_credit_tracking(call_id, delay_seconds=60):
-    """Schedule credit tracking after call ends with delay"""
-    def delayed_tracking():
-        time.sleep(delay_seconds)
-        log_call_credits(call_id, "end")
-    
-    threading.Thread(target=delayed_tracking, daemon=True).start()
-
-def get_elevenlabs_usage():
-    """Get current ElevenLabs character count"""
-    try:
-        if not ELEVENLABS_API_KEY:
-            return None
-        
-        headers = {
-            "xi-api-key": ELEVENLABS_API_KEY,
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.get(
+        response = HTTP.get(
+            "elevenlabs",
             "https://api.elevenlabs.io/v1/user/subscription",
             headers=headers,
-            timeout=10
+            timeout=HTTP.timeout("elevenlabs", read=10)
         )
         
         if response.status_code == 200:
@@ -831,11 +969,8 @@ def log_call_credits(call_id, phase="start"):
 
 def schedule_end_credit_tracking(call_id, delay_seconds=60):
     """Schedule credit tracking after call ends with delay"""
-    def delayed_tracking():
-        time.sleep(delay_seconds)
-        log_call_credits(call_id, "end")
-    
-    threading.Thread(target=delayed_tracking, daemon=True).start()
+    EXECUTOR.schedule(delay_seconds, log_call_credits, call_id, "end",
+                      priority=PRIORITY_BACKGROUND, name="credits_end")
 
 FILLER_FILES = [
     "filler1.mp3","filler2.mp3","filler3.mp3","filler4.mp3",
@@ -874,7 +1009,10 @@ except Exception:
 
 DEFAULT_LANG = (os.getenv("DEFAULT_LANG","en") or "en").lower()  # greeting language only; detection still runs
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# The OpenAI SDK keeps its own keep-alive pool; only give it per-service timeouts
+from openai import Timeout as OpenAITimeout
+_openai_connect, _openai_read = HTTP.timeout("openai")
+client = OpenAI(api_key=OPENAI_API_KEY, timeout=OpenAITimeout(_openai_read, connect=_openai_connect))
 
 def _strip_env(name: str, default: str) -> str:
     val = os.getenv(name, default)
@@ -1047,77 +1185,18 @@ def classify_department_rule_based(text: str) -> str | None:
 
 def classify_department_with_internet_fallback(text: str, job_id: str = None) -> tuple[str, bool]:
     """
-    AI-powered department classification using GPT-4 as the primary method.
+    Tiered department classification: rules, cached answers, local model, GPT-4, web search.
+    Each tier stops the cascade when its confidence clears its threshold (see CLASSIFY_CASCADE).
     Returns (department, used_internet_search)
     """
     classify_start_time = time.time()
     if not text or not text.strip():
         return "Customer Service", False
-    
-    # Use AI classification as the PRIMARY method for all products
-    print(f"[AI CLASSIFY] Using GPT-4 to classify: '{text}'")
-    ai_start_time = time.time()
-    ai_dept = classify_product_with_ai(text)
-    ai_time = time.time() - ai_start_time
-    print(f"[TIMING] AI classification took {ai_time:.3f}s")
-    
-    if ai_dept and ai_dept != "Customer Service":
-        classify_total_time = time.time() - classify_start_time
-        print(f"[AI CLASSIFY] GPT-4 classified '{text}' as '{ai_dept}' (total classify time: {classify_total_time:.3f}s)")
-        return ai_dept, False
-    
-    # Only use rule-based classification as a fallback for very common items
-    # This is just for speed on items we're 100% confident about
-    if is_very_common_product(text):
-        print(f"[RULE-BASED] Using rule-based classification for very common product: '{text}'")
-        local_dept = classify_department_rule_based(text)
-        if local_dept and local_dept != "Customer Service":
-            classify_total_time = time.time() - classify_start_time
-            print(f"[RULE-BASED] Rule-based classification result: '{local_dept}' (total classify time: {classify_total_time:.3f}s)")
-            return local_dept, False
-    
-    # Final fallback to internet search for unknown products
-    if should_use_internet_search(text):
-        print(f"[SEARCH] AI classification failed for '{text}', using internet search")
-        search_result = search_product_online(text)
-        classify_total_time = time.time() - classify_start_time
-        print(f"[SEARCH] Internet search result: '{search_result['department']}' (total classify time: {classify_total_time:.3f}s)")
-        return search_result['department'], True
-    
-    classify_total_time = time.time() - classify_start_time
-    print(f"[TIMING] Classification fallback to Customer Service (total time: {classify_total_time:.3f}s)")
-    return "Customer Service", False
 
-def is_very_common_product(text: str) -> bool:
-    """
-    Check if this is a very common product that we can confidently classify with rules.
-    Only the most basic, obvious items should be here.
-    """
-    if not text:
-        return False
-    
-    text_lower = text.lower()
-    
-    # Only the most basic, obvious items that we're 100% confident about
-    very_common_products = [
-        # Basic beverages
-        "milk", "water", "soda", "pop", "coke", "pepsi",
-        # Basic produce
-        "banana", "apple", "orange", "lettuce", "tomato",
-        # Basic bread
-        "bread", "bagel", "muffin",
-        # Basic snacks
-        "chips", "crackers", "cookies",
-        # Basic household
-        "soap", "shampoo", "toothpaste"
-    ]
-    
-    # Check if the text contains any very common product keywords
-    for product in very_common_products:
-        if product in text_lower:
-            return True
-    
-    return False
+    result = CLASSIFY_CASCADE.classify(text)
+    classify_total_time = time.time() - classify_start_time
+    print(f"[TIMING] Classification via {result.tier or 'none'} took {classify_total_time:.3f}s")
+    return result.department or "Customer Service", result.ran("web")
 
 def is_known_product(text: str) -> bool:
     """
@@ -1164,20 +1243,46 @@ def is_known_product(text: str) -> bool:
     
     return False
 
-# Cache for AI classifications to avoid repeated API calls
-AI_CLASSIFICATION_CACHE = {}  # Cache cleared to force reclassification with new Pet Supplies rules
+# Cache for AI classifications to avoid repeated API calls (memory LRU -> SQLite shared by workers)
+from classification_cache import ClassificationCache
+AI_CLASSIFY_CACHE_PATH = os.getenv("AI_CLASSIFY_CACHE_PATH", os.path.join("instance", "classification_cache.db"))
+AI_CLASSIFY_CACHE_SIZE = int(os.getenv("AI_CLASSIFY_CACHE_SIZE", "2000"))
+AI_CLASSIFY_CACHE_TTL = int(os.getenv("AI_CLASSIFY_CACHE_TTL", str(30 * 86400)))
+AI_CLASSIFY_NEGATIVE_TTL = int(os.getenv("AI_CLASSIFY_NEGATIVE_TTL", "300"))
+# Bump when the classification prompt/rules change so stale answers are ignored
+AI_CLASSIFY_PROMPT_VERSION = os.getenv("AI_CLASSIFY_PROMPT_VERSION", "pet-supplies-v2")
+AI_CLASSIFICATION_CACHE = ClassificationCache(
+    AI_CLASSIFY_CACHE_PATH,
+    maxsize=AI_CLASSIFY_CACHE_SIZE,
+    ttl=AI_CLASSIFY_CACHE_TTL,
+    negative_ttl=AI_CLASSIFY_NEGATIVE_TTL,
+    namespace=AI_CLASSIFY_PROMPT_VERSION,
+)
+
+# Catalog pre-classified offline (department_lookup.py build); consulted before any network call
+from department_lookup import DepartmentLookup
+DEPARTMENT_LOOKUP_PATH = os.getenv("DEPARTMENT_LOOKUP_PATH", os.path.join("instance", "department_lookup.db"))
+DEPARTMENT_LOOKUP = DepartmentLookup(DEPARTMENT_LOOKUP_PATH, prompt_version=AI_CLASSIFY_PROMPT_VERSION)
 
 def classify_product_with_ai(product_name: str) -> str:
     """
     Use GPT-4 to intelligently classify any product into a grocery store department.
     This replaces the need for manual rule-based classification.
     """
+    precomputed = DEPARTMENT_LOOKUP.get(product_name)
+    if precomputed:
+        print(f"[AI CLASSIFY] Catalog hit for '{product_name}' -> {precomputed}")
+        return precomputed
     # Check cache first
+    cached = AI_CLASSIFICATION_CACHE.get(product_name.lower().strip())
+    if cached:
+        print(f"[AI CLASSIFY] Cache hit for '{product_name}' -> {cached}")
+        return cached
+    return _ask_llm_for_department(product_name)
+
+def _ask_llm_for_department(product_name: str) -> str:
+    """GPT-4 classification without the cache lookup; the answer is written to the cache"""
     cache_key = product_name.lower().strip()
-    if cache_key in AI_CLASSIFICATION_CACHE:
-        print(f"[AI CLASSIFY] Cache hit for '{product_name}' -> {AI_CLASSIFICATION_CACHE[cache_key]}")
-        return AI_CLASSIFICATION_CACHE[cache_key]
-    
     try:
         # Create a comprehensive prompt for product classification
         prompt = f"""
@@ -1248,18 +1353,151 @@ Respond with ONLY the department name, nothing else.
         
         if department in valid_departments:
             # Cache the result
-            AI_CLASSIFICATION_CACHE[cache_key] = department
+            AI_CLASSIFICATION_CACHE.set(cache_key, department)
             return department
         else:
             print(f"[AI CLASSIFY] Invalid department '{department}' for '{product_name}', defaulting to Customer Service")
-            AI_CLASSIFICATION_CACHE[cache_key] = "Customer Service"
+            AI_CLASSIFICATION_CACHE.set(cache_key, "Customer Service", negative=True)
             return "Customer Service"
             
     except Exception as e:
         print(f"[AI CLASSIFY] Error classifying '{product_name}': {e}")
-        AI_CLASSIFICATION_CACHE[cache_key] = "Customer Service"
+        # Short TTL so a transient API failure doesn't pin this product to the fallback
+        AI_CLASSIFICATION_CACHE.set(cache_key, "Customer Service", negative=True)
         return "Customer Service"
 
+# ===== Department classification cascade =====
+# Cheapest tier first; a tier's answer ends the cascade once its confidence reaches the threshold
+from classification_cascade import ClassificationCascade, Tier
+
+def parse_tier_thresholds(raw: str, defaults: Dict[str, float]) -> Dict[str, float]:
+    """defaults overridden by a JSON object of tier name -> number; bad entries are reported and skipped"""
+    thresholds = dict(defaults)
+    try:
+        overrides = json.loads(raw or "{}")
+    except ValueError as e:
+        print(f"[WARNING] CLASSIFY_TIER_THRESHOLDS_JSON is not valid JSON ({e}); using default thresholds")
+        return thresholds
+    if not isinstance(overrides, dict):
+        print("[WARNING] CLASSIFY_TIER_THRESHOLDS_JSON must be a JSON object; using default thresholds")
+        return thresholds
+    for name, value in overrides.items():
+        if name not in defaults:
+            print(f"[WARNING] CLASSIFY_TIER_THRESHOLDS_JSON: unknown tier '{name}' ignored (tiers: {', '.join(defaults)})")
+            continue
+        try:
+            thresholds[name] = float(value)
+        except (TypeError, ValueError):
+            print(f"[WARNING] CLASSIFY_TIER_THRESHOLDS_JSON: threshold {value!r} for '{name}' is not a number; "
+                  f"keeping {defaults[name]}")
+    return thresholds
+
+CLASSIFY_TIER_THRESHOLDS = parse_tier_thresholds(
+    os.getenv("CLASSIFY_TIER_THRESHOLDS_JSON", ""),
+    {"rules": 0.85, "catalog": 0.9, "cache": 0.9, "model": 0.8, "llm": 0.5, "web": 0.0},
+)
+# Local statistical model (department_model.py); train it with `python department_model.py train`
+DEPARTMENT_MODEL_PATH = os.getenv("DEPARTMENT_MODEL_PATH", os.path.join("instance", "department_model.npz"))
+CONFIRMED_ROUTES_PATH = os.getenv("CONFIRMED_ROUTES_PATH", os.path.join("instance", "confirmed_routes.jsonl"))
+_CONFIRMED_ROUTES_LOCK = threading.Lock()
+LOCAL_DEPARTMENT_MODEL = None
+if os.path.exists(DEPARTMENT_MODEL_PATH):
+    try:
+        from department_model import DepartmentModel
+        LOCAL_DEPARTMENT_MODEL = DepartmentModel.load(DEPARTMENT_MODEL_PATH)
+        print(f"[INFO] Department model loaded from {DEPARTMENT_MODEL_PATH} "
+              f"(trained {LOCAL_DEPARTMENT_MODEL.meta.get('trained_at')}, {LOCAL_DEPARTMENT_MODEL.meta.get('examples')} examples)")
+    except Exception as e:
+        print(f"[WARNING] Could not load department model {DEPARTMENT_MODEL_PATH}: {e}")
+
+def record_confirmed_route(item: str, department: str):
+    """Append a department the caller picked for an item (training data for the department model)"""
+    if not item or not department:
+        return
+    try:
+        if os.path.dirname(CONFIRMED_ROUTES_PATH):
+            os.makedirs(os.path.dirname(CONFIRMED_ROUTES_PATH), exist_ok=True)
+        line = json.dumps({"item": item.strip().lower(), "department": department, "ts": time.time()})
+        with _CONFIRMED_ROUTES_LOCK, open(CONFIRMED_ROUTES_PATH, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except Exception as e:
+        print(f"[ANALYTICS] Failed to record confirmed route for '{item}': {e}")
+
+def _rule_coverage(text: str, span: tuple) -> float:
+    letters = sum(1 for ch in text if ch.isalnum())
+    return sum(1 for ch in text[span[0]:span[1]] if ch.isalnum()) / letters if letters else 0.0
+
+def _classify_tier_rules(text: str):
+    t = text.lower().strip()
+    if GROCERY_ROUTING_AVAILABLE:
+        dept, confidence = classify_grocery_department_scored(t)
+        if dept:
+            return dept, confidence
+    for rx, dept in DEPT_RULES:
+        m = rx.search(t)
+        if m:
+            return dept, round(0.9 * (0.5 + 0.5 * _rule_coverage(t, m.span())), 3)
+    return None
+
+def _classify_tier_catalog(text: str):
+    dept = DEPARTMENT_LOOKUP.get(text)
+    return (dept, 0.95) if dept else None
+
+def _classify_tier_cache(text: str):
+    cached = AI_CLASSIFICATION_CACHE.get(text.lower().strip())
+    if cached and cached != "Customer Service":  # negative entries only say the LLM failed recently
+        return cached, 0.95
+    return None
+
+def _classify_tier_model(text: str):
+    return LOCAL_DEPARTMENT_MODEL.predict(text)
+
+def _classify_tier_llm(text: str):
+    # Any cached entry means GPT-4 was already asked: a negative one waits out its TTL,
+    # a genuine "Customer Service" answer stands, neither is re-asked
+    cached = AI_CLASSIFICATION_CACHE.get(text.lower().strip())
+    dept = cached if cached is not None else _ask_llm_for_department(text)
+    return (dept, 0.9) if dept and dept != "Customer Service" else None
+
+def _classify_tier_web(text: str):
+    result = search_product_online(text)
+    dept = result.get("department")
+    return (dept, result.get("confidence") or 0.0) if dept and dept != "Customer Service" else None
+
+CLASSIFY_CASCADE = ClassificationCascade([
+    Tier("rules", _classify_tier_rules, CLASSIFY_TIER_THRESHOLDS["rules"]),
+    Tier("catalog", _classify_tier_catalog, CLASSIFY_TIER_THRESHOLDS["catalog"]),
+    Tier("cache", _classify_tier_cache, CLASSIFY_TIER_THRESHOLDS["cache"]),
+    Tier("model", _classify_tier_model, CLASSIFY_TIER_THRESHOLDS["model"],
+         applies=lambda _text: LOCAL_DEPARTMENT_MODEL is not None),
+    Tier("llm", _classify_tier_llm, CLASSIFY_TIER_THRESHOLDS["llm"]),
+    Tier("web", _classify_tier_web, CLASSIFY_TIER_THRESHOLDS["web"],
+         applies=lambda text: should_use_internet_search(text)),
+])
+
+def catalog_lookup_items(include_terms: bool = True):
+    """(product, source) pairs for the offline catalog build: shared inventory, simulated inventory, grocery terms"""
+    if SHARED_DATA_AVAILABLE:
+        try:
+            for row in shared_data.get_inventory() or ():
+                if row.get("name"):
+                    yield row["name"], "shared_inventory"
+        except Exception as e:
+            print(f"[LOOKUP] Could not load shared inventory: {e}")
+    if INVENTORY_AVAILABLE:
+        import inventory_system
+        for item in inventory_system.inventory_manager.inventory.values():
+            yield item.name, "inventory"
+    if include_terms and GROCERY_ROUTING_AVAILABLE:
+        from grocery_departments import department_vocabulary
+        for term in department_vocabulary():
+            yield term, "terms"
+
+def classify_for_lookup(product: str) -> Optional[str]:
+    """Offline build classifier: cache or GPT-4 (never the lookup itself); None when it could not tell"""
+    dept = AI_CLASSIFICATION_CACHE.get(product) or _ask_llm_for_department(product)
+    return dept if dept and dept != "Customer Service" else None
+
 def clean_item_label(s: str) -> str:
     s = (s or "").strip()
     s = re.sub(r"^(i\s*am|i'?m)\s+looking\s+for\s+", "", s, flags=re.I)
@@ -1270,21 +1508,50 @@ def clean_item_label(s: str) -> str:
 # Use a multilingual model by default so language detection actually works.
 # You can override via WHISPER_MODEL env (e.g., "medium" or "large-v3").
 WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "small")
+# Max concurrent decoders per worker process (faster-whisper num_workers)
+WHISPER_MAX_CONCURRENT = max(1, int(os.getenv("WHISPER_MAX_CONCURRENT", "2") or 2))
+WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", "0") or 0)
+WHISPER_PRELOAD = _env_bool("WHISPER_PRELOAD", True)  # load the model at worker start
+
+from whisper_pool import WhisperModelPool
+
+WHISPER_POOL = None
+if USE_LOCAL_WHISPER:
+    if FasterWhisper is not None:
+        WHISPER_POOL = WhisperModelPool(
+            lambda: FasterWhisper(WHISPER_MODEL_NAME, device="cpu", compute_type="int8",
+                                  cpu_threads=WHISPER_CPU_THREADS, num_workers=WHISPER_MAX_CONCURRENT),
+            max_concurrent=WHISPER_MAX_CONCURRENT,
+            name=f"faster-whisper:{WHISPER_MODEL_NAME}",
+        )
+    elif WhisperLegacy is not None:
+        # openai-whisper models are not safe to share across threads; decode one at a time
+        WHISPER_POOL = WhisperModelPool(
+            lambda: WhisperLegacy.load_model(WHISPER_MODEL_NAME),
+            max_concurrent=1,
+            name=f"openai-whisper:{WHISPER_MODEL_NAME}",
+        )
+    if WHISPER_POOL is not None and WHISPER_PRELOAD:
+        WHISPER_POOL.warm_async()
 
 def _get_whisper_impl():
-    if not USE_LOCAL_WHISPER:
+    if not USE_LOCAL_WHISPER or WHISPER_POOL is None:
         return None
     if FasterWhisper is not None:
         def transcribe_faster(path):
-            model = FasterWhisper(WHISPER_MODEL_NAME, device="cpu", compute_type="int8")
-            segments, info = model.transcribe(path, beam_size=2, vad_filter=True, language=None)
-            return " ".join(s.text for s in segments if getattr(s, "text", None)), getattr(info, "language", "en"), getattr(info, "language_probability", 0.0)
+            def _decode(model):
+                segments, info = model.transcribe(path, beam_size=2, vad_filter=True, language=None)
+                # segments is lazy; join inside the slot so decoding is bounded by the pool
+                text = " ".join(s.text for s in segments if getattr(s, "text", None))
+                return text, getattr(info, "language", "en"), getattr(info, "language_probability", 0.0)
+            return WHISPER_POOL.transcribe(_decode)
         return transcribe_faster
     if WhisperLegacy is not None:
         def transcribe_legacy(path):
-            model = WhisperLegacy.load_model(WHISPER_MODEL_NAME)
-            res = model.transcribe(path)
-            return (res.get("text") or "").strip(), "en", 1.0
+            def _decode(model):
+                res = model.transcribe(path)
+                return (res.get("text") or "").strip(), "en", 1.0
+            return WHISPER_POOL.transcribe(_decode)
         return transcribe_legacy
     return None
 
@@ -1302,16 +1569,6 @@ def _e500(e):
     tw.play(public_url("/static/tts_cache/holdy_tiny.mp3"))
     return xml_response(tw)
 
-@app.after_request
-def _force_twiml_xml(resp):
-    try:
-        body = (resp.get_data(as_text=True) or "").lstrip()
-        if body.startswith("<?xml") or body.startswith("<Response"):
-            resp.mimetype = "text/xml"
-    except Exception:
-        pass
-    return resp
-
 def ensure_static_dir():
     os.makedirs(app.static_folder, exist_ok=True)
 
@@ -1392,76 +1649,53 @@ def build_confirmation_audio_url(filename_or_path: str) -> str:
 
 from urllib.parse import urljoin
 
-# --- Redis-backed job state with in-proc fallback ---
+# --- Shared job state (memory / Redis / SQLite) ---
+# Every reader and writer of per-call job state goes through JOB_STORE so any
+# gunicorn worker can answer /result. Set JOB_STORE=sqlite (one host) or
+# REDIS_URL (any number of hosts) before running more than one worker.
 from typing import Optional
-_redis = None
-_fallback_state = {}  # key -> (expires_ts, json_str)
-
-def get_redis():
-    global _redis
-    if '_redis' in globals() and _redis is not None:
-        return _redis
-    url = REDIS_URL
-    if not url:
-        _redis = None
-        return None
-    from redis import Redis
-    _redis = Redis.from_url(url, decode_responses=True, socket_timeout=2, socket_connect_timeout=2)
-    return _redis
+from job_store import create_job_store
 
-def _fb_set(key, value, ttl):
-    _fallback_state[key] = (time.time() + ttl, json.dumps(value))
-
-def _fb_get(key) -> Optional[dict]:
-    item = _fallback_state.get(key)
-    if not item:
-        return None
-    exp, js = item
-    if exp < time.time():
-        _fallback_state.pop(key, None)
-        return None
-    return json.loads(js)
+JOB_STORE_BACKEND = os.getenv("JOB_STORE", "").strip().lower()  # memory | redis | sqlite
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join("instance", "job_state.db"))
+_job_store = None
 
-def _fb_del(key):
-    _fallback_state.pop(key, None)
+def get_job_store():
+    global _job_store
+    if _job_store is None:
+        _job_store = create_job_store(JOB_STORE_BACKEND, REDIS_URL, JOB_STORE_PATH)
+        logger.info("[STATE] job store backend=%s", _job_store.backend)
+    return _job_store
 
 def save_state(job_id: str, data: dict, ttl_sec: int = 900):
-    key = f"job:{job_id}"
+    key = state_key(job_id)
     try:
-        r = get_redis()
-        if r:
-            r.setex(key, ttl_sec, json.dumps(data))
-        else:
-            _fb_set(key, data, ttl_sec)
-        current_app.logger.info("[STATE] saved job=%s data=%s", job_id, data)
+        get_job_store().set(key, data, ttl_sec)
+        app.logger.info("[STATE] saved job=%s data=%s", job_id, data)
     except Exception as e:
-        current_app.logger.exception("[STATE] ERROR saving job=%s", job_id)
+        app.logger.exception("[STATE] ERROR saving job=%s", job_id)
         raise
 
 def load_state(job_id: str) -> dict:
-    key = f"job:{job_id}"
+    key = state_key(job_id)
     try:
-        r = get_redis()
-        if r:
-            js = r.get(key)
-            return json.loads(js) if js else {}
-        return _fb_get(key) or {}
+        return get_job_store().get(key) or {}
     except Exception as e:
-        current_app.logger.exception("[STATE] ERROR loading job=%s", job_id)
+        app.logger.exception("[STATE] ERROR loading job=%s", job_id)
         return {}
 
 def update_state(job_id: str, updates: dict, ttl_sec: int = 900) -> dict:
-    cur = load_state(job_id) or {}
-    cur.update(updates)
-    save_state(job_id, cur, ttl_sec)
-    return cur
+    key = state_key(job_id)
+    try:
+        cur = get_job_store().update(key, updates, ttl_sec)
+        app.logger.info("[STATE] updated job=%s data=%s", job_id, cur)
+        return cur
+    except Exception as e:
+        app.logger.exception("[STATE] ERROR updating job=%s", job_id)
+        raise
 
 def clear_state(job_id: str):
-    key = f"job:{job_id}"
-    r = get_redis()
-    if r:
-        r.delete(key)
-    _fb_del(key)
+    get_job_store().delete(state_key(job_id))
 
 def _state_debug(job_id, where):
     try:
@@ -1471,27 +1705,33 @@ def _state_debug(job_id, where):
         return
     current_app.logger.info("[STATE] %s job=%s -> %s", where, job_id, st)
 
-# Simple Redis helpers for deterministic job lifecycle
+# Simple helpers for deterministic job lifecycle
 def state_key(job_id: str) -> str:
     return f"job:{job_id}"
 
 def state_get(job_id: str) -> dict:
-    r = get_redis()
-    if not r:
-        return {}
-    raw = r.get(state_key(job_id))
-    if not raw:
-        return {}
     try:
-        return json.loads(raw)
+        return get_job_store().get(state_key(job_id)) or {}
     except Exception:
         return {}
 
+def _job_settled(state: dict) -> bool:
+    status = state.get("status", "")
+    return status == "error" or (status == "done" and bool(state.get("reply_url")))
+
+def state_wait(job_id: str, timeout: float) -> dict:
+    """Block until the job is done/error or timeout passes; returns the latest state"""
+    if timeout <= 0:
+        return state_get(job_id)
+    try:
+        settled = get_job_store().wait_for(state_key(job_id), _job_settled, timeout)
+    except Exception as e:
+        app.logger.warning("[STATE] wait failed job=%s: %s", job_id, e)
+        settled = None
+    return settled if settled is not None else state_get(job_id)
+
 def state_set(job_id: str, data: dict, ttl=900):
-    r = get_redis()
-    if not r:
-        return
-    r.setex(state_key(job_id), ttl, json.dumps(data))
+    get_job_store().set(state_key(job_id), data, ttl)
 
 def _abs_audio(url_or_path: str) -> str:
     # If already absolute https, return as-is; otherwise route through public_url
@@ -1516,17 +1756,19 @@ try:
 except Exception:
     VoiceResponse = None  # optional import
 
+class TwiMLResponse(Response):
+    """Response typed as TwiML at construction time.
+
+    Views mark their TwiML explicitly (via xml_response) instead of an
+    after_request hook reading every body back to sniff for <Response>,
+    which buffered and decoded audio files on each Twilio <Play> fetch.
+    """
+    default_mimetype = "text/xml"
+
 def xml_response(x):
     """Return TwiML with correct content-type. Accepts str or VoiceResponse."""
-    if isinstance(x, VoiceResponse):
-        body = str(x)
-    else:
-        body = str(x)
-    body = sanitize_twiml_xml(body)
-    from flask import make_response
-    resp = make_response(body, 200)
-    resp.headers["Content-Type"] = "text/xml; charset=utf-8"
-    return resp
+    body = sanitize_twiml_xml(str(x))
+    return TwiMLResponse(body, 200, content_type="text/xml; charset=utf-8")
 
 CACHE_SUBDIR = "tts_cache"
 
@@ -1537,6 +1779,11 @@ def _ensure_cache_dir():
     return cache_dir
 
 def _tts_cache_filename_for(text: str) -> str:
+    """Canonical cache file name: the same key TTSCacheManager looks up, so a line is stored once"""
+    return f"{CACHE_MANAGER.get_cache_key(text)}.mp3"
+
+def _legacy_tts_filename_for(text: str) -> str:
+    """md5 name older builds wrote next to the sha256-keyed copy"""
     return hashlib.md5(text.encode("utf-8")).hexdigest() + ".mp3"
 
 def elevenlabs_tts_to_file(text: str, filename: str | None = None, job_id: str = None, service: str = "TTS"):
@@ -1569,10 +1816,14 @@ def elevenlabs_tts_to_file(text: str, filename: str | None = None, job_id: str =
 		url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
 		headers = {"xi-api-key": ELEVENLABS_API_KEY, "Content-Type": "application/json"}
 		data = {"text": text, "voice_settings": {"stability": 0.4, "similarity_boost": 0.5}}
-		r = requests.post(url, headers=headers, json=data, timeout=60)
+		r = HTTP.post("elevenlabs", url, headers=headers, json=data)
 		r.raise_for_status()
-		with open(out_path, "wb") as f:
+		# temp file + rename: Twilio never fetches a half-written file
+		tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+		with open(tmp_path, "wb") as f:
 			f.write(r.content)
+		os.replace(tmp_path, out_path)
+		CACHE_MANAGER.index_add(out_path)
 		
 		# Track credit usage if job_id is provided
 		if job_id:
@@ -1589,7 +1840,83 @@ def elevenlabs_tts_to_file(text: str, filename: str | None = None, job_id: str =
 		print(f"[TTS ERROR] Failed to generate TTS: {e}")
 		return None
 
-def tts_line_url(text: str, filename: str | None = None, base_url: str | None = None, job_id: str = None, service: str = "TTS") -> str | None:
+# ---- Streaming synthesis ----
+# A reply URL is handed out once the first chunk is on disk; serve_tts_cache follows the .part file
+# until the writer commits it (atomic rename) into the cache
+from tts_stream import StreamRegistry, follow_part, part_files, stream_failed
+TTS_STREAMING = _env_bool("TTS_STREAMING", True)
+TTS_STREAM_FIRST_CHUNK_SEC = float(os.getenv("TTS_STREAM_FIRST_CHUNK_SEC", "8"))
+TTS_STREAM_CHUNK_BYTES = 4096
+TTS_STREAMS = StreamRegistry()
+from single_flight import SingleFlight
+TTS_FLIGHTS = SingleFlight(os.getenv("TTS_LOCK_DIR", "instance/tts_locks"),
+                           timeout=float(os.getenv("TTS_SINGLE_FLIGHT_TIMEOUT_SEC", "90")))
+TTS_STREAM_EXECUTOR = TaskExecutor(max(1, int(os.getenv("TTS_STREAM_WORKERS", "4") or 4)), EXECUTOR_QUEUE_MAX,
+                                   name="tts-stream", wrap=_in_app_context)
+
+def _stream_tts_job(sf, text: str, job_id: str = None, service: str = "TTS", lock=None):
+	try:
+		_stream_tts_to(sf, text, job_id, service)
+	finally:
+		if lock is not None:
+			lock.release()
+
+def _stream_tts_to(sf, text: str, job_id: str = None, service: str = "TTS"):
+	try:
+		url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}/stream"
+		headers = {"xi-api-key": ELEVENLABS_API_KEY, "Content-Type": "application/json"}
+		data = {"text": text, "voice_settings": {"stability": 0.4, "similarity_boost": 0.5}}
+		with HTTP.post("elevenlabs", url, headers=headers, json=data, stream=True) as r:
+			r.raise_for_status()
+			for chunk in r.iter_content(chunk_size=TTS_STREAM_CHUNK_BYTES):
+				sf.write(chunk)
+		if not sf.size:
+			raise ValueError("empty audio stream")
+		TTS_STREAMS.commit(sf)
+	except Exception as e:
+		print(f"[TTS STREAM] Failed for '{text[:50]}...': {e}")
+		TTS_STREAMS.abort(sf, str(e))
+		return
+	CACHE_MANAGER.index_add(sf.path)
+	CACHE_MANAGER.cache_file(text, sf.path)
+	CACHE_MANAGER.record_tts_call(len(text))
+	if job_id:
+		credit_tracker.log_tts_usage(job_id, text, service)
+	print(f"[TTS STREAM] Committed {os.path.basename(sf.path)} ({sf.size:,} bytes, "
+	      f"first chunk {(sf.first_chunk_at - sf.started_at) * 1000:.0f}ms, total {(time.time() - sf.started_at) * 1000:.0f}ms)")
+
+def elevenlabs_tts_stream(text: str, out_path: str, job_id: str = None, service: str = "TTS", lock=None) -> bool:
+	"""Start streaming synthesis into out_path; True once audio can be served, False to use the blocking path.
+
+	A held single-flight lock is handed to the stream job and released when the file is committed.
+	"""
+	if not TTS_STREAMING or not ELEVENLABS_API_KEY or ELEVENLABS_API_KEY.strip() == "":
+		return False
+	sf = TTS_STREAMS.start(out_path)
+	if sf is None:
+		return True  # already streaming; serve_tts_cache follows it
+	handoff = lock.handoff() if lock is not None and lock.held else None
+	try:
+		TTS_STREAM_EXECUTOR.submit(_stream_tts_job, sf, text, job_id, service, handoff, priority=PRIORITY_REPLY)
+	except ExecutorBusy as e:
+		if handoff is not None:
+			handoff.handed_off = False  # single flight releases it
+		TTS_STREAMS.abort(sf, str(e))
+		return False
+	sf.wait_for_data(TTS_STREAM_FIRST_CHUNK_SEC)
+	return not sf.failed
+
+def _tts_stream_rel(text: str, filename: str | None) -> str | None:
+	"""static/-relative path a streamed line is written to; None for paths serve_tts_cache doesn't cover"""
+	if filename is None:
+		return f"{CACHE_SUBDIR}/{_tts_cache_filename_for(text)}"
+	if filename.startswith(f"{CACHE_SUBDIR}/"):
+		return filename
+	if "/" not in filename and not os.path.isabs(filename):
+		return f"{CACHE_SUBDIR}/{filename}"
+	return None
+
+def tts_line_url(text: str, filename: str | None = None, base_url: str | None = None, job_id: str = None, service: str = "TTS", stream: bool = True) -> str | None:
 	tts_start_time = time.time()
 	# Use caching system if available
 	if CACHE_MANAGER:
@@ -1602,41 +1929,16 @@ def tts_line_url(text: str, filename: str | None = None, base_url: str | None =
 			print(f"[TTS CACHE] Using cached audio for: {text[:50]}... (cache check: {cache_check_time:.3f}s, total: {tts_total_time:.3f}s)")
 			return cached_url
 		
-		# Generate new audio and cache it
-		tts_gen_start = time.time()
-		if filename:
-			result = elevenlabs_tts_to_file(text, filename, job_id, service)
-			if result is None:
-				print(f"[TTS DEBUG] TTS generation failed for filename '{filename}', returning None")
-				return None
-			mp3_rel = filename
-		else:
-			mp3_rel = f"{CACHE_SUBDIR}/{_tts_cache_filename_for(text)}"
-			result = elevenlabs_tts_to_file(text, mp3_rel, job_id, service)
-			if result is None:
-				print(f"[TTS DEBUG] TTS generation failed for text hash, returning None")
-				return None
-		tts_gen_time = time.time() - tts_gen_start
-		print(f"[TIMING] TTS generation took {tts_gen_time:.3f}s")
-		
-		# Cache the generated file
-		CACHE_MANAGER.cache_file(text, result)
-		CACHE_MANAGER.record_tts_call(len(text))
+		# Already streaming in this process: hand out the same URL
+		stream_rel = _tts_stream_rel(text, filename) if stream else None
+		if stream_rel and TTS_STREAMS.get(os.path.join(app.static_folder, stream_rel)) is not None:
+			return public_url(f"/static/{stream_rel}")
 		
-		# If caller passed a path like "tts_cache/foo.mp3", keep it.
-		# If it's a bare filename, put it under tts_cache/.
-		if "/" not in mp3_rel:
-			mp3_rel = f"{CACHE_SUBDIR}/{mp3_rel}"
-		
-		try:
-			final_url = public_url(f"/static/{mp3_rel}")
-			print(f"[TTS DEBUG] Returning URL: {final_url}")
-			app.logger.info(f"[AUDIO] url={final_url}")
-			return final_url
-		except Exception as e:
-			logger.exception("[AUDIO] Failed to build public URL for %r", f"/static/{mp3_rel}")
-			# Provide a safe Twilio-hosted fallback tone so Twilio has something to fetch
-			return "https://api.twilio.com/cowbell.mp3"  # harmless short tone
+		# One synthesis per line: concurrent callers (threads here, workers via the lock file) share it
+		return TTS_FLIGHTS.do(
+			CACHE_MANAGER.get_cache_key(text),
+			lambda lock: _synthesize_tts_line(text, filename, job_id, service, stream_rel, lock, tts_start_time),
+		)
 	else:
 		# Fallback to original behavior if cache manager not available
 		if filename:
@@ -1667,6 +1969,58 @@ def tts_line_url(text: str, filename: str | None = None, base_url: str | None =
 			# Provide a safe Twilio-hosted fallback tone so Twilio has something to fetch
 			return "https://api.twilio.com/cowbell.mp3"  # harmless short tone
 
+def _synthesize_tts_line(text: str, filename: str | None, job_id: str, service: str, stream_rel: str | None,
+                         lock=None, tts_start_time: float | None = None) -> str | None:
+	"""Cache-miss half of tts_line_url; runs once per cache key at a time (TTS_FLIGHTS)"""
+	tts_start_time = tts_start_time or time.time()
+	# Another worker may have finished this line while we waited for the lock
+	cached_path = CACHE_MANAGER.find_cached_path(text)
+	if cached_path:
+		return static_file_url(cached_path.replace("static/", ""))
+	
+	# Stream new audio: Twilio can start playing from the first chunk
+	if stream_rel and not os.path.exists(os.path.join(app.static_folder, stream_rel)):
+		_ensure_cache_dir()
+		if elevenlabs_tts_stream(text, os.path.join(app.static_folder, stream_rel), job_id, service, lock):
+			print(f"[TIMING] TTS first audio after {time.time() - tts_start_time:.3f}s (streaming)")
+			return public_url(f"/static/{stream_rel}")
+	
+	# Generate new audio and cache it
+	tts_gen_start = time.time()
+	if filename:
+		result = elevenlabs_tts_to_file(text, filename, job_id, service)
+		if result is None:
+			print(f"[TTS DEBUG] TTS generation failed for filename '{filename}', returning None")
+			return None
+		mp3_rel = filename
+	else:
+		mp3_rel = f"{CACHE_SUBDIR}/{_tts_cache_filename_for(text)}"
+		result = elevenlabs_tts_to_file(text, mp3_rel, job_id, service)
+		if result is None:
+			print(f"[TTS DEBUG] TTS generation failed for text hash, returning None")
+			return None
+	tts_gen_time = time.time() - tts_gen_start
+	print(f"[TIMING] TTS generation took {tts_gen_time:.3f}s")
+	
+	# Cache the generated file
+	CACHE_MANAGER.cache_file(text, result)
+	CACHE_MANAGER.record_tts_call(len(text))
+	
+	# If caller passed a path like "tts_cache/foo.mp3", keep it.
+	# If it's a bare filename, put it under tts_cache/.
+	if "/" not in mp3_rel:
+		mp3_rel = f"{CACHE_SUBDIR}/{mp3_rel}"
+	
+	try:
+		final_url = public_url(f"/static/{mp3_rel}")
+		print(f"[TTS DEBUG] Returning URL: {final_url}")
+		app.logger.info(f"[AUDIO] url={final_url}")
+		return final_url
+	except Exception as e:
+		logger.exception("[AUDIO] Failed to build public URL for %r", f"/static/{mp3_rel}")
+		# Provide a safe Twilio-hosted fallback tone so Twilio has something to fetch
+		return "https://api.twilio.com/cowbell.mp3"  # harmless short tone
+
 # ========== TTS Regeneration API ==========
 @app.route("/api/tts/regenerate", methods=["POST"])
 def api_tts_regenerate():
@@ -1703,6 +2057,16 @@ def twiml_play_tts(vr: VoiceResponse, text: str, filename: str | None = None, jo
     
     # Try to generate TTS, but if it fails, use vr.say()
     try:
+        if filename is None:
+            cached = play_cached(text)  # a whole-line cache hit is one <Play>, not several
+            if cached:
+                vr.play(cached)
+                return
+            urls = tts_segment_urls(text, None, job_id, service)
+            if urls:
+                for u in urls:
+                    vr.play(u)
+                return
         url = tts_line_url(text, filename, None, job_id, service)
         if url and url != "None":
             vr.play(url)
@@ -1753,36 +2117,176 @@ def msg(key: str, lang: str) -> str:
     
     return MESSAGES.get(lang, MESSAGES["en"]).get(key, MESSAGES["en"][key])
 
-def prewarm_tts_files():
+# ======= Segmented TTS =======
+# Lines built from a known template are spoken as cached fixed fragments plus
+# a synthesized dynamic slot, so a new item name costs a few characters
+# instead of a whole sentence.
+from tts_segments import TemplateSegmenter, concat_mp3
+TTS_SEGMENTED = _env_bool("TTS_SEGMENTED", True)
+TTS_SEGMENTER = TemplateSegmenter(f"{m['confirm_prefix']} {{item}}?" for m in MESSAGES.values())
+_DIALOGUE_TEMPLATES_SEGMENTED = False
+
+def _register_dialogue_templates(force: bool = False):
+    """Add "{slot}" dialogue templates from the dashboard store to the segmenter"""
+    global _DIALOGUE_TEMPLATES_SEGMENTED
+    if (_DIALOGUE_TEMPLATES_SEGMENTED and not force) or not SHARED_DATA_AVAILABLE:
+        return
+    _DIALOGUE_TEMPLATES_SEGMENTED = True
     try:
-        _ensure_cache_dir()
-        # Prewarm EN only (ES will synthesize on the fly if needed)
-        files_to_prewarm = [
-            (MESSAGES["en"]["yes_no"], "tts_cache/yes_or_no.mp3"),
-            (MESSAGES["en"]["err_global"], "tts_cache/err_global.mp3"),
-            (MESSAGES["en"]["err_confirm"], "tts_cache/err_confirm.mp3"),
-            (MESSAGES["en"]["no_record"], "tts_cache/no_recording.mp3"),
-            (MESSAGES["en"]["reask"], "tts_cache/reask.mp3"),
-            (MESSAGES["en"]["reask_cap"], "tts_cache/reask_cap.mp3"),
-            (MESSAGES["en"]["err_global"], "tts_cache/err_result.mp3"),
-            ("Is there anything else I can help you with today?", "tts_cache/anything_else.mp3")
-        ]
-        
-        success_count = 0
-        for text, filename in files_to_prewarm:
-            if elevenlabs_tts_to_file(text, filename) is not None:
-                success_count += 1
-        
-        # Use cache manager to prewarm common phrases
-        if CACHE_MANAGER:
-            CACHE_MANAGER.prewarm_common_phrases()
-        
-        if success_count == len(files_to_prewarm):
-            print("[BOOT] TTS prewarm complete.")
-        else:
-            print(f"[BOOT] TTS prewarm partial: {success_count}/{len(files_to_prewarm)} files created")
+        for section in (shared_data.get_dialogue_templates() or {}).values():
+            if isinstance(section, dict):
+                for line in section.values():
+                    if isinstance(line, str):
+                        TTS_SEGMENTER.register(line)
+    except Exception as e:
+        print(f"[TTS SEGMENT] Could not load dialogue templates: {e}")
+
+def tts_segment_urls(text: str, base_url: str | None = None, job_id: str = None, service: str = "TTS", stream: bool = True) -> list[str] | None:
+    """One cached URL per segment, or None if the line matches no template (or a segment fails)"""
+    if not TTS_SEGMENTED:
+        return None
+    _register_dialogue_templates()
+    segments = TTS_SEGMENTER.split(text)
+    if not segments or len(segments) < 2:
+        return None
+    urls = []
+    for seg in segments:
+        url = tts_line_url(seg.text, None, base_url, job_id, f"{service} ({'fixed' if seg.static else 'slot'})", stream=stream)
+        if not url or url == "None":
+            return None
+        urls.append(url)
+    dynamic = sum(len(seg.text) for seg in segments if not seg.static)
+    print(f"[TTS SEGMENT] {len(segments)} segments, dynamic {dynamic}/{len(text)} chars: {text[:50]}...")
+    return urls
+
+def tts_stitched_url(text: str, base_url: str | None = None, job_id: str = None, service: str = "TTS") -> str | None:
+    """Single-URL variant of tts_segment_urls: segments are joined into one cached mp3"""
+    cached = play_cached(text)
+    if cached:
+        return cached
+    if not tts_segment_urls(text, base_url, job_id, service, stream=False):  # stitching needs finished files
+        return None
+    paths = [CACHE_MANAGER.find_cached_path(seg.text) for seg in TTS_SEGMENTER.split(text)]
+    if not all(paths):
+        return None
+    out_path = os.path.join(CACHE_MANAGER.cache_dir, f"{CACHE_MANAGER.get_cache_key(text)}.mp3")
+    try:
+        concat_mp3(paths, out_path)
+    except OSError as e:
+        print(f"[TTS SEGMENT] Stitch failed for '{text[:50]}...': {e}")
+        for p in paths:
+            if not os.path.exists(p):
+                CACHE_MANAGER.stale_hit(p)  # segment deleted since the index last saw it
+        return None
+    CACHE_MANAGER.index_add(out_path)
+    return play_cached(text)
+
+# ---- Prewarm ----
+# Known phrases are synthesized in the background (bounded workers, token-bucket rate limit for the
+# ElevenLabs quota) so boot never waits on TTS; progress is at /tts/prewarm
+from tts_prewarm import PrewarmEngine, PrewarmItem
+from tts_segments import static_fragments
+TTS_PREWARM_ON_BOOT = _env_bool("TTS_PREWARM_ON_BOOT", True)
+TTS_PREWARM_DELAY_SEC = float(os.getenv("TTS_PREWARM_DELAY_SEC", "20"))
+TTS_PREWARM_MAX_CHARS = int(os.getenv("TTS_PREWARM_MAX_CHARS", "0") or 0)  # 0 = no per-run budget
+
+PREWARM_NAMED_FILES = [
+    ("yes_no", "tts_cache/yes_or_no.mp3"),
+    ("err_global", "tts_cache/err_global.mp3"),
+    ("err_confirm", "tts_cache/err_confirm.mp3"),
+    ("no_record", "tts_cache/no_recording.mp3"),
+    ("reask", "tts_cache/reask.mp3"),
+    ("reask_cap", "tts_cache/reask_cap.mp3"),
+    ("err_global", "tts_cache/err_result.mp3"),
+]
+PREWARM_STORE_INFO_QUESTIONS = [
+    "what are your hours",
+    "where are you located",
+    "what is your phone number",
+    "what is your return policy",
+]
+
+def build_prewarm_manifest() -> list:
+    """Every line we can synthesize ahead of a call: fixed files, MESSAGES (all languages),
+    common phrases, fixed parts of dialogue templates and current store-info answers"""
+    items = [PrewarmItem(MESSAGES["en"][key], filename, "system") for key, filename in PREWARM_NAMED_FILES]
+    items.append(PrewarmItem("Is there anything else I can help you with today?", "tts_cache/anything_else.mp3", "system"))
+    for lang, messages in MESSAGES.items():
+        items.extend(PrewarmItem(text, None, f"messages:{lang}") for text in messages.values())
+    items.extend(PrewarmItem(text, None, "common") for text in TTSCacheManager.COMMON_PHRASES)
+    if SHARED_DATA_AVAILABLE:
+        try:
+            for section in (shared_data.get_dialogue_templates() or {}).values():
+                for line in (section.values() if isinstance(section, dict) else []):
+                    if not isinstance(line, str):
+                        continue
+                    fragments = static_fragments(line)
+                    if fragments:
+                        items.extend(PrewarmItem(f, None, "templates") for f in fragments)
+                    elif "{" not in line:
+                        items.append(PrewarmItem(line, None, "templates"))
+            greeting = (shared_data.get_store_info() or {}).get("greeting_message")
+            if greeting:
+                items.append(PrewarmItem(greeting, None, "store_info"))
+        except Exception as e:
+            print(f"[PREWARM] Could not read shared data: {e}")
+    for question in PREWARM_STORE_INFO_QUESTIONS:
+        try:
+            _, line = detect_store_info_intent(question)
+        except Exception as e:
+            print(f"[PREWARM] Store-info answer for '{question}' failed: {e}")
+            continue
+        if line:
+            items.append(PrewarmItem(line, None, "store_info"))
+    return items
+
+def _prewarm_is_cached(item) -> bool:
+    # Side-effect-free probe: no hit/miss stats, no stats-file writes
+    if item.filename:
+        return os.path.exists(os.path.join(app.static_folder, item.filename))
+    return CACHE_MANAGER.find_cached_path(item.text) is not None
+
+def _prewarm_synthesize(item):
+    key = CACHE_MANAGER.get_cache_key(item.text)
+    if not item.filename:
+        return TTS_FLIGHTS.do(key, lambda lock: _synthesize_tts_line(item.text, None, None, "Prewarm", None, lock))
+
+    def named(lock):
+        result = elevenlabs_tts_to_file(item.text, item.filename, None, "Prewarm")
+        if result:
+            CACHE_MANAGER.cache_file(item.text, result)
+            CACHE_MANAGER.record_tts_call(len(item.text))
+        return result
+    return TTS_FLIGHTS.do(f"{key}:{item.filename}", named)
+
+PREWARM = PrewarmEngine(
+    _prewarm_synthesize, _prewarm_is_cached,
+    workers=int(os.getenv("TTS_PREWARM_WORKERS", "3") or 3),
+    rate=float(os.getenv("TTS_PREWARM_RATE", "2")),    # syntheses per second
+    burst=float(os.getenv("TTS_PREWARM_BURST", "4")),
+    max_chars=TTS_PREWARM_MAX_CHARS or None,
+)
+
+def start_tts_prewarm() -> bool:
+    """Start a background prewarm run; False if one is running or TTS is not configured"""
+    if not ELEVENLABS_API_KEY or ELEVENLABS_API_KEY.strip() == "":
+        print("[PREWARM] Skipped: ElevenLabs API key not set")
+        return False
+    _ensure_cache_dir()
+    return PREWARM.start(build_prewarm_manifest())
+
+def prewarm_tts_files(wait: bool = True):
+    """Run the prewarm manifest; with wait=False returns immediately (progress at /tts/prewarm)"""
+    try:
+        if start_tts_prewarm() and wait:
+            PREWARM.wait()
     except Exception as e:
         print(f"[BOOT] TTS prewarm failed: {e}")
+    return PREWARM.get_progress()
+
+if TTS_PREWARM_ON_BOOT:
+    # Off the import path: workers report ready first, then prewarm in the background
+    EXECUTOR.schedule(TTS_PREWARM_DELAY_SEC, prewarm_tts_files, False, name="tts_prewarm")
 
 # ======= ASR / language ID =======
 def transcribe_file(local_wav_path: str) -> tuple[str,str,float]:
@@ -2386,7 +2890,25 @@ def repair_transcript(noisy_text: str) -> str:
     if t in SINGLE_WORD_ALLOW:
         return t
 
-    # 4) LLM cleanup as a backstop
+    # 4) Local phonetic/edit-distance match against store vocabulary
+    try:
+        local = get_asr_matcher().repair(t)
+    except Exception as e:
+        print(f"[REPAIR] Local matcher failed: {e}")
+        local = None
+    if local is not None:
+        if not local.text:
+            ASR_REPAIR_STATS["filler"] += 1
+            return "unclear"
+        if local.confidence >= ASR_REPAIR_MIN_CONFIDENCE:
+            ASR_REPAIR_STATS["local"] += 1
+            print(f"[REPAIR] '{raw}' -> '{local.text}' (local, confidence {local.confidence:.2f})")
+            return local.text
+        print(f"[REPAIR] '{raw}' -> '{local.text}' below {ASR_REPAIR_MIN_CONFIDENCE} ({local.confidence:.2f}), asking LLM")
+
+    # 5) LLM cleanup as a backstop
+    ASR_REPAIR_STATS["llm"] += 1
+    llm_start = time.time()
     try:
         prompt = f"""
 You fix garbled phone ASR into the clean item/intent a caller likely said for a retail store.
@@ -2403,6 +2925,7 @@ Noisy ASR: {noisy_text}
             messages=[{"role": "system", "content": prompt}],
             temperature=0.2
         )
+        ASR_REPAIR_STATS["llm_ms"] += (time.time() - llm_start) * 1000
         out = (resp.choices[0].message.content or "").strip().lower()
         out = out.strip().strip(".").strip(",")
         if out in SINGLE_WORD_ALLOW:
@@ -2974,7 +3497,7 @@ def download_twilio_recording(recording_url: str, out_path: str):
     last_exc = None
     for u in url_try:
         try:
-            r = requests.get(u, auth=(TWILIO_SID, TWILIO_TOKEN), timeout=60)
+            r = HTTP.get("twilio", u, auth=(TWILIO_SID, TWILIO_TOKEN))
             r.raise_for_status()
             with open(out_path, "wb") as f:
                 f.write(r.content)
@@ -3494,16 +4017,23 @@ Text: {clean_phrase}"""
     return clean_phrase.strip()
 # ============================================
 
-JOBS = {}
-JOBS_LOCK = threading.Lock()
-
 def _job_set(job_id, **kv):
-    with JOBS_LOCK:
-        JOBS[job_id] = {**JOBS.get(job_id, {}), **kv}
+    # Merge into the shared job store so every worker sees the same job
+    get_job_store().update(state_key(job_id), kv)
 
 def _job_get(job_id):
-    with JOBS_LOCK:
-        return dict(JOBS.get(job_id, {}))
+    return state_get(job_id)
+
+def _submit_job(job_id, fn, *args, priority=PRIORITY_REPLY):
+    """Run job work on the shared executor; a saturated pool fails the job so /result can end the turn"""
+    try:
+        EXECUTOR.submit(fn, *args, priority=priority, name=f"{fn.__name__}:{job_id}",
+                        on_shed=lambda: _job_set(job_id, status="error", error="shed"))
+        return True
+    except ExecutorBusy as e:
+        print(f"[EXECUTOR] rejected job={job_id}: {e}")
+        _job_set(job_id, status="error", error="busy")
+        return False
 
 # Tracks job_ids that already got the initial tiny chirp during the "no meta" race.
 INITIAL_CHIRPED = set()
@@ -3536,9 +4066,10 @@ def quick_lang_guess(text: str, default: str="en") -> str:
         return "es"
     return default
 
-def prepare_reply(job_id: str, local_wav_path: str, base_url: str):
+def prepare_reply(job_id: str, local_wav_path: Optional[str], base_url: str, transcript: Optional[tuple] = None):
+    """transcript: (text, lang, lang_prob) already decoded from the media stream; else local_wav_path is transcribed"""
     try:
-        raw, lang_detected, lang_prob = transcribe_file(local_wav_path)
+        raw, lang_detected, lang_prob = transcript or transcribe_file(local_wav_path)
         
         # If Whisper is not available, fall back to Twilio Gather
         if not raw and not USE_LOCAL_WHISPER:
@@ -3624,7 +4155,8 @@ def prepare_reply(job_id: str, local_wav_path: str, base_url: str):
             confirm_prefix = msg("confirm_prefix", caller_lang)
             voice_phrase = localize_for_confirm(repaired, caller_lang)  # NEW: speak localized phrase
             confirm_line = f"{confirm_prefix} {voice_phrase}?"
-            confirm_url = tts_line_url(confirm_line, None, base_url, job_id, "Confirm")
+            confirm_url = (tts_stitched_url(confirm_line, base_url, job_id, "Confirm")
+                           or tts_line_url(confirm_line, None, base_url, job_id, "Confirm"))
             if not confirm_url or confirm_url == "None":
                 # Fallback to cached yes/no prompt only
                 confirm_url = tts_line_url(msg("yes_no", caller_lang), None, base_url, job_id, "ConfirmFallback")
@@ -3672,8 +4204,106 @@ def prepare_reply(job_id: str, local_wav_path: str, base_url: str):
         })
         print(f"[JOB {job_id}] error -> {e}\n{traceback.format_exc()}")
 
-def prepare_reply_from_recording(job_id: str, recording_url: str, base_url: str):
+# ===== Media Streams ASR =====
+# With MEDIA_STREAM_ASR=1, /voice also streams the caller's audio to /voice_stream, where
+# local Whisper transcribes each utterance as soon as it ends. /handle then replies from
+# that transcript instead of downloading and re-transcribing the <Record> file. Transcripts
+# live in JOB_STORE (any worker can read them) and expire STREAM_TRANSCRIPT_TTL_SEC after
+# the last write, or STREAM_CLOSED_TTL_SEC after the stream stops.
+from media_stream import EnergyVAD, StreamingTranscriber
+try:
+    from flask_sock import Sock
+    SOCK = Sock(app)
+except ImportError:
+    SOCK = None
+MEDIA_STREAM_ASR = _env_bool("MEDIA_STREAM_ASR", False) and SOCK is not None and bool(USE_LOCAL_WHISPER)
+STREAM_SILENCE_MS = int(os.getenv("STREAM_SILENCE_MS", "600"))
+STREAM_FINAL_WAIT_SEC = float(os.getenv("STREAM_FINAL_WAIT_SEC", "1.5"))  # /handle waits this long for the last utterance
+STREAM_TRANSCRIPT_TTL_SEC = int(os.getenv("STREAM_TRANSCRIPT_TTL_SEC", "600"))
+STREAM_CLOSED_TTL_SEC = int(os.getenv("STREAM_CLOSED_TTL_SEC", "60"))
+
+def _stream_key(call_sid: str) -> str:
+    return f"stream:{call_sid}"
+
+def take_stream_transcript(call_sid: str, timeout: float = 0.0) -> Optional[tuple]:
+    """(text, lang, lang_prob) of the utterances streamed since the last take, or None.
+
+    Waits up to timeout seconds for an utterance still being transcribed.
+    Only the reader writes "taken" and only the socket writes "final", so
+    the two never overwrite each other's merges.
+    """
+    if not call_sid:
+        return None
+    state = get_job_store().wait_for(_stream_key(call_sid),
+                               lambda s: len(s.get("final") or []) > s.get("taken", 0) or bool(s.get("closed")),
+                               timeout) or get_job_store().get(_stream_key(call_sid)) or {}
+    final = state.get("final") or []
+    taken = state.get("taken", 0)
+    if len(final) <= taken:
+        return None
+    ttl = STREAM_CLOSED_TTL_SEC if state.get("closed") else STREAM_TRANSCRIPT_TTL_SEC
+    get_job_store().update(_stream_key(call_sid), {"taken": len(final)}, ttl=ttl)
+    text = " ".join(final[taken:]).strip()
+    return (text, state.get("lang") or "en", float(state.get("lang_prob") or 0.0)) if text else None
+
+def _stream_transcriber(call_sid: str, transcribe) -> StreamingTranscriber:
+    """Transcriber for one socket that appends each final utterance to the call's job store entry"""
+    finals, detected = [], {}
+
+    def text_only(audio):
+        text, lang, prob = transcribe(audio)
+        detected.update(lang=lang, lang_prob=prob)
+        return text
+
+    def on_final(text):
+        finals.append(text)
+        get_job_store().update(_stream_key(call_sid), {"final": list(finals), **detected}, ttl=STREAM_TRANSCRIPT_TTL_SEC)
+
+    # partials aren't used on the reply path, so only whole utterances are decoded
+    return StreamingTranscriber(text_only, vad=EnergyVAD(), on_final=on_final,
+                                silence_ms=STREAM_SILENCE_MS, partial_every_ms=60_000)
+
+def voice_stream(ws):
+    """Twilio Media Streams socket: 'start', many 'media', then 'stop'"""
+    transcriber, call_sid = None, None
+    transcribe = _get_whisper_impl()
+    try:
+        while True:
+            raw = ws.receive()
+            if raw is None:
+                break
+            data = json.loads(raw)
+            event = data.get("event")
+            if event == "start":
+                call_sid = data["start"].get("callSid") or data["start"]["streamSid"]
+                print(f"[STREAM] start callSid={call_sid}")
+                if transcribe:
+                    transcriber = _stream_transcriber(call_sid, transcribe)
+            elif event == "media":
+                media = data.get("media") or {}
+                if transcriber and media.get("track", "inbound") == "inbound":
+                    transcriber.feed(media.get("payload", ""))
+            elif event == "stop":
+                break
+    except Exception as e:
+        print(f"[STREAM] error: {e}")
+    finally:
+        if transcriber:
+            transcriber.close()
+        if call_sid:
+            get_job_store().update(_stream_key(call_sid), {"closed": True}, ttl=STREAM_CLOSED_TTL_SEC)
+        print(f"[STREAM] stop callSid={call_sid}")
+
+if SOCK is not None:
+    SOCK.route("/voice_stream")(voice_stream)
+
+def prepare_reply_from_recording(job_id: str, recording_url: str, base_url: str, call_sid: str = ""):
     try:
+        streamed = take_stream_transcript(call_sid, STREAM_FINAL_WAIT_SEC) if MEDIA_STREAM_ASR else None
+        if streamed:
+            print(f"[JOB {job_id}] using streamed transcript for {call_sid}; recording not downloaded")
+            prepare_reply(job_id, None, base_url, transcript=streamed)
+            return
         ensure_static_dir()
         local_wav = os.path.join(app.static_folder, f"last_call_{job_id}.wav")
         download_twilio_recording(recording_url, local_wav)
@@ -3732,6 +4362,55 @@ STOP_SINGLEWORD = {
 	"hi","hello","hey","thanks","thank you","bye","goodbye","yo","sup","okay","ok","please"
 }
 
+# ===== Local ASR repair =====
+# Phonetic + edit-distance match against the store's own vocabulary before the GPT-4 backstop
+from asr_repair import PhoneticMatcher
+ASR_REPAIR_MIN_CONFIDENCE = float(os.getenv("ASR_REPAIR_MIN_CONFIDENCE", "0.8") or 0.8)
+ASR_REPAIR_STATS = {"local": 0, "filler": 0, "llm": 0, "llm_ms": 0.0}
+_ASR_MATCHER = None
+_ASR_MATCHER_INVENTORY = None
+_ASR_MATCHER_LOCK = threading.Lock()
+
+def _build_asr_matcher(inventory) -> PhoneticMatcher:
+    """Vocabulary in trust order: whitelists and known repairs, brands, inventory, department terms"""
+    matcher = PhoneticMatcher()
+    for word in SINGLE_WORD_ALLOW:
+        matcher.add(word, source="allow")
+    for _pat, repl in REPAIR_PATTERNS:
+        matcher.add(repl, source="repair")
+    for brand, mapped in BRAND_FALLBACKS.items():
+        matcher.add(brand, mapped, source="brand")
+        matcher.add(mapped, source="brand")
+    if INVENTORY_AVAILABLE:
+        import inventory_system
+        for item in inventory_system.inventory_manager.inventory.values():
+            matcher.add(item.name, source="inventory")
+            if item.brand:
+                matcher.add(item.brand, source="inventory")
+    for row in inventory or ():
+        matcher.add(row.get("name") or "", source="inventory")
+    if GROCERY_ROUTING_AVAILABLE:
+        from grocery_departments import department_vocabulary
+        for term in department_vocabulary():
+            matcher.add(term, source="department")
+    print(f"[REPAIR] Local ASR vocabulary: {len(matcher)} terms")
+    return matcher
+
+def get_asr_matcher() -> PhoneticMatcher:
+    """Shared matcher, rebuilt when the shared inventory snapshot changes"""
+    global _ASR_MATCHER, _ASR_MATCHER_INVENTORY
+    inventory = None
+    if SHARED_DATA_AVAILABLE:
+        try:
+            inventory = shared_data.get_inventory()
+        except Exception as e:
+            print(f"[REPAIR] Could not load shared inventory: {e}")
+    with _ASR_MATCHER_LOCK:
+        if _ASR_MATCHER is None or inventory is not _ASR_MATCHER_INVENTORY:
+            _ASR_MATCHER = _build_asr_matcher(inventory)
+            _ASR_MATCHER_INVENTORY = inventory
+        return _ASR_MATCHER
+
 # Best-guess department fallback by keyword
 def _guess_department_from_keywords(item: str) -> str | None:
     t = (item or "").lower()
@@ -4149,7 +4828,8 @@ def prepare_reply_from_text(job_id: str, raw_text: str, base_url: str):
             confirm_prefix = msg("confirm_prefix", caller_lang)
             voice_phrase = localize_for_confirm(repaired, caller_lang)
             confirm_line = f"{confirm_prefix} {voice_phrase}?"
-            confirm_url = tts_line_url(confirm_line, None, base_url, job_id, "Confirm")
+            confirm_url = (tts_stitched_url(confirm_line, base_url, job_id, "Confirm")
+                           or tts_line_url(confirm_line, None, base_url, job_id, "Confirm"))
             if not confirm_url or confirm_url == "None":
                 confirm_url = tts_line_url(msg("yes_no", caller_lang), None, base_url, job_id, "ConfirmFallback")
             time.sleep(0.15)
@@ -4272,9 +4952,8 @@ def prepare_final_route(job_id: str, base_url: str, confirmed_text: str):
                     
                     # Get coupons for the inferred department
                     try:
-                        from coupon_system import CouponQuery, CouponManager
-                        query = CouponQuery(category=inferred_dept, search_terms=item)
-                        coupon_manager = CouponManager()
+                        from coupon_system import CouponQuery, coupon_manager
+                        query = CouponQuery(item=item, category=inferred_dept, query_type="item_specific")
                         applicable_coupons = coupon_manager.search_coupons(query)
                         
                         if applicable_coupons:
@@ -4417,6 +5096,37 @@ def state_debug():
 def serve_tts_cache(fname):
     cache_dir = os.path.join(app.root_path, "static", "tts_cache")
     full = os.path.join(cache_dir, fname)
+    if not os.path.isfile(full):
+        sf = TTS_STREAMS.get(full)
+        if sf is not None:
+            # Still being synthesized: follow the partial file until the writer commits it
+            resp = Response(sf.iter_bytes(), mimetype="audio/mpeg")
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+        parts = part_files(full) if not os.path.isfile(full) else []
+        if parts:
+            # Being synthesized by another worker: follow its .part on disk until os.replace
+            resp = Response(follow_part(full, parts[0]), mimetype="audio/mpeg")
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+        if stream_failed(full) and not os.path.isfile(full):
+            # Stream died after its URL was handed out: play the generic error line, not a 404
+            current_app.logger.warning("[TTS STREAM] %s failed; serving fallback audio", fname)
+            resp = make_response(send_from_directory(cache_dir, "err_global.mp3"))
+            resp.headers["Content-Type"] = "audio/mpeg"
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+    if not os.path.isfile(full):
+        text = CACHE_MANAGER.stale_hit(full)
+        if text:
+            # Handed out from the index but deleted since its last rescan (GC in another worker, cache clear)
+            print(f"[CACHE] STALE HIT: {fname} is gone; re-synthesizing '{text[:50]}...'")
+            tts_line_url(text)
+            sf = TTS_STREAMS.get(full)
+            if sf is not None:
+                resp = Response(sf.iter_bytes(), mimetype="audio/mpeg")
+                resp.headers["Cache-Control"] = "no-cache"
+                return resp
     if not os.path.isfile(full):
         # return a plain 404, NOT TwiML
         resp = make_response(b"Not found", 404)
@@ -4428,6 +5138,7 @@ def serve_tts_cache(fname):
     if not mime:
         mime = "audio/mpeg"
 
+    CACHE_GC.record_access(full)
     resp = make_response(send_from_directory(cache_dir, fname, conditional=True))
     resp.headers["Content-Type"] = mime
     # Allow Twilio to cache between polls
@@ -4819,6 +5530,74 @@ def credits_services():
     breakdown = credit_tracker.get_service_breakdown()
     return json.dumps(breakdown, indent=2), 200, {"Content-Type": "application/json"}
 
+@app.route("/asr/stats", methods=["GET"])
+def asr_stats():
+    """Get local Whisper pool stats (queue wait vs. decode time)"""
+    stats = WHISPER_POOL.get_stats() if WHISPER_POOL is not None else {"enabled": False}
+    return json.dumps(stats, indent=2), 200, {"Content-Type": "application/json"}
+
+@app.route("/asr/repair/stats", methods=["GET"])
+def asr_repair_stats():
+    """Get transcript repair counters (local matches vs. LLM fallbacks) and matcher lookups"""
+    stats = dict(ASR_REPAIR_STATS)
+    stats["min_confidence"] = ASR_REPAIR_MIN_CONFIDENCE
+    stats["matcher"] = _ASR_MATCHER.get_stats() if _ASR_MATCHER is not None else None
+    return json.dumps(stats, indent=2), 200, {"Content-Type": "application/json"}
+
+@app.route("/classify/stats", methods=["GET"])
+def classify_stats():
+    """Get per-tier hit rate, latency and agreement for the department classification cascade"""
+    stats = CLASSIFY_CASCADE.get_stats()
+    stats["catalog_lookup"] = DEPARTMENT_LOOKUP.get_stats()
+    return json.dumps(stats, indent=2), 200, {"Content-Type": "application/json"}
+
+@app.route("/classify/cache/stats", methods=["GET"])
+def classify_cache_stats():
+    """Get AI classification cache hit ratio and tier counters"""
+    return json.dumps(AI_CLASSIFICATION_CACHE.get_stats(), indent=2), 200, {"Content-Type": "application/json"}
+
+@app.route("/cache/gc", methods=["GET", "POST"])
+def cache_gc():
+    """GET: last GC report. POST: run GC now (?dry_run=1 to only report what would go)"""
+    if request.method == "POST":
+        dry_run = (request.args.get("dry_run") or request.form.get("dry_run") or "") in ("1", "true", "yes")
+        report = CACHE_GC.run(dry_run=dry_run)
+    else:
+        report = CACHE_GC.last_report or {"ran_at": None}
+    return json.dumps(report, indent=2), 200, {"Content-Type": "application/json"}
+
+@app.route("/executor/stats", methods=["GET"])
+def executor_stats():
+    """Get background executor queue depth, latency and backpressure counters"""
+    return json.dumps(EXECUTOR.get_stats(), indent=2), 200, {"Content-Type": "application/json"}
+
+@app.route("/tts/stream/stats", methods=["GET"])
+def tts_stream_stats():
+    """Get streaming synthesis and single-flight counters (active streams, time to first chunk, coalesced calls)"""
+    stats = TTS_STREAMS.get_stats()
+    stats["single_flight"] = TTS_FLIGHTS.get_stats()
+    return json.dumps(stats, indent=2), 200, {"Content-Type": "application/json"}
+
+@app.route("/tts/prewarm", methods=["GET", "POST"])
+def tts_prewarm():
+    """GET: prewarm progress. POST: start a prewarm run now (no-op while one is running)"""
+    started = start_tts_prewarm() if request.method == "POST" else False
+    progress = PREWARM.get_progress()
+    progress["started"] = started
+    return json.dumps(progress, indent=2), 202 if started else 200, {"Content-Type": "application/json"}
+
+@app.route("/http/stats", methods=["GET"])
+def http_stats():
+    """Get outbound connection reuse per host and latency per service"""
+    return json.dumps(HTTP.get_stats(), indent=2), 200, {"Content-Type": "application/json"}
+
+@app.route("/shared-data/stats", methods=["GET"])
+def shared_data_stats():
+    """Get shared data snapshot cache counters (hits, file re-checks, reloads)"""
+    if not SHARED_DATA_AVAILABLE:
+        return json.dumps({"available": False}), 200, {"Content-Type": "application/json"}
+    return json.dumps(shared_data.get_cache_stats(), indent=2), 200, {"Content-Type": "application/json"}
+
 @app.route("/coupon_process", methods=["GET", "POST"])
 def coupon_process():
 	try:
@@ -4897,8 +5676,15 @@ def result():
     n = int(request.args.get("n", "0") or 0)
     now = int(time.time())
 
-    # Use in-memory JOBS store for reliable state
+    # Shared job store: any worker can answer for any job
     state = _job_get(job_id)
+    if state.get("status") and not _job_settled(state):
+        # Long-poll: hold the webhook open until the job finishes, so a fast
+        # reply plays right away instead of after a hold clip + redirect
+        t0 = time.time()
+        state = state_wait(job_id, RESULT_WAIT_SEC)
+        current_app.logger.info("[RESULT] waited %.0fms job=%s status=%s",
+                                (time.time() - t0) * 1000, job_id, state.get("status", ""))
     status = state.get("status", "")
     reply_url = state.get("reply_url", "")
 
@@ -5037,11 +5823,7 @@ def followup_response():
             save_state(job_id, meta)
             
             # Use the normal prepare_reply_from_text flow
-            threading.Thread(
-                target=prepare_reply_from_text,
-                args=(job_id, repaired, get_base_url()),
-                daemon=True
-            ).start()
+            _submit_job(job_id, prepare_reply_from_text, job_id, repaired, get_base_url())
             
             # Redirect to result polling
             vr.redirect(_result_poll_url(get_base_url(), job_id, meta), method="POST")
@@ -5215,11 +5997,7 @@ def confirm():
             save_state(job_id, meta)
             print(f"[CONFIRM] YES -> starting final routing for job={job_id}")
 
-            threading.Thread(
-                target=prepare_final_route,
-                args=(job_id, get_base_url(), heard_text),
-                daemon=True
-            ).start()
+            _submit_job(job_id, prepare_final_route, job_id, get_base_url(), heard_text, priority=PRIORITY_CONFIRM)
 
             vr.play(HOLD_BG_CDN or HOLDY_MID_CDN)
             vr.redirect(_result_poll_url(get_base_url(), job_id, meta), method="POST")
@@ -5335,11 +6113,7 @@ def confirm():
             save_state(job_id, meta)
             print(f"[CONFIRM] ACCEPT corrected item -> {candidate} (hop {hops}/{CORRECTION_HOPS_MAX}); routing final")
 
-            threading.Thread(
-                target=prepare_final_route,
-                args=(job_id, get_base_url(), candidate),
-                daemon=True
-            ).start()
+            _submit_job(job_id, prepare_final_route, job_id, get_base_url(), candidate, priority=PRIORITY_CONFIRM)
 
             vr.play(HOLD_BG_CDN or HOLDY_MID_CDN)
             vr.redirect(_result_poll_url(get_base_url(), job_id, meta), method="POST")
@@ -5440,7 +6214,7 @@ def twiml_selftest():
     from twilio.twiml.voice_response import VoiceResponse
     vr = VoiceResponse()
     vr.play(public_url("/static/tts_cache/no_recording.mp3"))
-    return app.response_class(response=str(vr), status=200, mimetype="text/xml")
+    return xml_response(vr)
 
 @app.route("/voice", methods=["POST", "GET"])
 def voice_post():
@@ -5449,8 +6223,11 @@ def voice_post():
     # Generate unique call ID for credit tracking
     call_id = str(uuid.uuid4())
     
-    # Log credit usage at start of call
-    log_call_credits(call_id, "start")
+    # Log credit usage at start of call (off the webhook path)
+    try:
+        EXECUTOR.submit(log_call_credits, call_id, "start", priority=PRIORITY_BACKGROUND, name="credits_start")
+    except ExecutorBusy:
+        pass
     
     # Greeting in DEFAULT_LANG (detection happens after first caller audio)
     # Prefer dashboard store greeting if available; fall back to dialogue template
@@ -5469,6 +6246,11 @@ def voice_post():
     print(f"[VOICE] greet_url -> {greet_url} (lang={DEFAULT_LANG}, gather_main={USE_GATHER_MAIN})")
 
     vr = VoiceResponse()
+    if MEDIA_STREAM_ASR:
+        # Caller audio goes to /voice_stream for the whole call; /handle replies from its transcript
+        start = Start()
+        start.stream(url="wss://" + public_url("/voice_stream").split("://", 1)[-1], track="inbound_track")
+        vr.append(start)
     # Audio sources sanity: honor GREETING_URL env override if present
     greeting_url = os.getenv("GREETING_URL", "")
     if greeting_url.startswith("https://"):
@@ -5522,31 +6304,28 @@ def _work(job_id: str, speech: str, digits: str):
             # Generate TTS URL (this may need app context)
             reply_url = tts_line_url(reply_text) or public_url("/static/tts_cache/holdy_tiny.mp3")
             
-            # Mark as done in both stores
-            _job_set(job_id, status="done", reply_url=reply_url)
-            state_set(job_id, {"status": "done", "heard": text, "reply_url": reply_url})
+            # Mark as done in the shared job store
+            _job_set(job_id, status="done", heard=text, reply_url=reply_url)
             
             current_app.logger.info("[WORK] completed job=%s reply_url=%s", job_id, reply_url)
         except Exception as e:
             current_app.logger.exception("[STATE] ERROR in async processing job=%s", job_id)
-            _job_set(job_id, status="error")
-            state_set(job_id, {"status": "error", "error": str(e)})
+            _job_set(job_id, status="error", error=str(e))
 
 def start_async_processing(job_id: str, text: str):
     # This function is kept for compatibility but now uses the new _work
-    threading.Thread(target=_work, args=(job_id, text, ""), daemon=True).start()
+    _submit_job(job_id, _work, job_id, text, "")
 
 def save_state_and_start_async_process(speech: str, digits: str) -> str:
     text = (speech or digits or "").strip()
     job_id = str(uuid.uuid4())
 
-    # Immediately mark job as working in both stores
-    _job_set(job_id, status="working", heard=text)
+    # Immediately mark job as working in the shared job store
     state_set(job_id, {"status": "working", "heard": text})
     
     current_app.logger.info("[JOB] created job=%s heard=%r", job_id, text)
 
-    threading.Thread(target=_work, args=(job_id, speech, digits), daemon=True).start()
+    _submit_job(job_id, _work, job_id, speech, digits)
     return job_id
 
 @app.post("/handle")
@@ -5681,6 +6460,7 @@ def dept_choice():
         # We have a department -> build final speak + end
         # Extract just the product name from the caller's speech
         product_name = _extract_product_name(item or "")
+        record_confirmed_route(product_name, chosen)
         if product_name:
             spoken = (
                 f"Thanks. I'll connect you to {chosen} about {product_name}."
@@ -5741,11 +6521,8 @@ def handle_recording():
             "suspect_spanish": False,
         })
 
-        threading.Thread(
-            target=prepare_reply_from_recording,
-            args=(job_id, recording_url, get_base_url()),
-            daemon=True
-        ).start()
+        call_sid = request.form.get("CallSid") or request.args.get("CallSid") or ""
+        _submit_job(job_id, prepare_reply_from_recording, job_id, recording_url, get_base_url(), call_sid)
 
         vr = VoiceResponse()
         vr.redirect(_result_poll_url(get_base_url(), job_id, load_state(job_id)), method="POST")
@@ -5851,7 +6628,7 @@ def send_sms(to_number: str, body: str) -> bool:
 		else:
 			print("[SMS] Neither TWILIO_MESSAGING_SERVICE_SID nor TWILIO_FROM_NUMBER is set.")
 			return False
-		r = requests.post(url, data=data, auth=(sid, token), timeout=30)
+		r = HTTP.post("twilio", url, data=data, auth=(sid, token), timeout=HTTP.timeout("twilio", read=30))
 		ok = 200 <= r.status_code < 300
 		if not ok:
 			print(f"[SMS] Twilio error {r.status_code}: {r.text}")
@@ -5936,7 +6713,7 @@ class ConsentLogger:
 			"Authorization": f"Bearer {GITHUB_TOKEN}",
 			"Accept": "application/vnd.github+json",
 		})
-		return requests.request(method, url, headers=headers, timeout=60, **kwargs)
+		return HTTP.request("github", method, url, headers=headers, **kwargs)
 	
 	def _get_file(self, path: str):
 		url = f"https://api.github.com/repos/{CONSENT_REPO}/contents/{path}?ref={CONSENT_BRANCH}"
@@ -6119,132 +6896,35 @@ CALLSID_TO_FROM: dict[str, str] = {}
 
 # ===== INTERNET SEARCH FUNCTIONS =====
 
+from product_search import ProductSearcher
+WEB_SEARCH_DEADLINE = float(os.getenv("WEB_SEARCH_DEADLINE", "3.0"))
+WEB_SEARCH_CACHE_PATH = os.getenv("WEB_SEARCH_CACHE_PATH", os.path.join("instance", "web_search_cache.db"))
+PRODUCT_SEARCHER = ProductSearcher(
+    # googlesearch's own request timeout frees the pool thread soon after the deadline gives up on it
+    lambda query, num_results: search(query, num_results=num_results, timeout=WEB_SEARCH_DEADLINE),
+    cache=ClassificationCache(WEB_SEARCH_CACHE_PATH, maxsize=500, ttl=AI_CLASSIFY_CACHE_TTL,
+                              negative_ttl=AI_CLASSIFY_NEGATIVE_TTL, namespace="web-v1"),
+    deadline=WEB_SEARCH_DEADLINE,
+)
+
 def search_product_online(product_name: str) -> dict:
     """
     Search for product information online and return department classification.
     Uses existing department structure from grocery_departments.py for better classification.
     Returns a dict with 'department', 'confidence', and 'description'.
+    Bounded by WEB_SEARCH_DEADLINE seconds; answers are cached per product (product_search.py).
     """
     try:
-        # Clean the product name for search
-        search_query = f"{product_name} grocery store department"
-        
-        # Use Google search to find relevant information (collect URLs and then fetch titles)
-        search_results = []
-        try:
-            for url in search(search_query, num_results=8):
-                search_results.append(url)
-        except Exception as e:
-            print(f"[SEARCH ERROR] Google search failed: {e}")
-            return {'department': 'Customer Service', 'confidence': 0.1, 'description': 'Search failed'}
-
-        if not search_results:
-            return {'department': 'Customer Service', 'confidence': 0.1, 'description': 'Unable to find information online'}
-
-        # Import department keywords from grocery_departments.py
-        from grocery_departments import (
-            PRODUCE_TERMS, DAIRY_TERMS, MEAT_SEAFOOD_TERMS, FROZEN_TERMS, 
-            HEALTH_BEAUTY_TERMS, HOUSEHOLD_TERMS, HARDWARE_TERMS, ELECTRONICS_TERMS,
-            CLOTHING_TERMS, SPORTING_GOODS_TERMS, TOYS_GAMES_TERMS, ARTS_CRAFTS_TERMS,
-            GARDEN_CENTER_TERMS, BOOKS_MEDIA_TERMS, PHARMACY_TERMS
-        )
-
-        # Department scoring based on existing structure
-        department_scores = {
-            'Grocery': 0,
-            'Health & Beauty': 0,
-            'Household': 0,
-            'Customer Service': 0
-        }
-        
-        product_lower = product_name.lower()
-
-        # Score based on product name matching existing department keywords
-        if any(term in product_lower for term in PRODUCE_TERMS.split('|')):
-            department_scores['Grocery'] += 3
-        if any(term in product_lower for term in DAIRY_TERMS.split('|')):
-            department_scores['Grocery'] += 3
-        if any(term in product_lower for term in MEAT_SEAFOOD_TERMS.split('|')):
-            department_scores['Grocery'] += 3
-        if any(term in product_lower for term in FROZEN_TERMS.split('|')):
-            department_scores['Grocery'] += 3
-        if any(term in product_lower for term in HEALTH_BEAUTY_TERMS.split('|')):
-            department_scores['Health & Beauty'] += 3
-        if any(term in product_lower for term in HOUSEHOLD_TERMS.split('|')):
-            department_scores['Household'] += 3
-        if any(term in product_lower for term in PHARMACY_TERMS.split('|')):
-            department_scores['Health & Beauty'] += 4  # Higher weight for pharmacy items
-
-        # Boost scores based on search result URLs and page titles
-        import urllib.parse
-        for url in search_results[:5]:
-            u = url.lower()
-            netloc = urllib.parse.urlparse(u).netloc
-            
-            # Domain-based hints
-            if any(k in netloc for k in ['walgreens', 'cvs', 'riteaid', 'rite-aid', 'boots', 'watsons', 'pharmacy']):
-                department_scores['Health & Beauty'] += 3
-            if any(k in netloc for k in ['kroger', 'albertsons', 'safeway', 'wegmans', 'wholefoods', 'whole-foods', 'aldi', 'foodlion', 'publix', 'grocery']):
-                department_scores['Grocery'] += 2
-            if any(k in netloc for k in ['homedepot', 'home-depot', 'lowes', 'hardware']):
-                department_scores['Household'] += 2
-            
-            # URL path hints
-            if any(k in u for k in ['pharmacy', 'beauty', 'health', 'personal-care', 'personal_care', 'sexual', 'family-planning', 'lubricant', 'condom', 'feminine', 'intimate']):
-                department_scores['Health & Beauty'] += 4
-            if any(k in u for k in ['grocery', 'food', 'pantry', 'beverage', 'produce', 'dairy', 'meat', 'frozen']):
-                department_scores['Grocery'] += 3
-            if any(k in u for k in ['clean', 'laundry', 'household', 'cleaning', 'paper', 'detergent']):
-                department_scores['Household'] += 3
-            
-            # Title hints (fetch quickly with short timeout)
-            try:
-                r = requests.get(url, timeout=2, headers={'User-Agent': 'Mozilla/5.0'})
-                if r.ok:
-                    soup = BeautifulSoup(r.text, 'html.parser')
-                    title = (soup.title.string if soup.title and soup.title.string else '').lower()
-                    text = f"{title}"
-                    
-                    # Check against department keywords in titles
-                    if any(term in text for term in HEALTH_BEAUTY_TERMS.split('|')):
-                        department_scores['Health & Beauty'] += 4
-                    if any(term in text for term in PHARMACY_TERMS.split('|')):
-                        department_scores['Health & Beauty'] += 5
-                    if any(term in text for term in PRODUCE_TERMS.split('|')):
-                        department_scores['Grocery'] += 3
-                    if any(term in text for term in DAIRY_TERMS.split('|')):
-                        department_scores['Grocery'] += 3
-                    if any(term in text for term in HOUSEHOLD_TERMS.split('|')):
-                        department_scores['Household'] += 3
-            except Exception:
-                pass
-
-        # Determine the best department
-        best_department = max(department_scores, key=department_scores.get)
-        
-        # Special handling for health/beauty items that might be misclassified
-        if any(term in product_lower for term in ['lubricant', 'lube', 'condom', 'intimate', 'sexual', 'family planning', 'feminine', 'personal care']):
-            best_department = 'Health & Beauty'
-            department_scores['Health & Beauty'] += 5
-        
-        confidence = min(department_scores[best_department] / 8, 0.95)  # Cap at 95% confidence
-
-        if confidence < 0.3:
-            best_department = 'Customer Service'
-            confidence = 0.1
-
-        print(f"[SEARCH CLASSIFICATION] {product_name} -> {best_department} (confidence: {confidence:.2f})")
-
-        return {
-            'department': best_department,
-            'confidence': confidence,
-            'description': f'Found information about {product_name} online'
-        }
-        
+        return PRODUCT_SEARCHER.search(product_name)
     except Exception as e:
         print(f"[SEARCH ERROR] {e}")
         return {'department': 'Customer Service', 'confidence': 0.1, 'description': 'Search failed'}
 
+@app.route("/search/stats", methods=["GET"])
+def search_stats():
+    """Get web product search counters (cache hits, deadline hits, pages fetched/cancelled)"""
+    return json.dumps(PRODUCT_SEARCHER.get_stats(), indent=2), 200, {"Content-Type": "application/json"}
+
 def should_use_internet_search(product_name: str) -> bool:
     """
     Determine if we should use internet search for this product.
@@ -6549,6 +7229,13 @@ def api_get_coupons():
         app.logger.error(f"Error getting coupons: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/coupons/stats", methods=["GET"])
+def coupon_stats():
+    """Get coupon catalog size, active-set size and index refresh counters"""
+    if not COUPON_AVAILABLE:
+        return jsonify({"error": "Coupon system not available"}), 500
+    return json.dumps(coupon_manager.get_stats(), indent=2), 200, {"Content-Type": "application/json"}
+
 @app.route("/api/coupons", methods=["POST"])
 def api_add_coupon():
     """Add a new coupon"""
@@ -6666,10 +7353,11 @@ def api_get_usage():
                 }
                 
                 # Get subscription info
-                subscription_response = requests.get(
+                subscription_response = HTTP.get(
+                    "elevenlabs",
                     "https://api.elevenlabs.io/v1/user/subscription",
                     headers=headers,
-                    timeout=10
+                    timeout=HTTP.timeout("elevenlabs", read=10)
                 )
                 
                 if subscription_response.status_code == 200:
@@ -6765,15 +7453,16 @@ def api_unhide_item():
 def api_update_cache():
     try:
         if SHARED_DATA_AVAILABLE:
+            shared_data.invalidate()
             _ = shared_data.get_dialogue_templates()
             _ = shared_data.get_store_info()  # ensure greeting/store info refresh
+            _register_dialogue_templates(force=True)
         return jsonify({"success": True})
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
 if __name__ == "__main__":
     PORT = int(os.getenv("PORT", "5003"))
-    prewarm_tts_files()
     
     # Log ASR configuration
     if USE_GATHER_MAIN:
@@ -6783,7 +7472,7 @@ if __name__ == "__main__":
     
     if USE_LOCAL_WHISPER:
         if FasterWhisper is not None:
-            print(f"[ASR] Local Whisper: faster-whisper available (model={WHISPER_MODEL_NAME})")
+            print(f"[ASR] Local Whisper: faster-whisper available (model={WHISPER_MODEL_NAME}, max_concurrent={WHISPER_MAX_CONCURRENT})")
         elif WhisperLegacy is not None:
             print(f"[ASR] Local Whisper: openai-whisper available (model={WHISPER_MODEL_NAME})")
         else:
@@ -0,0 +1,246 @@
+"""
+Local ASR Transcript Repair for AI Call Router
+Maps garbled phone ASR to the store's own product and department vocabulary
+using phonetic keys plus bounded edit distance, with a confidence score, so
+the LLM cleanup in repair_transcript() is only needed for what this misses
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from inventory_index import TermIndex, tokenize
+
+# Question scaffolding, greetings and hesitations around the item a caller names.
+# Unmatched, they are dropped instead of counting against the confidence.
+FILLER_WORDS = frozenset("""
+    a an the i im m s ll d ve re me my we you your it its that this these those there
+    do does did have has had got get getting carry sell sells stock stocked in on at of for to from with
+    any some is are was be can could would will where what which how
+    looking look find need needed want wanna gonna like um uh uhh hmm er so and or just
+    yeah yes no hi hello hey thanks thank please okay ok well sir maam
+""".split())
+
+_PHONETIC_RULES = [(re.compile(p), r) for p, r in (
+    (r"^(kn|gn|pn)", "n"),
+    (r"^wr", "r"),
+    (r"^ps", "s"),
+    (r"^x", "s"),
+    (r"^wh", "w"),
+    (r"x", "ks"),
+    (r"ph", "f"),
+    (r"sch", "sk"),
+    (r"tch|ch|sh", "x"),      # x = "sh"/"ch" sound from here on
+    (r"th", "0"),
+    (r"ck", "k"),
+    (r"c(?=[eiy])", "s"),
+    (r"c|q", "k"),
+    (r"z", "s"),
+    (r"v", "f"),
+    (r"dg(?=[eiy])", "j"),
+    (r"gh(?![aeiou])", ""),
+    (r"g(?=[eiy])", "j"),
+    (r"d", "t"),
+    (r"(.)\1+", r"\1"),
+)]
+_DROP_AFTER_FIRST = str.maketrans("", "", "aeiouhwy")
+
+
+def phonetic_key(text: str) -> str:
+    """Metaphone-style sound key of text with spaces removed ("car hard" and "carhartt" -> "krrt")"""
+    w = "".join(tokenize(text))
+    if not w:
+        return ""
+    for rx, repl in _PHONETIC_RULES:
+        w = rx.sub(repl, w)
+    if not w:
+        return ""
+    first = "a" if w[0] in "aeiouy" else w[0]
+    return first + w[1:].translate(_DROP_AFTER_FIRST)
+
+
+def bounded_levenshtein(a: str, b: str, max_dist: int) -> int:
+    """Edit distance between a and b, or max_dist + 1 as soon as it must exceed max_dist"""
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > max_dist:
+        return max_dist + 1
+    if len(a) > len(b):
+        a, b = b, a
+    prev = list(range(len(a) + 1))
+    for j, cb in enumerate(b, 1):
+        cur = [j] + [0] * len(a)
+        row_min = j
+        for i, ca in enumerate(a, 1):
+            cur[i] = min(prev[i] + 1, cur[i - 1] + 1, prev[i - 1] + (ca != cb))
+            if cur[i] < row_min:
+                row_min = cur[i]
+        if row_min > max_dist:
+            return max_dist + 1
+        prev = cur
+    return min(prev[-1], max_dist + 1)
+
+
+def _deletes(key: str) -> Set[str]:
+    return {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+class Match(NamedTuple):
+    text: str          # what to say/search for (a brand fallback may expand the term)
+    term: str          # the vocabulary phrase that matched
+    confidence: float
+    source: str
+
+
+class Repair(NamedTuple):
+    text: str          # "" when the transcript held nothing but filler
+    confidence: float  # matched share of the content, weighted by match confidence
+    matches: List[Match]
+
+
+class _Entry(NamedTuple):
+    phrase: str
+    output: str
+    source: str
+    key: str
+    order: int
+
+
+class PhoneticMatcher:
+    """Fuzzy lookup of ASR word windows in a fixed vocabulary.
+
+    Terms are indexed by their spelling with spaces removed (so "car hart"
+    can still reach "carhartt"), by phonetic key, and by every single-letter
+    deletion of that key. A lookup gathers candidates whose key is within
+    one edit of the window's key plus terms sharing spelling trigrams, and
+    scores each with a bounded edit distance over spelling and key; nothing
+    is compared against the whole vocabulary.
+
+    repair(text) segments the transcript greedily, longest window first,
+    keeps the best match for each window above min_term_confidence, drops
+    unmatched filler words and keeps other unmatched words as they are.
+    Terms added first win exact ties, so add the most trusted sources first.
+    """
+
+    MIN_FUZZY_LEN = 4
+
+    def __init__(self, terms: Iterable[Tuple[str, str]] = (), max_words: int = 6,
+                 min_term_confidence: float = 0.75):
+        self.max_words = max_words
+        self.min_term_confidence = min_term_confidence
+        self._entries: Dict[str, _Entry] = {}
+        self._spelling = TermIndex()
+        self._keys: Dict[str, Set[str]] = {}
+        self._key_deletes: Dict[str, Set[str]] = {}
+        self._longest = 1
+        self.stats = {"repairs": 0, "lookups": 0, "exact": 0, "fuzzy": 0, "misses": 0, "candidates": 0}
+        for phrase, source in terms:
+            self.add(phrase, source=source)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, phrase: str, output: Optional[str] = None, source: str = ""):
+        words = tokenize(phrase)
+        compact = "".join(words)
+        if not compact or compact in self._entries:
+            return
+        key = phonetic_key(compact)
+        self._entries[compact] = _Entry(" ".join(words), output or " ".join(words), source, key,
+                                        len(self._entries))
+        self._longest = min(self.max_words, max(self._longest, len(words)))
+        self._spelling.add(compact)
+        self._keys.setdefault(key, set()).add(compact)
+        for variant in _deletes(key):
+            self._key_deletes.setdefault(variant, set()).add(key)
+
+    # --- lookup ---
+    def _candidates(self, compact: str, key: str) -> Set[str]:
+        keys = {key} | self._key_deletes.get(key, set())   # same key, or one letter longer
+        for variant in _deletes(key):                       # one letter shorter, or substituted
+            keys.add(variant)
+            keys |= self._key_deletes.get(variant, set())
+        found: Set[str] = set()
+        for k in keys:
+            found |= self._keys.get(k, set())
+        found.update(term for term, _ in self._spelling.similar(compact, limit=10, min_score=0.4))
+        return found
+
+    def _score(self, compact: str, key: str, entry_compact: str, entry: _Entry) -> Tuple[float, float]:
+        """(confidence, spelling similarity); confidence 0 when out of bounds"""
+        longest = max(len(compact), len(entry_compact))
+        max_dist = max(1, len(entry_compact) // 3)
+        dist = bounded_levenshtein(compact, entry_compact, max_dist + 2)
+        text_sim = max(0.0, 1 - dist / longest)
+        key_dist = bounded_levenshtein(key, entry.key, 1)
+        key_sim = 1 - key_dist / max(len(key), len(entry.key), 1) if key_dist <= 1 else 0.0
+        # Within the spelling bound, or a different spelling of the same sounds
+        if dist > max_dist and key_dist != 0:
+            return 0.0, text_sim
+        return round(0.5 * text_sim + 0.5 * key_sim, 3), text_sim
+
+    def lookup(self, text: str, exact_only: bool = False) -> Optional[Match]:
+        """Best vocabulary match for a short phrase, or None below min_term_confidence"""
+        compact = "".join(tokenize(text))
+        if not compact:
+            return None
+        self.stats["lookups"] += 1
+        entry = self._entries.get(compact)
+        if entry is not None:
+            self.stats["exact"] += 1
+            return Match(entry.output, entry.phrase, 1.0, entry.source)
+        if exact_only or len(compact) < self.MIN_FUZZY_LEN:
+            self.stats["misses"] += 1
+            return None
+        key = phonetic_key(compact)
+        candidates = self._candidates(compact, key)
+        self.stats["candidates"] += len(candidates)
+        best, best_rank = None, None
+        for cand in candidates:
+            entry = self._entries[cand]
+            confidence, text_sim = self._score(compact, key, cand, entry)
+            if confidence < self.min_term_confidence:
+                continue
+            rank = (-confidence, -text_sim, entry.order)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = Match(entry.output, entry.phrase, confidence, entry.source), rank
+        self.stats["fuzzy" if best else "misses"] += 1
+        return best
+
+    def repair(self, text: str) -> Repair:
+        tokens = tokenize(text)
+        pieces: List[str] = []
+        matches: List[Match] = []
+        weighted = total = 0.0
+        i = 0
+        while i < len(tokens):
+            match, width = None, 1
+            for width in range(min(self._longest, len(tokens) - i), 0, -1):
+                window = tokens[i:i + width]
+                if width == 1 and window[0] in FILLER_WORDS:
+                    break
+                # A window may start or end on a filler word only if it is a known phrase
+                edge_filler = window[0] in FILLER_WORDS or window[-1] in FILLER_WORDS
+                match = self.lookup(" ".join(window), exact_only=edge_filler)
+                if match:
+                    break
+            if match:
+                size = sum(len(t) for t in tokens[i:i + width])
+                weighted += match.confidence * size
+                total += size
+                matches.append(match)
+                if f" {match.text} " not in f" {' '.join(pieces)} ":
+                    pieces.append(match.text)
+                i += width
+                continue
+            if tokens[i] not in FILLER_WORDS:
+                total += len(tokens[i])
+                pieces.append(tokens[i])
+            i += 1
+        self.stats["repairs"] += 1
+        confidence = round(weighted / total, 3) if total else 0.0
+        return Repair(" ".join(pieces), confidence, matches)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats.update(terms=len(self._entries), phonetic_keys=len(self._keys))
+        return stats
@@ -0,0 +1,176 @@
+"""
+Audio Cache GC for AI Call Router
+Keeps static/ and static/tts_cache inside a disk budget: per-call artifacts and
+recordings are swept by age, the durable phrase cache is evicted LRU/LFU
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+POOL_RECORDING = "recording"  # last_call_<uuid>.wav/.mp3 caller recordings
+POOL_EPHEMERAL = "ephemeral"  # per-call / per-job TTS (confirm_<uuid>, info_<intent>_<job>, tts_<hex>)
+POOL_DURABLE = "durable"      # hash-keyed phrase cache shared across calls
+POOLS = (POOL_RECORDING, POOL_EPHEMERAL, POOL_DURABLE)
+
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.I)
+_TTS_SAY = re.compile(r"tts_[0-9a-f]{8}\.mp3")
+_PHRASE = re.compile(r"(prewarm_)?[0-9a-f]{16,64}\.mp3")
+_AUDIO_EXT = (".mp3", ".wav")
+# Quoted audio file name in source, optionally behind a path ("/static/tts_cache/1a99e9963544b45c.mp3")
+_ASSET_REF = re.compile(r"""["'](?:[^"'\s]*/)?([\w.-]+\.(?:mp3|wav))["']""")
+
+
+def referenced_assets(source_files: Iterable[str]) -> frozenset:
+    """Audio file names hard-coded in source files; pass these as CacheGC(protected=...)"""
+    names = set()
+    for path in source_files:
+        try:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                names.update(_ASSET_REF.findall(f.read()))
+        except OSError as e:
+            print(f"[CACHE GC] could not scan {path} for asset references: {e}")
+    return frozenset(names)
+
+
+def classify_file(name: str, protected: Iterable[str] = ()) -> Optional[str]:
+    """Pool for a file name, or None for protected assets (greetings, hold clips, stats, names in protected)"""
+    if not name.endswith(_AUDIO_EXT) or name in protected:
+        return None
+    if name.startswith("last_call_") and _UUID.search(name):
+        return POOL_RECORDING
+    if _UUID.search(name) or _TTS_SAY.fullmatch(name):
+        return POOL_EPHEMERAL
+    if _PHRASE.fullmatch(name):
+        return POOL_DURABLE
+    return None
+
+
+class CacheGC:
+    """Budgeted garbage collector for generated audio.
+
+    budgets / max_age map pool -> bytes / seconds (None = no limit). Files
+    younger than min_age are never removed so audio queued in a live call
+    is safe. policy is "lru" or "lfu"; access data comes from record_access()
+    and falls back to file mtime. record_access() with a path also bumps the
+    file's mtime (at most every touch_interval seconds), so hits seen by any
+    worker count as recency for every worker's GC. Names in protected (e.g.
+    referenced_assets() of the app source) are never swept or evicted.
+    """
+
+    def __init__(self, dirs: Iterable[str], budgets: Optional[Dict[str, Optional[int]]] = None,
+                 max_age: Optional[Dict[str, Optional[float]]] = None, min_age: float = 600,
+                 policy: str = "lru", on_delete: Optional[Callable[[str], None]] = None,
+                 protected: Iterable[str] = (), touch_interval: float = 300):
+        self.dirs = list(dirs)
+        self.protected = frozenset(protected)
+        self.touch_interval = touch_interval
+        self.budgets = dict(budgets or {})
+        self.max_age = dict(max_age or {})
+        self.min_age = min_age
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"Unknown cache GC policy: {policy}")
+        self.policy = policy
+        self.on_delete = on_delete
+        self._hits: Dict[str, int] = {}
+        self._last_access: Dict[str, float] = {}
+        self._run_lock = threading.Lock()
+        self.last_report: Optional[Dict] = None
+
+    def record_access(self, path: str):
+        name = os.path.basename(path)
+        now = time.time()
+        self._hits[name] = self._hits.get(name, 0) + 1
+        self._last_access[name] = now
+        if os.path.dirname(path):
+            try:
+                if now - os.stat(path).st_mtime >= self.touch_interval:
+                    os.utime(path, (now, now))
+            except OSError:
+                pass
+
+    def scan(self) -> Dict[str, List[dict]]:
+        pools = {p: [] for p in POOLS}
+        for d in self.dirs:
+            try:
+                with os.scandir(d) as it:
+                    for e in it:
+                        pool = classify_file(e.name, self.protected)
+                        if pool is None or not e.is_file(follow_symlinks=False):
+                            continue
+                        st = e.stat(follow_symlinks=False)
+                        pools[pool].append({"path": e.path, "name": e.name,
+                                            "size": st.st_size, "mtime": st.st_mtime})
+            except FileNotFoundError:
+                continue
+        return pools
+
+    def _eviction_key(self, entry: dict):
+        last = self._last_access.get(entry["name"], entry["mtime"])
+        if self.policy == "lfu":
+            return (self._hits.get(entry["name"], 0), last)
+        return last
+
+    def _delete(self, entry: dict, dry_run: bool) -> bool:
+        if dry_run:
+            return True
+        try:
+            os.remove(entry["path"])
+        except FileNotFoundError:
+            return False  # another worker got there first
+        except OSError as e:
+            print(f"[CACHE GC] could not remove {entry['path']}: {e}")
+            return False
+        self._hits.pop(entry["name"], None)
+        self._last_access.pop(entry["name"], None)
+        if self.on_delete:
+            try:
+                self.on_delete(entry["path"])
+            except Exception as e:
+                print(f"[CACHE GC] on_delete failed for {entry['name']}: {e}")
+        return True
+
+    def run(self, dry_run: bool = False, now: Optional[float] = None) -> Dict:
+        """Sweep by age, then evict down to budget. Returns a per-pool report."""
+        with self._run_lock:
+            start = time.time()
+            now = now if now is not None else start
+            report = {"dry_run": dry_run, "policy": self.policy, "pools": {}}
+            for pool, entries in self.scan().items():
+                total = sum(e["size"] for e in entries)
+                stats = {"files": len(entries), "bytes": total, "expired": 0,
+                         "evicted": 0, "reclaimed_bytes": 0}
+                limit = self.max_age.get(pool)
+                live = []
+                for e in entries:
+                    if limit is not None and now - e["mtime"] > limit and self._delete(e, dry_run):
+                        stats["expired"] += 1
+                        stats["reclaimed_bytes"] += e["size"]
+                        total -= e["size"]
+                    else:
+                        live.append(e)
+                budget = self.budgets.get(pool)
+                if budget is not None and total > budget:
+                    for e in sorted(live, key=self._eviction_key):
+                        if total <= budget:
+                            break
+                        if now - e["mtime"] < self.min_age:
+                            continue
+                        if self._delete(e, dry_run):
+                            stats["evicted"] += 1
+                            stats["reclaimed_bytes"] += e["size"]
+                            total -= e["size"]
+                stats["bytes_after"] = total
+                stats["budget"] = budget
+                report["pools"][pool] = stats
+            report["reclaimed_bytes"] = sum(p["reclaimed_bytes"] for p in report["pools"].values())
+            report["deleted_files"] = sum(p["expired"] + p["evicted"] for p in report["pools"].values())
+            report["duration_ms"] = round((time.time() - start) * 1000, 1)
+            report["ran_at"] = now
+            self.last_report = report
+        print(f"[CACHE GC] {'would reclaim' if dry_run else 'reclaimed'} "
+              f"{report['reclaimed_bytes']:,} bytes in {report['deleted_files']} files "
+              f"({report['duration_ms']}ms)")
+        return report
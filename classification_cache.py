@@ -0,0 +1,184 @@
+"""
+Classification Cache for AI Call Router
+Two-tier cache for AI department classifications: an in-memory LRU with TTL
+in front of a SQLite file shared by every worker on the host
+"""
+
+import collections
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class ClassificationCache:
+    """LRU (memory) -> SQLite (disk) cache of product -> department.
+
+    Positive results live for ttl seconds; negative results (errors, invalid
+    model output) live for negative_ttl seconds so a transient API failure
+    is retried soon instead of pinning the product to the fallback forever.
+    Pass path="" for a memory-only cache.
+    """
+
+    PURGE_EVERY = 200  # disk writes between expired-row sweeps
+
+    def __init__(self, path: str = "instance/classification_cache.db", maxsize: int = 2000,
+                 ttl: int = 30 * 86400, negative_ttl: int = 300, namespace: str = ""):
+        self.path = path
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.namespace = namespace
+        self._mem = collections.OrderedDict()  # key -> (expires_ts, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ready = False
+        self._writes = 0
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "negative_sets": 0,
+            "evictions": 0,
+            "disk_errors": 0,
+        }
+
+    def _key(self, key: str) -> str:
+        key = (key or "").lower().strip()
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    # ---- disk tier ----
+    def _conn(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._ready:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS classifications ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL,"
+                    " negative INTEGER NOT NULL DEFAULT 0,"
+                    " expires_at REAL NOT NULL)"
+                )
+                self._ready = True
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, key: str):
+        try:
+            conn = self._conn()
+            if conn is None:
+                return None
+            return conn.execute(
+                "SELECT value, expires_at FROM classifications WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._stats["disk_errors"] += 1
+            print(f"[AI CLASSIFY] cache read failed: {e}")
+            return None
+
+    def _disk_set(self, key: str, value: str, negative: bool, expires_at: float):
+        try:
+            conn = self._conn()
+            if conn is None:
+                return
+            conn.execute(
+                "INSERT OR REPLACE INTO classifications (key, value, negative, expires_at) VALUES (?, ?, ?, ?)",
+                (key, value, int(negative), expires_at),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM classifications WHERE expires_at < ?", (time.time(),))
+        except sqlite3.Error as e:
+            self._stats["disk_errors"] += 1
+            print(f"[AI CLASSIFY] cache write failed: {e}")
+
+    # ---- memory tier ----
+    def _mem_put(self, key: str, value: str, expires_at: float):
+        # caller holds self._lock
+        self._mem[key] = (expires_at, value)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.maxsize:
+            self._mem.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    # ---- public API ----
+    def get(self, key: str) -> Optional[str]:
+        k = self._key(key)
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(k)
+            if item:
+                if item[0] >= now:
+                    self._mem.move_to_end(k)
+                    self._stats["memory_hits"] += 1
+                    return item[1]
+                del self._mem[k]
+        row = self._disk_get(k)
+        with self._lock:
+            if row:
+                self._mem_put(k, row[0], row[1])
+                self._stats["disk_hits"] += 1
+                return row[0]
+            self._stats["misses"] += 1
+        return None
+
+    def set(self, key: str, value: str, negative: bool = False):
+        k = self._key(key)
+        expires_at = time.time() + (self.negative_ttl if negative else self.ttl)
+        with self._lock:
+            self._mem_put(k, value, expires_at)
+            self._stats["negative_sets" if negative else "sets"] += 1
+        self._disk_set(k, value, negative, expires_at)
+
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """(product, department) for every live positive answer on disk in this namespace"""
+        prefix = f"{self.namespace}:" if self.namespace else ""
+        try:
+            conn = self._conn()
+            if conn is None:
+                return
+            rows = conn.execute(
+                "SELECT key, value FROM classifications WHERE negative = 0 AND expires_at >= ?"
+                " AND substr(key, 1, ?) = ?",
+                (time.time(), len(prefix), prefix),
+            ).fetchall()
+        except sqlite3.Error as e:
+            print(f"[AI CLASSIFY] cache scan failed: {e}")
+            return
+        for key, value in rows:
+            yield key[len(prefix):], value
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+        try:
+            conn = self._conn()
+            if conn is not None:
+                conn.execute("DELETE FROM classifications")
+        except sqlite3.Error as e:
+            print(f"[AI CLASSIFY] cache clear failed: {e}")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            size = len(self._mem)
+        hits = s["memory_hits"] + s["disk_hits"]
+        lookups = hits + s["misses"]
+        s.update({
+            "memory_size": size,
+            "memory_max": self.maxsize,
+            "disk_path": self.path or None,
+            "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_hit_ratio": round(s["memory_hits"] / lookups, 3) if lookups else 0.0,
+        })
+        return s
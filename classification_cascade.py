@@ -0,0 +1,131 @@
+"""
+Classification Cascade for AI Call Router
+Runs department classifiers cheapest first (rules, cached answers, local
+model, LLM, web search) and stops at the first tier that is confident
+enough, keeping per-tier hit rates, latency and agreement counters
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+Answer = Optional[Tuple[str, float]]  # (department, confidence in [0, 1])
+
+
+class Tier(NamedTuple):
+    name: str
+    classify: Callable[[str], Answer]
+    threshold: float                                   # stop here at or above this confidence
+    applies: Optional[Callable[[str], bool]] = None    # skip the tier (not counted) when False
+
+
+class CascadeResult(NamedTuple):
+    department: Optional[str]
+    confidence: float
+    tier: Optional[str]                                # tier the answer came from
+    trail: List[Tuple[str, Optional[str], float, float]]  # (tier, department, confidence, ms) per tier run
+
+    def ran(self, tier: str) -> bool:
+        return any(name == tier for name, *_ in self.trail)
+
+
+class ClassificationCascade:
+    """Tiered classifier with early stop.
+
+    Each tier returns (department, confidence) or None. The first answer at
+    or above its tier's threshold wins; otherwise the most confident
+    below-threshold answer is used once every tier has run. Tier errors are
+    logged and treated as no answer.
+
+    Whenever a tier answers below its threshold and a later tier settles the
+    question, the cascade records whether the two agreed. That agreement
+    rate is the tier's observed precision in the band it is not trusted
+    with, which is what to look at before moving a threshold.
+    """
+
+    LOG_EVERY = 100  # classifications between per-tier summary lines
+
+    def __init__(self, tiers: Sequence[Tier]):
+        self.tiers = list(tiers)
+        self._lock = threading.Lock()
+        self._classifications = 0
+        self._unresolved = 0
+        self._stats: Dict[str, Dict[str, float]] = {
+            t.name: {"calls": 0, "answered": 0, "accepted": 0, "errors": 0, "total_ms": 0.0,
+                     "checked": 0, "agreed": 0}
+            for t in self.tiers
+        }
+
+    def classify(self, text: str) -> CascadeResult:
+        trail = []
+        best = None
+        result = None
+        for tier in self.tiers:
+            if tier.applies is not None and not tier.applies(text):
+                continue
+            start = time.perf_counter()
+            try:
+                answer = tier.classify(text)
+            except Exception as e:
+                print(f"[CASCADE] {tier.name} tier failed for '{text}': {e}")
+                answer = None
+                with self._lock:
+                    self._stats[tier.name]["errors"] += 1
+            ms = (time.perf_counter() - start) * 1000
+            dept, confidence = answer if answer and answer[0] else (None, 0.0)
+            trail.append((tier.name, dept, confidence, ms))
+            with self._lock:
+                s = self._stats[tier.name]
+                s["calls"] += 1
+                s["total_ms"] += ms
+                if dept:
+                    s["answered"] += 1
+            if not dept:
+                continue
+            if confidence >= tier.threshold:
+                with self._lock:
+                    self._stats[tier.name]["accepted"] += 1
+                result = CascadeResult(dept, confidence, tier.name, trail)
+                break
+            if best is None or confidence > best[1]:
+                best = (dept, confidence, tier.name)
+
+        settled = result is not None
+        if not settled:
+            result = CascadeResult(best[0], best[1], best[2], trail) if best else CascadeResult(None, 0.0, None, trail)
+        self._record(text, result, settled)
+        return result
+
+    def _record(self, text: str, result: CascadeResult, settled: bool):
+        with self._lock:
+            self._classifications += 1
+            if result.department is None:
+                self._unresolved += 1
+            elif settled:
+                # Lower tiers that answered below threshold: did they agree with the settled answer?
+                for name, dept, _conf, _ms in result.trail[:-1]:
+                    if dept is not None:
+                        self._stats[name]["checked"] += 1
+                        self._stats[name]["agreed"] += dept == result.department
+            log_summary = self._classifications % self.LOG_EVERY == 0
+        steps = " -> ".join(f"{name} {dept or '-'} {conf:.2f} ({ms:.1f}ms)" for name, dept, conf, ms in result.trail)
+        print(f"[CASCADE] '{text}' -> {result.department} via {result.tier} | {steps}")
+        if log_summary:
+            tiers = self.get_stats()["tiers"]
+            print("[CASCADE] per-tier: " + ", ".join(
+                f"{name} hit {s['hit_rate']:.0%} avg {s['avg_ms']:.1f}ms" for name, s in tiers.items()))
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = {name: dict(s) for name, s in self._stats.items()}
+            total, unresolved = self._classifications, self._unresolved
+        thresholds = {t.name: t.threshold for t in self.tiers}
+        for name, s in stats.items():
+            calls = s["calls"]
+            s["threshold"] = thresholds[name]
+            s["hit_rate"] = round(s["accepted"] / calls, 3) if calls else 0.0
+            s["share"] = round(s["accepted"] / total, 3) if total else 0.0
+            s["avg_ms"] = round(s["total_ms"] / calls, 2) if calls else 0.0
+            s["agreement"] = round(s["agreed"] / s["checked"], 3) if s["checked"] else None
+            s["total_ms"] = round(s["total_ms"], 1)
+        return {"classifications": total, "unresolved": unresolved, "tiers": stats}
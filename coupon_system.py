@@ -5,6 +5,7 @@ Handles coupon lookups, discount codes, and promotional offers
 
 import re
 import random
+import threading
 from dataclasses import dataclass
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
@@ -33,12 +34,129 @@ class CouponQuery:
     customer_id: Optional[str] = None
     query_type: str = "general"  # "item_specific", "category", "general", "code_lookup"
 
+def _coupon_tokens(text: str) -> set:
+    """Lowercase word tokens of text plus their singular forms ("cereals" -> "cereal", "tomatoes" -> "tomato")"""
+    tokens = set()
+    for tok in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        tokens.add(tok)
+        if len(tok) > 3 and tok.endswith("s"):
+            tokens.add(tok[:-1])
+            if tok.endswith("es"):
+                tokens.add(tok[:-2])
+    return tokens
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if isinstance(value, datetime) or value is None:
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+def coupon_from_shared(row: Dict[str, Any]) -> Optional[Coupon]:
+    """Coupon for a dashboard (shared_data) coupon row, or None if it is switched off"""
+    if not row.get("is_active", True):
+        return None
+    description = row.get("description") or row.get("code") or ""
+    items = list(row.get("applicable_items") or row.get("items") or [])
+    categories = list(row.get("applicable_categories") or ([row["department"]] if row.get("department") else []))
+    if not row.get("is_store_wide", True) and not items and not categories:
+        items = [description]  # product-specific coupon described in free text
+    discount_type = row.get("discount_type") or "percentage"
+    return Coupon(
+        id=f"DASH{row.get('id', '')}",
+        name=description,
+        description=description,
+        discount_type="dollar_off" if discount_type == "fixed" else discount_type,
+        discount_value=float(row.get("discount_value") or 0),
+        minimum_purchase=row.get("minimum_purchase"),
+        valid_from=_parse_datetime(row.get("valid_from")),
+        valid_until=_parse_datetime(row.get("expires_at") or row.get("valid_until")),
+        applicable_items=items or None,
+        applicable_categories=categories or None,
+        code=row.get("code"),
+    )
+
 class CouponManager:
-    """Manages coupon lookups and discount information"""
+    """Manages coupon lookups and discount information
+
+    Use the shared `coupon_manager` instance: the catalog (simulated coupons
+    plus the dashboard's shared_data coupons) is loaded once, the currently
+    valid coupons are precomputed and indexed by item/category token, and
+    that active set is only rebuilt when a coupon's valid_from/valid_until
+    passes, the dashboard's coupons change, or the day rolls over (the
+    simulated coupons' dates are relative to the day they are loaded).
+    """
+    
+    def __init__(self, use_shared_data: bool = True):
+        self.use_shared_data = use_shared_data
+        self.coupons = []
+        self._lock = threading.Lock()
+        self._shared_snapshot = None
+        self._loaded_on = None
+        self._active: tuple = ()
+        self._by_token: Dict[str, tuple] = {}
+        self._next_start: Optional[datetime] = None
+        self._next_end: Optional[datetime] = None
+        self._stats = {"searches": 0, "reloads": 0, "reindexes": 0}
+        self._reload(datetime.now(), self._shared_coupons())
+    
+    def _shared_coupons(self):
+        if not self.use_shared_data:
+            return None
+        try:
+            from shared_data_manager import shared_data
+            return shared_data.get_coupons()
+        except Exception as e:
+            print(f"[COUPON] Could not load shared coupons: {e}")
+            return self._shared_snapshot
     
-    def __init__(self):
+    def _reload(self, now: datetime, shared):
+        # caller holds self._lock, or is __init__
         self.coupons = []
         self._load_simulated_coupons()
+        for row in shared or ():
+            coupon = coupon_from_shared(row)
+            if coupon is not None:
+                self.coupons.append(coupon)
+        self._shared_snapshot = shared
+        self._loaded_on = now.date()
+        self._stats["reloads"] += 1
+        self._reindex(now)
+    
+    def _reindex(self, now: datetime):
+        active = tuple(c for c in self.coupons if self._is_valid(c, now))
+        by_token: Dict[str, list] = {}
+        for pos, coupon in enumerate(active):
+            for text in (coupon.applicable_items or []) + (coupon.applicable_categories or []):
+                for tok in _coupon_tokens(text):
+                    positions = by_token.setdefault(tok, [])
+                    if not positions or positions[-1] != pos:
+                        positions.append(pos)
+        self._next_start = min((c.valid_from for c in self.coupons if c.valid_from and c.valid_from > now), default=None)
+        self._next_end = min((c.valid_until for c in self.coupons if c.valid_until and c.valid_until >= now), default=None)
+        self._active, self._by_token = active, {k: tuple(v) for k, v in by_token.items()}
+        self._stats["reindexes"] += 1
+    
+    @staticmethod
+    def _is_valid(coupon: Coupon, now: datetime) -> bool:
+        if coupon.valid_until and now > coupon.valid_until:
+            return False
+        if coupon.valid_from and now < coupon.valid_from:
+            return False
+        return True
+    
+    def _current(self):
+        """(active coupons, token -> positions), refreshed on date boundaries and dashboard edits"""
+        now = datetime.now()
+        shared = self._shared_coupons()
+        with self._lock:
+            if shared is not self._shared_snapshot or now.date() != self._loaded_on:
+                self._reload(now, shared)
+            elif (self._next_start and now >= self._next_start) or (self._next_end and now > self._next_end):
+                self._reindex(now)
+            self._stats["searches"] += 1
+            return self._active, self._by_token
     
     def _load_simulated_coupons(self):
         """Load simulated coupon data for demonstration"""
@@ -774,21 +892,27 @@ class CouponManager:
     
     def search_coupons(self, query: CouponQuery) -> List[Coupon]:
         """Search for applicable coupons based on the query"""
-        today = datetime.now()
-        applicable_coupons = []
-        
-        for coupon in self.coupons:
-            # Check if coupon is still valid
-            if coupon.valid_until and today > coupon.valid_until:
-                continue
-            if coupon.valid_from and today < coupon.valid_from:
-                continue
-            
-            # Check if coupon applies to the query
-            if self._coupon_applies_to_query(coupon, query):
-                applicable_coupons.append(coupon)
+        active, by_token = self._current()
+        if query.query_type == "general":
+            return list(active)
         
-        return applicable_coupons
+        # Only coupons sharing a word with the item/category can apply
+        positions = set()
+        for tok in _coupon_tokens(query.item) | _coupon_tokens(query.category):
+            positions.update(by_token.get(tok, ()))
+        return [active[pos] for pos in sorted(positions) if self._coupon_applies_to_query(active[pos], query)]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+            s.update({
+                "catalog": len(self.coupons),
+                "active": len(self._active),
+                "tokens": len(self._by_token),
+                "next_start": self._next_start.isoformat() if self._next_start else None,
+                "next_end": self._next_end.isoformat() if self._next_end else None,
+            })
+        return s
     
     def _coupon_applies_to_query(self, coupon: Coupon, query: CouponQuery) -> bool:
         """Check if a coupon applies to the given query"""
@@ -974,12 +1098,14 @@ def handle_coupon_query(query_text: str) -> str:
     )
     
     # Search for coupons
-    coupon_manager = CouponManager()
     applicable_coupons = coupon_manager.search_coupons(query)
     
     # Format response
     return coupon_manager.format_coupon_response(applicable_coupons, query)
 
+# Global coupon manager instance
+coupon_manager = CouponManager()
+
 # Test the system
 if __name__ == "__main__":
     # Test queries
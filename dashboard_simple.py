@@ -9,7 +9,7 @@ import requests
 
 # Import shared data manager
 try:
-    from shared_data_manager import shared_data
+    from shared_data_manager import shared_data, thaw
     SHARED_DATA_AVAILABLE = True
     print("[INFO] Shared data manager loaded successfully")
 except ImportError:
@@ -293,7 +293,7 @@ def save_inventory_integration():
     api_secret = request.form.get('api_secret')
 
     if SHARED_DATA_AVAILABLE:
-        current = shared_data.get_settings() or {}
+        current = thaw(shared_data.get_settings() or {})
         integrations = current.get('integrations', {})
         integrations['inventory'] = {
             'provider': provider,
@@ -453,7 +453,7 @@ def generate_voice_template():
 def dialogue_templates_page():
     # Get data from shared data if available
     if SHARED_DATA_AVAILABLE:
-        dialogue_data = shared_data.get_dialogue_templates()
+        dialogue_data = thaw(shared_data.get_dialogue_templates())
     else:
         dialogue_data = {}
 
@@ -0,0 +1,318 @@
+"""
+Catalog Department Lookup for AI Call Router
+Versioned product -> department table filled offline by a batch job that
+classifies the whole catalog (shared inventory, the simulated inventory and
+every grocery term) with bounded concurrency and resume support, so live
+calls find most products already classified instead of waiting on GPT-4
+
+    python department_lookup.py build [--concurrency 4] [--rate 5] [--fresh] [--limit N]
+    python department_lookup.py status
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from tts_prewarm import TokenBucket
+
+DEFAULT_LOOKUP_PATH = os.path.join("instance", "department_lookup.db")
+
+
+def _norm(product: str) -> str:
+    return (product or "").lower().strip()
+
+
+class DepartmentLookup:
+    """SQLite table of (version, product) -> department, read from an in-memory snapshot.
+
+    Versions are tied to the classification prompt version: a build writes
+    into a new "building" version and only becomes visible to get() when
+    activate() marks it active, so a half-finished or interrupted build
+    never serves partial answers. get() reloads the snapshot when another
+    process activates a newer version (checked at most every
+    check_interval seconds) and never creates the database file.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOOKUP_PATH, prompt_version: str = "", check_interval: float = 30.0):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.check_interval = check_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, str] = {}
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._stats = {"hits": 0, "misses": 0, "reloads": 0}
+
+    # ---- storage ----
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS versions ("
+                " version TEXT PRIMARY KEY,"
+                " prompt_version TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " activated_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " version TEXT NOT NULL,"
+                " product TEXT NOT NULL,"
+                " department TEXT NOT NULL,"
+                " source TEXT NOT NULL DEFAULT '',"
+                " PRIMARY KEY (version, product))"
+            )
+            self._local.conn = conn
+        return conn
+
+    def _active_version(self, conn: sqlite3.Connection) -> Optional[str]:
+        row = conn.execute(
+            "SELECT version FROM versions WHERE prompt_version = ? AND status = 'active'"
+            " ORDER BY activated_at DESC LIMIT 1",
+            (self.prompt_version,),
+        ).fetchone()
+        return row[0] if row else None
+
+    # ---- lookups ----
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        if not os.path.exists(self.path):
+            return
+        try:
+            conn = self._conn()
+            version = self._active_version(conn)
+            if version == self._version:
+                return
+            entries = dict(conn.execute("SELECT product, department FROM entries WHERE version = ?",
+                                        (version,)).fetchall()) if version else {}
+        except sqlite3.Error as e:
+            print(f"[LOOKUP] read failed: {e}")
+            return
+        with self._lock:
+            self._entries, self._version = entries, version
+            self._stats["reloads"] += 1
+        print(f"[LOOKUP] Loaded {len(entries)} precomputed departments (version {version})")
+
+    def get(self, product: str) -> Optional[str]:
+        self._refresh()
+        dept = self._entries.get(_norm(product))
+        with self._lock:
+            self._stats["hits" if dept else "misses"] += 1
+        return dept
+
+    def invalidate(self):
+        self._checked_at = 0.0
+
+    # ---- building ----
+    def start_build(self, fresh: bool = False) -> str:
+        """Version to write into: the unfinished build for this prompt version, or a new one"""
+        conn = self._conn()
+        if not fresh:
+            row = conn.execute(
+                "SELECT version FROM versions WHERE prompt_version = ? AND status = 'building'"
+                " ORDER BY created_at DESC LIMIT 1",
+                (self.prompt_version,),
+            ).fetchone()
+            if row:
+                return row[0]
+        version = f"{self.prompt_version or 'default'}@{time.strftime('%Y%m%dT%H%M%S')}"
+        conn.execute("INSERT OR IGNORE INTO versions (version, prompt_version, status, created_at) VALUES (?, ?, 'building', ?)",
+                     (version, self.prompt_version, time.time()))
+        return version
+
+    def done(self, version: str) -> set:
+        return {r[0] for r in self._conn().execute("SELECT product FROM entries WHERE version = ?", (version,))}
+
+    def put_many(self, version: str, rows: Iterable[Tuple[str, str, str]]):
+        """rows of (product, department, source)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR REPLACE INTO entries (version, product, department, source) VALUES (?, ?, ?, ?)",
+                             [(version, _norm(p), d, s) for p, d, s in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def activate(self, version: str, keep: int = 2):
+        """Make version the one get() serves; drop all but the newest `keep` versions for this prompt version"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE versions SET status = 'retired' WHERE prompt_version = ? AND status = 'active'",
+                         (self.prompt_version,))
+            conn.execute("UPDATE versions SET status = 'active', activated_at = ? WHERE version = ?",
+                         (time.time(), version))
+            stale = [r[0] for r in conn.execute(
+                "SELECT version FROM versions WHERE prompt_version = ? AND status = 'retired'"
+                " ORDER BY created_at DESC LIMIT -1 OFFSET ?",
+                (self.prompt_version, max(0, keep - 1)),
+            )]
+            for old in stale:
+                conn.execute("DELETE FROM entries WHERE version = ?", (old,))
+                conn.execute("DELETE FROM versions WHERE version = ?", (old,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self.invalidate()
+
+    def versions(self) -> List[Dict]:
+        if not os.path.exists(self.path):
+            return []
+        rows = self._conn().execute(
+            "SELECT v.version, v.prompt_version, v.status, v.created_at, v.activated_at, COUNT(e.product)"
+            " FROM versions v LEFT JOIN entries e ON e.version = v.version"
+            " GROUP BY v.version ORDER BY v.created_at"
+        ).fetchall()
+        keys = ("version", "prompt_version", "status", "created_at", "activated_at", "entries")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            s.update(version=self._version, entries=len(self._entries))
+        lookups = s["hits"] + s["misses"]
+        s["hit_ratio"] = round(s["hits"] / lookups, 3) if lookups else 0.0
+        return s
+
+
+def build_lookup(lookup: DepartmentLookup, items: Iterable[Tuple[str, str]], classify: Callable[[str], Optional[str]],
+                 concurrency: int = 4, rate: float = 5.0, fresh: bool = False, limit: Optional[int] = None,
+                 flush_every: int = 50) -> Dict:
+    """Classify every (product, source) not yet in the current build, then activate it.
+
+    classify(product) returns a department, or None when it could not tell
+    (left out, so a later resume retries it). At most `concurrency` calls
+    run at once and at most `rate` start per second. Results are written
+    every flush_every answers, so an interrupted build resumes where it
+    stopped; the version is activated only once every item has an answer
+    or was given up on in this run. Items are submitted a few at a time,
+    so Ctrl-C flushes what was answered and returns without waiting on the
+    queued calls (in-flight ones are retried by the next resume).
+    """
+    version = lookup.start_build(fresh=fresh)
+    done = lookup.done(version)
+    pending, seen = [], set(done)
+    for product, source in items:
+        key = _norm(product)
+        if key and key not in seen:
+            seen.add(key)
+            pending.append((key, source))
+    if limit is not None:
+        pending = pending[:limit]
+    report = {"version": version, "already_done": len(done), "pending": len(pending),
+              "classified": 0, "unknown": 0, "failed": 0, "by_source": {}}
+    print(f"[LOOKUP] Build {version}: {len(done)} done, {len(pending)} to classify on {concurrency} workers")
+
+    bucket = TokenBucket(rate, max(1.0, float(concurrency)))
+
+    def run(key: str) -> Optional[str]:
+        bucket.acquire()
+        return classify(key)
+
+    buffer: List[Tuple[str, str, str]] = []
+    start = time.time()
+    todo = iter(pending)
+    futures: Dict = {}
+    n = 0
+    interrupted = False
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="lookup-build")
+
+    def fill():
+        while len(futures) < 2 * max(1, concurrency):
+            nxt = next(todo, None)
+            if nxt is None:
+                return
+            futures[pool.submit(run, nxt[0])] = nxt
+
+    try:
+        fill()
+        while futures:
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in finished:
+                key, source = futures.pop(future)
+                n += 1
+                src = report["by_source"].setdefault(source, {"total": 0, "classified": 0})
+                src["total"] += 1
+                try:
+                    dept = future.result()
+                except Exception as e:
+                    report["failed"] += 1
+                    print(f"[LOOKUP] '{key}' failed: {e}")
+                    continue
+                if not dept:
+                    report["unknown"] += 1
+                    continue
+                buffer.append((key, dept, source))
+                report["classified"] += 1
+                src["classified"] += 1
+                if len(buffer) >= flush_every:
+                    lookup.put_many(version, buffer)
+                    buffer = []
+                if n % 100 == 0:
+                    print(f"[LOOKUP] {n}/{len(pending)} ({n / max(0.001, time.time() - start):.1f}/s)")
+            fill()
+    except KeyboardInterrupt:
+        interrupted = True
+        print(f"[LOOKUP] Interrupted after {n}/{len(pending)}; saving answers so far")
+    finally:
+        pool.shutdown(wait=not interrupted, cancel_futures=True)
+        if buffer:
+            lookup.put_many(version, buffer)
+    report["interrupted"] = interrupted
+    if not interrupted and (limit is None or len(pending) < limit):
+        lookup.activate(version)
+        report["activated"] = True
+    else:
+        report["activated"] = False  # interrupted or --limit run: more to do, keep building
+    report["seconds"] = round(time.time() - start, 1)
+    print(f"[LOOKUP] Build {version}: {report['classified']} classified, {report['unknown']} unknown, "
+          f"{report['failed']} failed in {report['seconds']}s (activated={report['activated']})")
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pre-classify the store catalog into the department lookup table")
+    sub = ap.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--concurrency", type=int, default=4)
+    build.add_argument("--rate", type=float, default=5.0, help="classifications started per second")
+    build.add_argument("--fresh", action="store_true", help="start a new version instead of resuming")
+    build.add_argument("--limit", type=int, default=None, help="classify at most N items this run")
+    build.add_argument("--no-terms", action="store_true", help="skip the grocery_departments.py terms")
+    sub.add_parser("status")
+    args = ap.parse_args()
+
+    # The live classifier, prompt version and data sources. A CLI run must not
+    # start the worker's boot jobs (Whisper load, ElevenLabs prewarm, cache GC).
+    os.environ.update(USE_LOCAL_WHISPER="0", WHISPER_PRELOAD="0", TTS_PREWARM_ON_BOOT="0", CACHE_GC_ENABLED="0")
+    import app
+
+    if args.command == "status":
+        print(json.dumps({"path": app.DEPARTMENT_LOOKUP.path, "prompt_version": app.AI_CLASSIFY_PROMPT_VERSION,
+                          "versions": app.DEPARTMENT_LOOKUP.versions()}, indent=2))
+        return
+    build_lookup(app.DEPARTMENT_LOOKUP, app.catalog_lookup_items(include_terms=not args.no_terms),
+                 app.classify_for_lookup, concurrency=args.concurrency, rate=args.rate, fresh=args.fresh,
+                 limit=args.limit)
+
+
+if __name__ == "__main__":
+    main()
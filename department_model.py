@@ -0,0 +1,290 @@
+"""
+Local Department Classifier for AI Call Router
+Character n-gram hashing plus multinomial logistic regression in NumPy:
+trained offline from the grocery term tables, past GPT-4 answers in the
+classification cache and caller-confirmed routes, loaded at startup from a
+compact .npz file, and answering in well under a millisecond on CPU
+
+    python department_model.py train [--out instance/department_model.npz] [--holdout 0.2]
+    python department_model.py evaluate [--model instance/department_model.npz] [--threshold 0.8]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import time
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_MODEL_PATH = os.path.join("instance", "department_model.npz")
+DEFAULT_ROUTES_PATH = os.path.join("instance", "confirmed_routes.jsonl")
+
+# The departments classify_product_with_ai() answers with
+DEPARTMENTS = (
+    "Grocery", "Meat & Seafood", "Deli", "Bakery", "Electronics", "Home and Garden", "Health and Beauty",
+    "Pet Supplies", "Customer Service", "Clothing", "Office and Stationery", "Toys & Games",
+)
+
+# grocery_departments.py rule departments -> DEPARTMENTS; the rest have no counterpart and are not used
+RULE_DEPARTMENT_LABELS = {
+    "Produce": "Grocery", "Dairy": "Grocery", "Frozen": "Grocery", "Grocery": "Grocery", "Household": "Grocery",
+    "Meat & Seafood": "Meat & Seafood",
+    "Bakery": "Bakery",
+    "Health & Beauty": "Health and Beauty", "Beauty & Personal Care": "Health and Beauty",
+    "Health & Wellness": "Health and Beauty", "Pharmacy": "Health and Beauty",
+    "Hardware": "Home and Garden", "Garden Center": "Home and Garden", "Home & Furniture": "Home and Garden",
+    "Automotive": "Home and Garden", "Automotive Center": "Home and Garden",
+    "Electronics": "Electronics", "Mobile & Wireless": "Electronics",
+    "Clothing": "Clothing",
+    "Office & Stationery": "Office and Stationery",
+    "Toys & Games": "Toys & Games",
+    "Customer Service": "Customer Service",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class Example(NamedTuple):
+    text: str
+    department: str
+    weight: float = 1.0
+    source: str = ""
+
+
+def featurize(text: str, dim: int, ngram_range: Tuple[int, int] = (2, 4)) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed, L2-normalized counts of word unigrams, word bigrams and in-word character n-grams"""
+    words = _WORD_RE.findall((text or "").lower())
+    grams = [f"w:{w}" for w in words]
+    grams.extend(f"b:{a}_{b}" for a, b in zip(words, words[1:]))
+    lo, hi = ngram_range
+    for w in words:
+        padded = f"<{w}>"
+        for n in range(lo, hi + 1):
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    if not grams:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    buckets: Dict[int, float] = {}
+    for g in grams:
+        h = zlib.crc32(g.encode("utf-8")) % dim
+        buckets[h] = buckets.get(h, 0.0) + 1.0
+    idx = np.fromiter(buckets.keys(), dtype=np.int64, count=len(buckets))
+    val = np.fromiter(buckets.values(), dtype=np.float32, count=len(buckets))
+    return idx, val / np.linalg.norm(val)
+
+
+class DepartmentModel:
+    """Multinomial logistic regression over hashed text features.
+
+    predict(text) returns the most likely department and a confidence: its
+    probability scaled by how much of the text's feature weight falls in
+    buckets seen in training, so made-up or out-of-catalog words do not get
+    a confident answer from the class priors. None for text with no
+    features. Weights are stored as float16 in a compressed .npz file, a few
+    hundred KB for 2**16 buckets and a dozen departments.
+    """
+
+    def __init__(self, classes: Sequence[str], dim: int = 2 ** 16, ngram_range: Tuple[int, int] = (2, 4),
+                 weights: Optional[np.ndarray] = None, bias: Optional[np.ndarray] = None,
+                 meta: Optional[Dict] = None):
+        self.classes = list(classes)
+        self.dim = int(dim)
+        self.ngram_range = (int(ngram_range[0]), int(ngram_range[1]))
+        self.W = weights if weights is not None else np.zeros((self.dim, len(self.classes)), dtype=np.float32)
+        self.b = bias if bias is not None else np.zeros(len(self.classes), dtype=np.float32)
+        self.meta = dict(meta or {})
+
+    # --- inference ---
+    def _score(self, text: str):
+        idx, val = featurize(text, self.dim, self.ngram_range)
+        if not len(idx):
+            return None, 0.0
+        rows = self.W[idx]
+        scores = val @ rows + self.b
+        proba = np.exp(scores - scores.max())
+        # Share of the text's feature weight in buckets the model was trained on
+        support = float((val * val)[rows.any(axis=1)].sum())
+        return proba / proba.sum(), support
+
+    def predict_proba(self, text: str) -> Optional[np.ndarray]:
+        return self._score(text)[0]
+
+    def predict(self, text: str) -> Optional[Tuple[str, float]]:
+        proba, support = self._score(text)
+        if proba is None:
+            return None
+        best = int(proba.argmax())
+        return self.classes[best], round(float(proba[best]) * support, 3)
+
+    # --- training ---
+    def fit(self, examples: Sequence[Example], epochs: int = 10, batch_size: int = 64, lr: float = 0.5,
+            l2: float = 1e-4, seed: int = 13) -> "DepartmentModel":
+        """Minibatch AdaGrad on weighted cross-entropy; only rows touched by a batch are updated"""
+        col = {c: i for i, c in enumerate(self.classes)}
+        rows = [(featurize(e.text, self.dim, self.ngram_range), col[e.department], e.weight)
+                for e in examples if e.department in col]
+        rows = [r for r in rows if len(r[0][0])]
+        if not rows:
+            raise ValueError("no usable training examples")
+        W = np.zeros((self.dim, len(self.classes)), dtype=np.float32)
+        b = np.zeros(len(self.classes), dtype=np.float32)
+        gW_acc = np.full_like(W, 1e-8)
+        gb_acc = np.full_like(b, 1e-8)
+        rng = random.Random(seed)
+        order = list(range(len(rows)))
+        for _epoch in range(epochs):
+            rng.shuffle(order)
+            for start in range(0, len(order), batch_size):
+                batch = [rows[i] for i in order[start:start + batch_size]]
+                idx = np.concatenate([f[0] for f, _, _ in batch])
+                val = np.concatenate([f[1] for f, _, _ in batch])
+                lengths = np.array([len(f[0]) for f, _, _ in batch])
+                offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+                row_of = np.repeat(np.arange(len(batch)), lengths)
+                scores = np.add.reduceat(W[idx] * val[:, None], offsets, axis=0) + b
+                scores -= scores.max(axis=1, keepdims=True)
+                proba = np.exp(scores)
+                proba /= proba.sum(axis=1, keepdims=True)
+                weights = np.array([w for _, _, w in batch], dtype=np.float32)
+                delta = proba
+                delta[np.arange(len(batch)), [y for _, y, _ in batch]] -= 1.0
+                delta *= (weights / weights.sum())[:, None]
+                touched, inverse = np.unique(idx, return_inverse=True)
+                gW = np.zeros((len(touched), len(self.classes)), dtype=np.float32)
+                np.add.at(gW, inverse, val[:, None] * delta[row_of])
+                gW += l2 * W[touched]
+                gb = delta.sum(axis=0)
+                gW_acc[touched] += gW * gW
+                gb_acc += gb * gb
+                W[touched] -= lr * gW / np.sqrt(gW_acc[touched])
+                b -= lr * gb / np.sqrt(gb_acc)
+        self.W, self.b = W, b
+        counts: Dict[str, int] = {}
+        for e in examples:
+            counts[e.source or "other"] = counts.get(e.source or "other", 0) + 1
+        self.meta.update(trained_at=time.strftime("%Y-%m-%dT%H:%M:%S"), examples=len(rows), sources=counts,
+                         epochs=epochs)
+        return self
+
+    def evaluate(self, examples: Iterable[Example], threshold: float = 0.8) -> Dict:
+        """Accuracy overall and for the answers at or above threshold (what the cascade would accept)"""
+        total = correct = answered = answered_correct = 0
+        per_class: Dict[str, List[int]] = {}
+        for e in examples:
+            pred = self.predict(e.text)
+            hit = pred is not None and pred[0] == e.department
+            total += 1
+            correct += hit
+            stats = per_class.setdefault(e.department, [0, 0])
+            stats[0] += 1
+            stats[1] += hit
+            if pred is not None and pred[1] >= threshold:
+                answered += 1
+                answered_correct += hit
+        return {
+            "examples": total,
+            "accuracy": round(correct / total, 3) if total else None,
+            "threshold": threshold,
+            "coverage": round(answered / total, 3) if total else None,
+            "accuracy_at_threshold": round(answered_correct / answered, 3) if answered else None,
+            "per_class": {c: {"examples": n, "accuracy": round(k / n, 3)} for c, (n, k) in sorted(per_class.items())},
+        }
+
+    # --- persistence ---
+    def save(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        meta = dict(self.meta, dim=self.dim, ngram_range=list(self.ngram_range))
+        np.savez_compressed(tmp, W=self.W.astype(np.float16), b=self.b.astype(np.float32),
+                            classes=np.array(self.classes), meta=np.array(json.dumps(meta)))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "DepartmentModel":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            return cls([str(c) for c in data["classes"]], dim=meta["dim"], ngram_range=tuple(meta["ngram_range"]),
+                       weights=data["W"].astype(np.float32), bias=data["b"].astype(np.float32), meta=meta)
+
+
+# ===== Training data =====
+
+def term_table_examples(weight: float = 1.0) -> List[Example]:
+    """Every literal term in grocery_departments.py, labelled with its mapped department"""
+    from grocery_departments import department_vocabulary
+
+    return [Example(term, RULE_DEPARTMENT_LABELS[dept], weight, "terms")
+            for term, dept in department_vocabulary().items() if dept in RULE_DEPARTMENT_LABELS]
+
+
+def cache_examples(cache, weight: float = 3.0) -> List[Example]:
+    """Past GPT-4 answers from a ClassificationCache"""
+    return [Example(product, dept, weight, "llm") for product, dept in cache.items() if dept in DEPARTMENTS]
+
+
+def confirmed_route_examples(path: str = DEFAULT_ROUTES_PATH, weight: float = 5.0) -> List[Example]:
+    """Departments callers picked themselves, from the JSON-lines route log"""
+    examples = []
+    if not os.path.exists(path):
+        return examples
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            dept = RULE_DEPARTMENT_LABELS.get(row.get("department"), row.get("department"))
+            if row.get("item") and dept in DEPARTMENTS:
+                examples.append(Example(row["item"], dept, weight, "confirmed"))
+    return examples
+
+
+def _open_cache(args):
+    from classification_cache import ClassificationCache
+
+    return ClassificationCache(args.cache, namespace=args.namespace)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Train or evaluate the local department classifier")
+    sub = ap.add_subparsers(dest="command", required=True)
+    for name in ("train", "evaluate"):
+        p = sub.add_parser(name)
+        p.add_argument("--cache", default=os.getenv("AI_CLASSIFY_CACHE_PATH", os.path.join("instance", "classification_cache.db")))
+        p.add_argument("--namespace", default=os.getenv("AI_CLASSIFY_PROMPT_VERSION", "pet-supplies-v2"))
+        p.add_argument("--threshold", type=float, default=0.8)
+    train = sub.choices["train"]
+    train.add_argument("--out", default=os.getenv("DEPARTMENT_MODEL_PATH", DEFAULT_MODEL_PATH))
+    train.add_argument("--routes", default=DEFAULT_ROUTES_PATH)
+    train.add_argument("--dim", type=int, default=2 ** 16)
+    train.add_argument("--epochs", type=int, default=10)
+    train.add_argument("--holdout", type=float, default=0.2, help="share of LLM labels kept out for evaluation")
+    sub.choices["evaluate"].add_argument("--model", default=os.getenv("DEPARTMENT_MODEL_PATH", DEFAULT_MODEL_PATH))
+    args = ap.parse_args()
+
+    llm = cache_examples(_open_cache(args))
+    if args.command == "evaluate":
+        model = DepartmentModel.load(args.model)
+        print(f"Model {args.model}: trained {model.meta.get('trained_at')} on {model.meta.get('sources')}")
+        print(json.dumps(model.evaluate(llm, args.threshold), indent=2))
+        return
+
+    random.Random(7).shuffle(llm)
+    held = llm[:int(len(llm) * args.holdout)]
+    examples = term_table_examples() + llm[len(held):] + confirmed_route_examples(args.routes)
+    start = time.perf_counter()
+    model = DepartmentModel(DEPARTMENTS, dim=args.dim).fit(examples, epochs=args.epochs)
+    print(f"Trained on {model.meta['examples']} examples {model.meta['sources']} in {time.perf_counter() - start:.1f}s")
+    model.save(args.out)
+    print(f"Saved {args.out} ({os.path.getsize(args.out):,} bytes)")
+    if held:
+        print("Held-out LLM labels:")
+        print(json.dumps(model.evaluate(held, args.threshold), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1151,125 +1151,246 @@ GROCERY_AISLE_INDEX = {
     "cold medicine": ["Pharmacy section"],
 }
 
-# ===== HELPER FUNCTIONS =====
-
-def classify_grocery_department(text: str) -> str | None:
-    """Classify grocery items to departments using comprehensive rules"""
-    t = (text or "").lower().strip()
-    
-    # ===== CONTEXTUAL KEYWORD SYSTEM =====
-    # Use specific contextual keywords to determine product type, not hierarchy
-    
+# ===== CONTEXTUAL KEYWORDS =====
+# Checked in this order: a context keyword in the text plus a matching rule for
+# that department wins before the general longest-pattern-first rule scan
+GROCERY_CONTEXT_KEYWORDS = [
     # HOUSEHOLD/CLEANING CONTEXT
-    household_context = [
+    ("Household", [
         'dish soap', 'dishwasher', 'dish detergent', 'dish pods',
         'laundry', 'washing', 'dryer', 'fabric softener', 'stain remover',
         'cleaning', 'cleaner', 'bleach', 'all purpose cleaner',
         'paper towels', 'toilet paper', 'trash bags', 'garbage bags'
-    ]
-    for keyword in household_context:
-        if keyword in t:
-            for rx, dept in ALL_GROCERY_DEPT_RULES:
-                if dept == "Household" and rx.search(t):
-                    return dept
-    
+    ]),
     # HEALTH & BEAUTY CONTEXT
-    beauty_context = [
+    ("Health & Beauty", [
         'body wash', 'body lotion', 'body spray', 'body scrub',
         'hand soap', 'hand lotion', 'hand cream',
         'face wash', 'face lotion', 'face cream', 'face mask',
         'shampoo', 'conditioner', 'hair care', 'hair products',
         'makeup', 'cosmetics', 'foundation', 'concealer',
         'deodorant', 'antiperspirant', 'cologne', 'perfume'
-    ]
-    for keyword in beauty_context:
-        if keyword in t:
-            for rx, dept in ALL_GROCERY_DEPT_RULES:
-                if dept == "Health & Beauty" and rx.search(t):
-                    return dept
-    
+    ]),
     # BAKERY CONTEXT
-    bakery_context = [
+    ("Bakery", [
         'bakery', 'fresh baked', 'artisan bread', 'donuts', 'pastries',
         'croissants', 'danish', 'muffins', 'cakes', 'cupcakes'
-    ]
-    for keyword in bakery_context:
-        if keyword in t:
-            for rx, dept in ALL_GROCERY_DEPT_RULES:
-                if dept == "Bakery" and rx.search(t):
-                    return dept
-    
+    ]),
     # DAIRY CONTEXT
-    dairy_context = [
+    ("Dairy", [
         'dairy', 'milk', 'cheese', 'yogurt', 'butter', 'eggs', 'cream',
         'half and half', 'heavy cream', 'sour cream'
-    ]
-    for keyword in dairy_context:
-        if keyword in t:
-            for rx, dept in ALL_GROCERY_DEPT_RULES:
-                if dept == "Dairy" and rx.search(t):
-                    return dept
-    
+    ]),
     # MEAT & SEAFOOD CONTEXT
-    meat_context = [
+    ("Meat & Seafood", [
         'meat', 'seafood', 'chicken', 'beef', 'pork', 'fish',
         'deli meat', 'bacon', 'ham', 'sausage', 'hot dogs'
-    ]
-    for keyword in meat_context:
-        if keyword in t:
-            for rx, dept in ALL_GROCERY_DEPT_RULES:
-                if dept == "Meat & Seafood" and rx.search(t):
-                    return dept
-    
+    ]),
     # PRODUCE CONTEXT
-    produce_context = [
+    ("Produce", [
         'produce', 'fresh', 'organic', 'fruit', 'vegetable', 'herbs',
         'apples', 'bananas', 'tomatoes', 'lettuce', 'carrots'
-    ]
-    for keyword in produce_context:
-        if keyword in t:
-            for rx, dept in ALL_GROCERY_DEPT_RULES:
-                if dept == "Produce" and rx.search(t):
-                    return dept
-    
+    ]),
     # PHARMACY CONTEXT
-    pharmacy_context = [
+    ("Pharmacy", [
         'prescription', 'pharmacy', 'medicine', 'pain reliever', 'cold medicine',
         'allergy medicine', 'vitamins', 'supplements', 'first aid',
         'chewables', 'gummies', 'tablets', 'capsules', 'liquid medicine',
         'immune support', 'wellness', 'health', 'natural remedies',
         'herbal', 'probiotics', 'omega', 'fish oil', 'calcium',
         'magnesium', 'zinc', 'vitamin c', 'vitamin d', 'b12'
-    ]
-    for keyword in pharmacy_context:
-        if keyword in t:
-            for rx, dept in ALL_GROCERY_DEPT_RULES:
-                if dept == "Pharmacy" and rx.search(t):
-                    return dept
-    
-    # First try: exact phrase matching with word boundaries (prioritize longer matches)
-    # Sort rules by pattern length (longer patterns first) to prioritize specific matches
+    ]),
+]
+
+# ===== COMPILED MATCHER =====
+# Every literal alternative of every rule goes into one Aho-Corasick automaton,
+# so a single pass over the text finds all matching rules. Alternatives that
+# are real regex (\s+, groups, '.') keep a small per-alternative regex.
+_REGEX_META = set(".^$*+?{}[]()\\|")
+
+
+def _literal_variants(alt: str):
+    """Literal strings an alternative matches, or None if it needs the regex engine"""
+    if not any(c in _REGEX_META for c in alt):
+        return [alt]
+    # "chips?" -> "chip", "chips"
+    if len(alt) >= 2 and alt.endswith("?") and not any(c in _REGEX_META for c in alt[:-1]):
+        return [alt[:-2], alt[:-1]]
+    return None
+
+
+def _rule_alternatives(pattern: str):
+    r"""Split \b(a|b|...)\b / \b...\b rule patterns into their top-level alternatives"""
+    if pattern.startswith(r"\b(") and pattern.endswith(r")\b"):
+        alts = pattern[3:-3].split("|")
+        if all(a.count("(") == a.count(")") for a in alts):
+            return alts
+    elif pattern.startswith(r"\b") and pattern.endswith(r"\b") and "|" not in pattern:
+        return [pattern[2:-2]]
+    return None
+
+
+def _compile_rules(rules):
+    from term_matcher import AhoCorasick
+
+    matcher = AhoCorasick()
+    fallback = []  # (rule_index, compiled regex)
+    for i, (rx, _dept) in enumerate(rules):
+        alts = _rule_alternatives(rx.pattern)
+        if alts is None:
+            fallback.append((i, rx))
+            continue
+        for alt in alts:
+            variants = _literal_variants(alt)
+            if variants is None or not all(v.isascii() for v in variants):
+                fallback.append((i, re.compile(rf"\b(?:{alt})\b", rx.flags)))
+                continue
+            for v in variants:
+                matcher.add(v.lower(), i)
+    return matcher.build(), fallback
+
+
+_RULE_MATCHER, _RULE_FALLBACK = _compile_rules(ALL_GROCERY_DEPT_RULES)
+_RULE_DEPTS = [dept for _, dept in ALL_GROCERY_DEPT_RULES]
+# Rank of each rule in the old sorted-by-pattern-length scan (longer patterns first, ties keep order)
+_RULE_RANK = [0] * len(ALL_GROCERY_DEPT_RULES)
+for _rank, _i in enumerate(sorted(range(len(ALL_GROCERY_DEPT_RULES)),
+                                  key=lambda i: len(ALL_GROCERY_DEPT_RULES[i][0].pattern), reverse=True)):
+    _RULE_RANK[_i] = _rank
+
+
+def _matching_rules(t: str) -> set:
+    """Indexes of every rule in ALL_GROCERY_DEPT_RULES whose regex matches t (t lowercased)"""
+    if not t.isascii():
+        # Unicode case-folding and \w differ from the ASCII fast path
+        return {i for i, (rx, _) in enumerate(ALL_GROCERY_DEPT_RULES) if rx.search(t)}
+    hits = set()
+    for _start, _end, rule_ids in _RULE_MATCHER.iter_word_matches(t):
+        hits.update(rule_ids)
+    for i, rx in _RULE_FALLBACK:
+        if i not in hits and rx.search(t):
+            hits.add(i)
+    return hits
+
+
+# ===== HELPER FUNCTIONS =====
+
+def classify_grocery_department(text: str) -> str | None:
+    """Classify grocery items to departments using comprehensive rules"""
+    t = (text or "").lower().strip()
+
+    hits = _matching_rules(t)
+    if hits:
+        # Contextual keywords pick the product type when several departments match
+        matched = {_RULE_DEPTS[i] for i in hits}
+        for dept, keywords in GROCERY_CONTEXT_KEYWORDS:
+            if dept in matched and any(k in t for k in keywords):
+                return dept
+        # Otherwise the longest (most specific) matching rule pattern wins
+        return _RULE_DEPTS[min(hits, key=_RULE_RANK.__getitem__)]
+
+    # Word-by-word matching (fallback for ASR issues)
+    for word in t.split():
+        # Clean the word (remove punctuation, etc.)
+        clean_word = re.sub(r'[^\w\s]', '', word).strip()
+        if len(clean_word) < 2:  # Skip very short words
+            continue
+        word_hits = _matching_rules(clean_word)
+        if word_hits:
+            return _RULE_DEPTS[min(word_hits)]
+
+    return None
+
+
+def _rule_spans(t: str, dept: str) -> list[tuple[int, int]]:
+    """Character spans of t matched by the rules of one department"""
+    rules = [i for i, d in enumerate(_RULE_DEPTS) if d == dept]
+    if not t.isascii():
+        return [m.span() for i in rules for m in ALL_GROCERY_DEPT_RULES[i][0].finditer(t)]
+    wanted = set(rules)
+    spans = [(start, end) for start, end, rule_ids in _RULE_MATCHER.iter_word_matches(t)
+             if wanted.intersection(rule_ids)]
+    spans.extend(m.span() for i, rx in _RULE_FALLBACK if i in wanted for m in rx.finditer(t))
+    return spans
+
+
+def classify_grocery_department_scored(text: str) -> tuple[str | None, float]:
+    """classify_grocery_department() plus a confidence in [0, 1].
+
+    A single matching department scores highest, one picked by context
+    keywords a bit less, one picked by rule length among several less
+    again, and the word-by-word fallback lowest. That is scaled by how much
+    of the text the winning department's terms cover, so "milk" is surer
+    than "chicken feed" (which only matched "chicken").
+    """
+    dept = classify_grocery_department(text)
+    if dept is None:
+        return None, 0.0
+    t = (text or "").lower().strip()
+    hits = _matching_rules(t)
+    if not hits:
+        return dept, 0.5
+    matched = {_RULE_DEPTS[i] for i in hits}
+    if len(matched) == 1:
+        base = 0.95
+    elif any(d == dept and any(k in t for k in keywords) for d, keywords in GROCERY_CONTEXT_KEYWORDS):
+        base = 0.85
+    else:
+        base = 0.65
+    covered = set()
+    for start, end in _rule_spans(t, dept):
+        covered.update(range(start, end))
+    letters = [i for i, ch in enumerate(t) if ch.isalnum()]
+    coverage = sum(1 for i in letters if i in covered) / len(letters) if letters else 0.0
+    return dept, round(base * (0.5 + 0.5 * coverage), 3)
+
+
+def _classify_grocery_department_regex(text: str) -> str | None:
+    """Reference implementation: one regex scan per rule (kept for tests and benchmarks)"""
+    t = (text or "").lower().strip()
+    for dept, keywords in GROCERY_CONTEXT_KEYWORDS:
+        for keyword in keywords:
+            if keyword in t:
+                for rx, rule_dept in ALL_GROCERY_DEPT_RULES:
+                    if rule_dept == dept and rx.search(t):
+                        return rule_dept
     sorted_rules = sorted(ALL_GROCERY_DEPT_RULES, key=lambda x: len(x[0].pattern), reverse=True)
     for rx, dept in sorted_rules:
         if rx.search(t):
             return dept
-    
-    # Second try: word-by-word matching (fallback for ASR issues)
-    # But only if no longer phrase matches were found
-    words = t.split()
-    for word in words:
-        # Clean the word (remove punctuation, etc.)
+    for word in t.split():
         clean_word = re.sub(r'[^\w\s]', '', word).strip()
-        if len(clean_word) < 2:  # Skip very short words
+        if len(clean_word) < 2:
             continue
-            
-        # Check if this word matches any department
         for rx, dept in ALL_GROCERY_DEPT_RULES:
             if rx.search(clean_word):
                 return dept
-    
     return None
 
+def department_vocabulary() -> dict[str, str]:
+    """Every literal term in the department rules -> its department (first rule wins)"""
+    vocab = {}
+    for rx, dept in ALL_GROCERY_DEPT_RULES:
+        for alt in _rule_alternatives(rx.pattern) or ():
+            # Alternatives span the table's line breaks and "# Brands" comment lines
+            for part in alt.split("\n"):
+                part = part.strip()
+                if not part or part.startswith("#"):
+                    continue
+                for term in _literal_variants(part) or ():
+                    vocab.setdefault(term.lower(), dept)
+    return vocab
+
+def table_terms(table: str) -> list[str]:
+    """Lowercased terms of one *_TERMS table (split on '|' and line breaks, comments dropped)"""
+    terms = []
+    for line in table.split("\n"):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        terms.extend(t.strip().lower() for t in line.split("|") if t.strip())
+    return terms
+
 def get_grocery_department_candidates(item: str) -> list[str]:
     """Get possible departments for a grocery item"""
     if not item:
@@ -1308,6 +1429,9 @@ __all__ = [
     'GROCERY_AMBIGUOUS_ITEMS', 
     'GROCERY_AISLE_INDEX',
     'classify_grocery_department',
+    'classify_grocery_department_scored',
+    'department_vocabulary',
+    'table_terms',
     'get_grocery_department_candidates',
     'get_grocery_aisle_location'
 ]
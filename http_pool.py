@@ -0,0 +1,128 @@
+"""
+Outbound HTTP for AI Call Router
+Keep-alive session pools shared per host, so ElevenLabs, Twilio, GitHub and
+OpenAI calls reuse TCP/TLS connections instead of a fresh handshake per call,
+with per-service connect/read timeouts and reuse counters
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# service -> (connect, read) seconds
+DEFAULT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    "elevenlabs": (3.05, 60),
+    "twilio": (3.05, 60),
+    "github": (5, 60),
+    "openai": (5, 60),
+}
+
+
+class HttpPool:
+    """One requests.Session per scheme://host, each with a connection pool
+    of pool_size (size it to the number of threads that call out
+    concurrently, i.e. the executor workers plus request threads). At most
+    max_hosts sessions are kept; the least recently used one is closed
+    when another host needs a session.
+
+    request(service, method, url) picks the service's (connect, read)
+    timeout unless the caller passes timeout= explicitly.
+    """
+
+    def __init__(self, pool_size: int = 8, timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 default_timeout: Tuple[float, float] = (5, 30), max_hosts: int = 16):
+        self.pool_size = max(1, int(pool_size))
+        self.max_hosts = max(1, int(max_hosts))
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        self.timeouts.update({k: tuple(v) for k, v in (timeouts or {}).items()})
+        self.default_timeout = tuple(default_timeout)
+        self._sessions: "OrderedDict[str, requests.Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def session(self, url: str) -> requests.Session:
+        key = self._host_key(url)
+        evicted = None
+        with self._lock:
+            s = self._sessions.get(key)
+            if s is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                self._sessions[key] = s
+                if len(self._sessions) > self.max_hosts:
+                    _, evicted = self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(key)
+        if evicted is not None:
+            evicted.close()
+        return s
+
+    def timeout(self, service: str, read: Optional[float] = None) -> Tuple[float, float]:
+        connect, default_read = self.timeouts.get(service, self.default_timeout)
+        return (connect, default_read if read is None else read)
+
+    def request(self, service: str, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout(service))
+        start = time.time()
+        ok = False
+        try:
+            r = self.session(url).request(method, url, **kwargs)
+            ok = True
+            return r
+        finally:
+            self._count(service, ok, (time.time() - start) * 1000)
+
+    def get(self, service: str, url: str, **kwargs) -> requests.Response:
+        return self.request(service, "GET", url, **kwargs)
+
+    def post(self, service: str, url: str, **kwargs) -> requests.Response:
+        return self.request(service, "POST", url, **kwargs)
+
+    def _count(self, service: str, ok: bool, ms: float):
+        with self._lock:
+            s = self._stats.setdefault(service, {"requests": 0, "errors": 0, "total_ms": 0.0})
+            s["requests"] += 1
+            s["total_ms"] += ms
+            if not ok:
+                s["errors"] += 1
+
+    def close(self):
+        with self._lock:
+            sessions, self._sessions = self._sessions, OrderedDict()
+        for s in sessions.values():
+            s.close()
+
+    def get_stats(self) -> Dict:
+        hosts = {}
+        with self._lock:
+            sessions = dict(self._sessions)
+            services = {k: dict(v) for k, v in self._stats.items()}
+        for key, s in sessions.items():
+            manager = s.get_adapter(key + "/").poolmanager
+            opened = sent = 0
+            for pool_key in list(manager.pools.keys()):
+                pool = manager.pools.get(pool_key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+            hosts[key] = {
+                "requests": sent,
+                "connections_opened": opened,
+                "connections_reused": max(0, sent - opened),
+                "reuse_ratio": round((sent - opened) / sent, 3) if sent else 0.0,
+            }
+        for s in services.values():
+            s["avg_ms"] = round(s.pop("total_ms") / s["requests"], 1) if s["requests"] else 0.0
+        return {"pool_size": self.pool_size, "hosts": hosts, "services": services}
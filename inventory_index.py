@@ -0,0 +1,306 @@
+"""
+Inventory Search Index for AI Call Router
+Token and character n-gram index over item name, brand, SKU and UPC, kept in
+sync with the inventory incrementally, so substring lookups touch only the
+candidate items instead of scanning the whole catalog; plus a trigram and
+prefix index over the catalog vocabulary for "did you mean" suggestions
+"""
+
+import heapq
+import re
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Set
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def ngrams(text: str, n: int) -> Set[str]:
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def padded_ngrams(text: str, n: int = 3) -> Set[str]:
+    """n-grams of "$text$", so short words and word edges still produce grams"""
+    return ngrams(f"${text}$", n)
+
+
+class InventoryIndex:
+    """Substring search over inventory rows (dicts) with ranked results.
+
+    Every indexed field value is lowercased and split into character
+    n-grams; a query of at least n characters is answered by intersecting
+    the posting sets of its n-grams (smallest first) and verifying the
+    survivors, which keeps the "query in field" semantics of a linear scan.
+    Shorter queries fall back to scanning. Whole-word tokens are indexed
+    too, for search_tokens() and ranking.
+
+    sync(rows) brings the index up to date with a new inventory list,
+    re-indexing only rows that were added, removed or changed; passing the
+    same list object again is a no-op.
+    """
+
+    FIELDS = ("name", "brand", "sku", "upc")
+
+    def __init__(self, n: int = 3, fields: Sequence[str] = FIELDS):
+        self.n = n
+        self.fields = tuple(fields)
+        self._rows: Dict[Hashable, Dict[str, Any]] = {}
+        self._text: Dict[Hashable, Dict[str, str]] = {}  # key -> {field: lowered value}
+        self._order: Dict[Hashable, int] = {}
+        self._grams: Dict[str, Set[Hashable]] = {}
+        self._tokens: Dict[str, Set[Hashable]] = {}
+        self._synced: Optional[Sequence[Dict[str, Any]]] = None
+        self.stats = {"syncs": 0, "reindexed": 0, "queries": 0, "candidates": 0}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @staticmethod
+    def row_key(row: Dict[str, Any], position: int) -> Hashable:
+        if row.get("id") is not None:
+            return ("id", row["id"])
+        if row.get("sku"):
+            return ("sku", str(row["sku"]).lower())
+        return ("pos", position)
+
+    def _field_text(self, row: Dict[str, Any]) -> Dict[str, str]:
+        out = {}
+        for field in self.fields:
+            value = row.get(field)
+            if value is None and field == "name":
+                value = row.get("title")
+            if value not in (None, ""):
+                out[field] = str(value).lower()
+        return out
+
+    # --- maintenance ---
+    def add(self, key: Hashable, row: Dict[str, Any], order: int = 0):
+        if key in self._rows:
+            self.remove(key)
+        text = self._field_text(row)
+        self._rows[key] = row
+        self._text[key] = text
+        self._order[key] = order
+        for value in text.values():
+            for gram in ngrams(value, self.n):
+                self._grams.setdefault(gram, set()).add(key)
+            for token in tokenize(value):
+                self._tokens.setdefault(token, set()).add(key)
+        self.stats["reindexed"] += 1
+
+    def remove(self, key: Hashable):
+        text = self._text.pop(key, None)
+        if text is None:
+            return
+        del self._rows[key]
+        self._order.pop(key, None)
+        for value in text.values():
+            for gram in ngrams(value, self.n):
+                self._discard(self._grams, gram, key)
+            for token in tokenize(value):
+                self._discard(self._tokens, token, key)
+
+    @staticmethod
+    def _discard(postings: Dict[str, Set[Hashable]], term: str, key: Hashable):
+        keys = postings.get(term)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del postings[term]
+
+    def sync(self, rows: Sequence[Dict[str, Any]]) -> bool:
+        """Re-index whatever differs from rows; False if nothing changed"""
+        if rows is self._synced:
+            return False
+        self.stats["syncs"] += 1
+        seen = set()
+        changed = False
+        for position, row in enumerate(rows):
+            key = self.row_key(row, position)
+            while key in seen:  # duplicate id/sku: keep both rows
+                key = ("dup", key, position)
+            seen.add(key)
+            old = self._rows.get(key)
+            if old is None or (old is not row and old != row):
+                self.add(key, row, position)
+                changed = True
+            else:
+                self._rows[key] = row  # same content, newer snapshot object
+                self._order[key] = position
+        for key in [k for k in self._rows if k not in seen]:
+            self.remove(key)
+            changed = True
+        self._synced = rows
+        return changed
+
+    # --- queries ---
+    def _candidates(self, query: str) -> Set[Hashable]:
+        if len(query) < self.n:
+            return set(self._rows)
+        postings = []
+        for gram in ngrams(query, self.n):
+            keys = self._grams.get(gram)
+            if not keys:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for keys in postings[1:]:
+            result &= keys
+            if not result:
+                break
+        return result
+
+    @staticmethod
+    def _match_rank(value: str, query: str) -> Optional[int]:
+        """0 exact, 1 prefix, 2 starts a word, 3 elsewhere; None if absent"""
+        pos = value.find(query)
+        if pos < 0:
+            return None
+        if value == query:
+            return 0
+        if pos == 0:
+            return 1
+        while pos > 0:
+            if not value[pos - 1].isalnum():
+                return 2
+            pos = value.find(query, pos + 1)
+            if pos < 0:
+                break
+        return 3
+
+    def search(self, query: str, fields: Optional[Sequence[str]] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rows where query is a substring of one of fields, best match first.
+
+        Ranked by match quality (exact, prefix, word start, inner), then by
+        field order (name before brand before SKU/UPC), then shorter names,
+        then inventory order.
+        """
+        q = (query or "").strip().lower()
+        if not q:
+            return []
+        fields = tuple(fields or self.fields)
+        candidates = self._candidates(q)
+        self.stats["queries"] += 1
+        self.stats["candidates"] += len(candidates)
+        texts, order, match_rank = self._text, self._order, self._match_rank
+        scored = []
+        for key in candidates:
+            text = texts[key]
+            best = None
+            for field_rank, field in enumerate(fields):
+                value = text.get(field)
+                if value is None or q not in value:
+                    continue
+                score = match_rank(value, q) * 8 + field_rank
+                if best is None or score < best:
+                    best = score
+            if best is not None:
+                scored.append((best, len(text.get("name", "")), order[key], key))
+        if limit is not None:
+            scored = heapq.nsmallest(limit, scored)
+        else:
+            scored.sort()
+        rows = self._rows
+        return [rows[s[3]] for s in scored]
+
+    def search_tokens(self, query: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Rows containing any whole word of query, most words matched first"""
+        counts: Dict[Hashable, int] = {}
+        for token in set(tokenize(query)):
+            for key in self._tokens.get(token, ()):
+                counts[key] = counts.get(key, 0) + 1
+        ranked = sorted(counts, key=lambda k: (-counts[k], self._order[k]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self._rows[k] for k in ranked]
+
+    def get_stats(self) -> Dict[str, Any]:
+        s = dict(self.stats)
+        s.update(items=len(self._rows), grams=len(self._grams), tokens=len(self._tokens))
+        return s
+
+
+class TermIndex:
+    """Vocabulary index for "did you mean" lookups.
+
+    Terms are indexed by padded character trigrams and by prefixes of up to
+    max_prefix characters. similar() scores only the terms that share a
+    trigram with the query (Dice coefficient over padded trigrams), so a
+    lookup costs the size of the query's posting lists, not the vocabulary.
+    """
+
+    def __init__(self, terms: Iterable[str] = (), n: int = 3, max_prefix: int = 6):
+        self.n = n
+        self.max_prefix = max_prefix
+        self._grams: Dict[str, Set[str]] = {}
+        self._prefixes: Dict[str, Set[str]] = {}
+        self._terms: Dict[str, int] = {}  # term -> trigram count
+        self._max_len = 0
+        for term in terms:
+            self.add(term)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._terms
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, term: str):
+        if not term or term in self._terms:
+            return
+        grams = padded_ngrams(term, self.n)
+        self._terms[term] = len(grams)
+        self._max_len = max(self._max_len, len(term))
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(term)
+        for i in range(1, min(len(term), self.max_prefix) + 1):
+            self._prefixes.setdefault(term[:i], set()).add(term)
+
+    def containing(self, query: str) -> Set[str]:
+        """Terms that contain query as a substring"""
+        if not query:
+            return set()
+        if len(query) < self.n:
+            return {t for t in self._terms if query in t}
+        postings = sorted((self._grams.get(g, set()) for g in ngrams(query, self.n)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        return {t for t in postings[0] if query in t and all(t in p for p in postings[1:])}
+
+    def contained_in(self, text: str, min_len: int = 2) -> Set[str]:
+        """Terms that occur as a substring of text"""
+        found = set()
+        for i in range(len(text)):
+            for j in range(i + min_len, min(len(text), i + self._max_len) + 1):
+                if text[i:j] in self._terms:
+                    found.add(text[i:j])
+        return found
+
+    def complete(self, prefix: str, limit: int = 10) -> List[str]:
+        """Terms starting with prefix, shortest first"""
+        if not prefix:
+            return []
+        if len(prefix) <= self.max_prefix:
+            terms = self._prefixes.get(prefix, ())
+        else:
+            terms = [t for t in self._prefixes.get(prefix[:self.max_prefix], ()) if t.startswith(prefix)]
+        return sorted(terms, key=lambda t: (len(t), t))[:limit]
+
+    def similar(self, query: str, limit: int = 5, min_score: float = 0.5) -> List[tuple]:
+        """[(term, score)] by trigram Dice similarity, best first"""
+        grams = padded_ngrams(query, self.n)
+        shared: Dict[str, int] = {}
+        for gram in grams:
+            for term in self._grams.get(gram, ()):
+                shared[term] = shared.get(term, 0) + 1
+        scored = []
+        for term, count in shared.items():
+            score = 2.0 * count / (len(grams) + self._terms[term])
+            if score >= min_score:
+                scored.append((term, round(score, 3)))
+        scored.sort(key=lambda ts: (-ts[1], ts[0]))
+        return scored[:limit]
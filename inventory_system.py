@@ -40,23 +40,13 @@ class JSONProvider(InventoryProvider):
     def search_items(self, query: str) -> List[Dict[str, Any]]:
         if not self._has_shared:
             return []
-        items = shared_data.get_inventory() or []
-        q = (query or "").lower()
-        out = []
-        for it in items:
-            name = (it.get("name") or "").lower()
-            sku = (it.get("sku") or "").lower()
-            if q in name or q in sku:
-                out.append(_normalize_item(it))
-        return out
+        return [_normalize_item(it) for it in shared_data.search_inventory(query)]
 
     def get_item_by_sku(self, sku: str) -> Optional[Dict[str, Any]]:
         if not self._has_shared:
             return None
-        for it in shared_data.get_inventory() or []:
-            if (it.get("sku") or "").lower() == (sku or "").lower():
-                return _normalize_item(it)
-        return None
+        it = shared_data.get_inventory_by_sku(sku)
+        return _normalize_item(it) if it else None
 
     def get_departments(self) -> List[Dict[str, Any]]:
         if not self._has_shared:
@@ -145,6 +135,8 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 import random
 
+from inventory_index import InventoryIndex, TermIndex
+
 @dataclass
 class InventoryItem:
     """Represents a single inventory item"""
@@ -180,6 +172,9 @@ class InventoryManager:
         self.inventory: Dict[str, InventoryItem] = {}
         self.department_aisles: Dict[str, List[str]] = {}
         self.search_index: Dict[str, List[str]] = {}
+        self._item_index = InventoryIndex(fields=("name", "brand", "sku"))
+        self._term_index = TermIndex()
+        self._sku_lower: Dict[str, str] = {}
         
         # Initialize based on data source
         if data_source == "simulated":
@@ -287,8 +282,12 @@ class InventoryManager:
         return inventory
     
     def _build_search_index(self):
-        """Build search index for fast lookups"""
+        """Build search indexes: words -> SKUs, trigrams over name/brand, and the word vocabulary"""
         self.search_index = {}
+        self._sku_lower = {sku.lower(): sku for sku in self.inventory}
+        self._item_index = InventoryIndex(fields=("name", "brand", "sku"))
+        self._item_index.sync([{"id": sku, "name": item.name, "brand": item.brand, "sku": sku}
+                               for sku, item in self.inventory.items()])
         
         for sku, item in self.inventory.items():
             # Index by name words
@@ -305,6 +304,8 @@ class InventoryManager:
                     if word not in self.search_index:
                         self.search_index[word] = []
                     self.search_index[word].append(sku)
+        
+        self._term_index = TermIndex(self.search_index)
     
     def _build_department_aisles(self):
         """Build department to aisle mapping"""
@@ -317,29 +318,38 @@ class InventoryManager:
                 self.department_aisles[item.department].append(item.aisle)
     
     def search_inventory(self, search_term: str) -> InventorySearchResult:
-        """Search inventory by name, brand, or description"""
+        """Search inventory by SKU, name or brand, best match first.
+
+        Order: exact SKU, then items whose name/brand contains the whole
+        term (exact, prefix, word start, inner), then items sharing the most
+        words with it. All three come from indexes; nothing scans the catalog.
+        """
         search_term = search_term.lower().strip()
-        found_skus = set()
+        ranked: List[str] = []
+        seen = set()
+        
+        def take(skus):
+            for sku in skus:
+                if sku not in seen and sku in self.inventory:
+                    seen.add(sku)
+                    ranked.append(sku)
         
         # Direct SKU search
-        if search_term in self.inventory:
-            found_skus.add(search_term)
+        if search_term in self._sku_lower:
+            take([self._sku_lower[search_term]])
         
-        # Word-based search
-        search_words = search_term.split()
-        for word in search_words:
-            if word in self.search_index:
-                found_skus.update(self.search_index[word])
+        # Substring matches on name/brand via the trigram index
+        take(row["id"] for row in self._item_index.search(search_term, fields=("name", "brand")))
         
-        # Fuzzy search for partial matches
-        for sku, item in self.inventory.items():
-            if search_term in item.name.lower():
-                found_skus.add(sku)
-            elif item.brand and search_term in item.brand.lower():
-                found_skus.add(sku)
+        # Word-based search, most shared words first
+        word_hits: Dict[str, int] = {}
+        for word in set(search_term.split()):
+            for sku in self.search_index.get(word, ()):
+                word_hits[sku] = word_hits.get(sku, 0) + 1
+        take(sorted(word_hits, key=word_hits.get, reverse=True))  # stable: ties keep catalog order
         
         # Get items
-        items = [self.inventory[sku] for sku in found_skus if sku in self.inventory]
+        items = [self.inventory[sku] for sku in ranked]
         
         # Generate suggestions if no exact match
         suggestions = []
@@ -571,21 +581,31 @@ class InventoryManager:
             
             return (item_name, department, price, quantity)
     
-    def _generate_search_suggestions(self, search_term: str) -> List[str]:
-        """Generate search suggestions for failed searches"""
-        suggestions = []
-        
-        # Find similar words
-        for word in self.search_index.keys():
-            if search_term in word or word in search_term:
-                # Get a sample item for this word
-                if self.search_index[word]:
-                    sample_sku = self.search_index[word][0]
-                    if sample_sku in self.inventory:
-                        suggestions.append(self.inventory[sample_sku].name)
-                        if len(suggestions) >= 3:
-                            break
+    def _generate_search_suggestions(self, search_term: str, limit: int = 3) -> List[str]:
+        """Generate "did you mean" suggestions for failed searches.
+
+        Catalog words that contain the term or appear inside it come first
+        (longest first), then words that look like a misspelling of one of
+        its words (trigram similarity); each word suggests its first item.
+        """
+        terms = self._term_index
+        words = sorted(terms.containing(search_term) | terms.contained_in(search_term),
+                       key=lambda w: (-len(w), w))
+        if len(words) < limit:
+            fuzzy = []
+            for query_word in set(search_term.split()):
+                if query_word not in terms:
+                    fuzzy.extend(terms.similar(query_word, limit=limit))
+            words += [w for w, _ in sorted(fuzzy, key=lambda ws: -ws[1]) if w not in words]
         
+        suggestions = []
+        for word in words:
+            skus = self.search_index.get(word) or []
+            name = self.inventory[skus[0]].name if skus and skus[0] in self.inventory else None
+            if name and name not in suggestions:
+                suggestions.append(name)
+                if len(suggestions) >= limit:
+                    break
         return suggestions
     
     def get_item_by_sku(self, sku: str) -> Optional[InventoryItem]:
@@ -0,0 +1,271 @@
+"""
+Job State Store for AI Call Router
+Shared backend for per-call job state so any gunicorn worker can answer /result
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class JobStore:
+    """Key -> JSON dict store with per-key TTL and completion wake-ups"""
+
+    backend = "base"
+    poll_interval = 0.1  # re-check period for changes written by other processes
+
+    def __init__(self):
+        self._changed = threading.Condition()
+
+    def _notify(self, key: str):
+        """Wake local waiters after a write"""
+        with self._changed:
+            self._changed.notify_all()
+
+    def wait_for(self, key: str, predicate: Callable[[Dict], bool], timeout: float) -> Optional[Dict]:
+        """Block up to timeout seconds until predicate(state) is true.
+
+        Returns the matching state, or None on timeout. Writes from this
+        process wake the waiter at once; writes from other processes are
+        seen within poll_interval.
+        """
+        deadline = time.time() + max(0.0, timeout)
+        while True:
+            state = self.get(key) or {}
+            if predicate(state):
+                return state
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return None
+            with self._changed:
+                self._changed.wait(min(self.poll_interval, remaining))
+
+    def get(self, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict, ttl: int = 900):
+        raise NotImplementedError
+
+    def update(self, key: str, updates: Dict, ttl: int = 900) -> Dict:
+        """Merge updates into the stored dict atomically and return the result"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    """Per-process dict store (single worker only)"""
+
+    backend = "memory"
+    poll_interval = 1.0  # every write is local, so notify() always wakes waiters
+
+    def __init__(self):
+        super().__init__()
+        self._data = {}  # key -> (expires_ts, json_str)
+        self._lock = threading.Lock()
+
+    def _get_locked(self, key: str) -> Optional[Dict]:
+        item = self._data.get(key)
+        if not item:
+            return None
+        exp, js = item
+        if exp < time.time():
+            self._data.pop(key, None)
+            return None
+        return json.loads(js)
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            return self._get_locked(key)
+
+    def set(self, key: str, value: Dict, ttl: int = 900):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, json.dumps(value))
+        self._notify(key)
+
+    def update(self, key: str, updates: Dict, ttl: int = 900) -> Dict:
+        with self._lock:
+            cur = self._get_locked(key) or {}
+            cur.update(updates)
+            self._data[key] = (time.time() + ttl, json.dumps(cur))
+        self._notify(key)
+        return cur
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+        self._notify(key)
+
+
+class RedisJobStore(JobStore):
+    """Redis-backed store shared by every worker and host"""
+
+    backend = "redis"
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    @staticmethod
+    def channel(key: str) -> str:
+        return f"{key}:changed"
+
+    def _notify(self, key: str):
+        super()._notify(key)
+        try:
+            self.client.publish(self.channel(key), "1")
+        except Exception as e:
+            print(f"[STATE] publish failed for {key}: {e}")
+
+    def wait_for(self, key: str, predicate: Callable[[Dict], bool], timeout: float) -> Optional[Dict]:
+        """Wait on Redis pub/sub so a write from any worker wakes this one"""
+        deadline = time.time() + max(0.0, timeout)
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(self.channel(key))
+            while True:
+                # subscribe first, then read, so a publish in between is not lost
+                state = self.get(key) or {}
+                if predicate(state):
+                    return state
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                pubsub.get_message(timeout=min(1.0, remaining))
+        finally:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+    def get(self, key: str) -> Optional[Dict]:
+        js = self.client.get(key)
+        return json.loads(js) if js else None
+
+    def set(self, key: str, value: Dict, ttl: int = 900):
+        self.client.setex(key, ttl, json.dumps(value))
+        self._notify(key)
+
+    def update(self, key: str, updates: Dict, ttl: int = 900) -> Dict:
+        from redis.exceptions import WatchError
+
+        while True:
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    js = pipe.get(key)
+                    cur = json.loads(js) if js else {}
+                    cur.update(updates)
+                    pipe.multi()
+                    pipe.setex(key, ttl, json.dumps(cur))
+                    pipe.execute()
+                except WatchError:
+                    continue  # another worker wrote the key; retry the merge
+            self._notify(key)
+            return cur
+
+    def delete(self, key: str):
+        self.client.delete(key)
+        self._notify(key)
+
+
+class SQLiteJobStore(JobStore):
+    """Local SQLite (WAL) store shared by all workers on one host"""
+
+    backend = "sqlite"
+    PURGE_EVERY = 200  # writes between expired-row sweeps
+
+    def __init__(self, path: str = "instance/job_state.db"):
+        super().__init__()
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_expires ON jobs(expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit mode; write transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _maybe_purge(self, conn: sqlite3.Connection):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+
+    def get(self, key: str) -> Optional[Dict]:
+        row = self._conn().execute(
+            "SELECT value FROM jobs WHERE key = ? AND expires_at >= ?", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: Dict, ttl: int = 900):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl),
+        )
+        self._maybe_purge(conn)
+        self._notify(key)
+
+    def update(self, key: str, updates: Dict, ttl: int = 900) -> Dict:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value FROM jobs WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+            cur = json.loads(row[0]) if row else {}
+            cur.update(updates)
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(cur), time.time() + ttl),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._maybe_purge(conn)
+        self._notify(key)
+        return cur
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM jobs WHERE key = ?", (key,))
+        self._notify(key)
+
+
+def create_job_store(backend: str = "", redis_url: str = "", sqlite_path: str = "instance/job_state.db") -> JobStore:
+    """Build the configured store.
+
+    backend is "memory", "redis" or "sqlite"; when empty, Redis is used if
+    redis_url is set, otherwise the per-process memory store.
+    """
+    backend = (backend or ("redis" if redis_url else "memory")).strip().lower()
+    if backend == "redis":
+        if not redis_url:
+            raise ValueError("JOB_STORE=redis requires REDIS_URL")
+        from redis import Redis
+        client = Redis.from_url(redis_url, decode_responses=True, socket_timeout=2, socket_connect_timeout=2)
+        return RedisJobStore(client)
+    if backend == "sqlite":
+        return SQLiteJobStore(sqlite_path)
+    if backend == "memory":
+        return MemoryJobStore()
+    raise ValueError(f"Unknown JOB_STORE backend: {backend}")
@@ -4,6 +4,7 @@ import json
 import importlib
 from flask_sock import Sock
 import time
+import threading
 import random
 import collections
 import requests
@@ -110,6 +111,17 @@ with open("store_config.json") as f:
 # Whisper model setup
 model = WhisperModel("tiny", device="cpu", compute_type="int8")
 
+# Streaming ASR for /voice_stream: share the warm model through a bounded pool
+from whisper_pool import WhisperModelPool
+from media_stream import StreamingTranscriber, EnergyVAD
+
+STREAM_SILENCE_MS = int(os.getenv("STREAM_SILENCE_MS", "600"))
+STREAM_PARTIAL_MS = int(os.getenv("STREAM_PARTIAL_MS", "1000"))
+STREAM_ASR_POOL = WhisperModelPool(lambda: model, max_concurrent=1, name="faster-whisper:tiny")
+STREAM_TRANSCRIPT_TTL = int(os.getenv("STREAM_TRANSCRIPT_TTL", "600"))  # idle entries are evicted after this
+STREAM_TRANSCRIPTS = {}  # callSid -> {"partial": str, "final": [str], "closed": bool, "updated_at": float}
+STREAM_TRANSCRIPTS_LOCK = threading.Lock()
+
 # Flask app setup
 app = Flask(__name__)
 sock = Sock(app)
@@ -164,6 +176,27 @@ def transcribe(filename):
     transcript = " ".join([segment.text for segment in segments])
     return transcript.strip()
 
+# Transcribe a 16 kHz float32 chunk from the media stream
+def transcribe_stream_audio(audio):
+    def _decode(m):
+        segments, _ = m.transcribe(audio, beam_size=1, language="en", vad_filter=False)
+        return " ".join(segment.text for segment in segments).strip()
+    return STREAM_ASR_POOL.transcribe(_decode)
+
+def _stream_transcript_update(call_sid, partial=None, final=None, closed=False):
+    now = time.time()
+    with STREAM_TRANSCRIPTS_LOCK:
+        for sid in [sid for sid, e in STREAM_TRANSCRIPTS.items() if now - e["updated_at"] > STREAM_TRANSCRIPT_TTL]:
+            del STREAM_TRANSCRIPTS[sid]
+        entry = STREAM_TRANSCRIPTS.setdefault(call_sid, {"partial": "", "final": [], "closed": False, "updated_at": 0.0})
+        if partial is not None:
+            entry["partial"] = partial
+        if final is not None:
+            entry["final"].append(final)
+            entry["partial"] = ""
+        entry["closed"] = entry["closed"] or closed
+        entry["updated_at"] = now
+
 # Generate response from GPT
 def generate_response(transcript):
     departments = ', '.join(store_config['departments'].keys())
@@ -446,6 +479,8 @@ def voice_stream(ws):
     Receives JSON messages: 'start', many 'media', then 'stop'.
     """
     print("WS: client connected", flush=True)
+    transcriber = None
+    call_sid = None
     try:
         while True:
             msg = ws.receive()
@@ -456,14 +491,24 @@ def voice_stream(ws):
 
             if event == "start":
                 stream_sid = data["start"]["streamSid"]
-                call_sid = data["start"].get("callSid")
+                call_sid = data["start"].get("callSid") or stream_sid
                 print(f"WS start: streamSid={stream_sid} callSid={call_sid}", flush=True)
+                # webrtcvad is only real when USE_VAD=1; otherwise use the energy VAD
+                vad = webrtcvad.Vad(2) if USE_VAD else EnergyVAD()
+                transcriber = StreamingTranscriber(
+                    transcribe_stream_audio,
+                    vad=vad,
+                    on_partial=lambda text, sid=call_sid: _stream_transcript_update(sid, partial=text),
+                    on_final=lambda text, sid=call_sid: _stream_transcript_update(sid, final=text),
+                    silence_ms=STREAM_SILENCE_MS,
+                    partial_every_ms=STREAM_PARTIAL_MS,
+                )
 
             elif event == "media":
-                # payload is base64-encoded audio frame (20ms)
-                # timestamp = data["media"]["timestamp"]
-                # TODO: send to ASR / realtime pipeline
-                pass
+                # payload is base64-encoded 8 kHz mu-law audio frame (20ms)
+                media = data.get("media") or {}
+                if transcriber and media.get("track", "inbound") == "inbound":
+                    transcriber.feed(media.get("payload", ""))
 
             elif event == "stop":
                 print("WS stop", flush=True)
@@ -472,7 +517,25 @@ def voice_stream(ws):
     except Exception as e:
         print(f"WS error: {e}", flush=True)
     finally:
+        if transcriber:
+            transcriber.close()
+        if call_sid:
+            _stream_transcript_update(call_sid, closed=True)  # the next read consumes it
         print("WS: client disconnected", flush=True)
 
+@app.get("/stream_transcript/<call_sid>")
+def stream_transcript(call_sid):
+    """Latest partial and final transcripts captured from the media stream.
+    Once the stream has stopped, reading the entry removes it."""
+    from flask import jsonify
+    with STREAM_TRANSCRIPTS_LOCK:
+        entry = STREAM_TRANSCRIPTS.get(call_sid)
+        if entry and entry["closed"]:
+            STREAM_TRANSCRIPTS.pop(call_sid)
+        entry = dict(entry, final=list(entry["final"])) if entry else None
+    if not entry:
+        return jsonify(status="missing"), 404
+    return jsonify(status="ok", **entry)
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
\ No newline at end of file
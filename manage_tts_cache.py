@@ -82,6 +82,34 @@ def show_cache_status():
     else:
         print("   No cached files found")
 
+def run_cache_gc(dry_run=False):
+    """Apply the cache GC budgets/ages (same env settings as the app)"""
+    from cache_gc import CacheGC, POOL_RECORDING, POOL_EPHEMERAL, POOL_DURABLE, referenced_assets
+
+    mb = 1024 * 1024
+    gc = CacheGC(
+        ["static", "static/tts_cache"],
+        budgets={
+            POOL_EPHEMERAL: int(float(os.getenv("EPHEMERAL_AUDIO_BUDGET_MB", "100")) * mb),
+            POOL_DURABLE: int(float(os.getenv("TTS_CACHE_BUDGET_MB", "200")) * mb),
+        },
+        max_age={
+            POOL_RECORDING: float(os.getenv("RECORDING_MAX_AGE_HOURS", "24")) * 3600,
+            POOL_EPHEMERAL: float(os.getenv("EPHEMERAL_AUDIO_MAX_AGE_HOURS", "24")) * 3600,
+        },
+        policy=os.getenv("CACHE_GC_POLICY", "lru").strip().lower(),
+        protected=referenced_assets([os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")]),
+    )
+    report = gc.run(dry_run=dry_run)
+
+    print(f"🧹 Cache GC {'(dry run)' if dry_run else ''}")
+    print("=" * 40)
+    for pool, st in report["pools"].items():
+        print(f"{pool:10s} files={st['files']:5d}  {st['bytes']:>12,} -> {st['bytes_after']:>12,} bytes"
+              f"  expired={st['expired']} evicted={st['evicted']}")
+    print(f"\n✅ {'Would reclaim' if dry_run else 'Reclaimed'} {report['reclaimed_bytes']:,} bytes"
+          f" from {report['deleted_files']} files")
+
 def main():
     """Main function"""
     import sys
@@ -95,6 +123,7 @@ def main():
         print("  python manage_tts_cache.py clear hours   # Clear hours cache")
         print("  python manage_tts_cache.py clear address # Clear address cache")
         print("  python manage_tts_cache.py status       # Show cache status")
+        print("  python manage_tts_cache.py gc [--dry-run] # Enforce disk budget / sweep old audio")
         return
     
     command = sys.argv[1]
@@ -105,6 +134,8 @@ def main():
         clear_specific_cache(sys.argv[2])
     elif command == "status":
         show_cache_status()
+    elif command == "gc":
+        run_cache_gc(dry_run="--dry-run" in sys.argv[2:])
     else:
         print("❌ Unknown command. Use 'python manage_tts_cache.py' for help.")
 
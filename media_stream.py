@@ -0,0 +1,203 @@
+"""
+Streaming ASR for Twilio Media Streams
+Decodes base64 mu-law frames into a ring buffer, finds end-of-utterance with VAD,
+and transcribes partial and final chunks with the local Whisper engine
+"""
+
+import base64
+import collections
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+# Twilio Media Streams send 8 kHz mono mu-law, 20 ms (160 samples) per frame
+SAMPLE_RATE = 8000
+FRAME_MS = 20
+FRAME_SAMPLES = SAMPLE_RATE * FRAME_MS // 1000
+WHISPER_SAMPLE_RATE = 16000
+
+
+def _build_ulaw_table() -> np.ndarray:
+    """G.711 mu-law byte -> linear PCM16 lookup table"""
+    table = np.zeros(256, dtype=np.int16)
+    for i in range(256):
+        u = ~i & 0xFF
+        sign = u & 0x80
+        exponent = (u >> 4) & 0x07
+        mantissa = u & 0x0F
+        sample = ((mantissa << 3) + 0x84) << exponent
+        sample -= 0x84
+        table[i] = -sample if sign else sample
+    return table
+
+
+ULAW_TO_PCM16 = _build_ulaw_table()
+
+
+def decode_mulaw(payload_b64: str) -> np.ndarray:
+    """Decode a base64 mu-law media payload into int16 PCM samples"""
+    raw = base64.b64decode(payload_b64 or "")
+    return ULAW_TO_PCM16[np.frombuffer(raw, dtype=np.uint8)]
+
+
+def pcm16_to_whisper(pcm: np.ndarray) -> np.ndarray:
+    """8 kHz int16 PCM -> 16 kHz float32 in [-1, 1], the input faster-whisper expects"""
+    if pcm.size == 0:
+        return np.zeros(0, dtype=np.float32)
+    audio = pcm.astype(np.float32) / 32768.0
+    src = np.arange(audio.size, dtype=np.float32)
+    dst = np.arange(audio.size * 2, dtype=np.float32) / 2.0
+    return np.interp(dst, src, audio).astype(np.float32)
+
+
+class EnergyVAD:
+    """RMS-threshold VAD with the same is_speech() shape as webrtcvad.Vad"""
+
+    def __init__(self, threshold: float = 500.0):
+        self.threshold = threshold
+
+    def is_speech(self, frame: bytes, sample_rate: int) -> bool:
+        pcm = np.frombuffer(frame, dtype=np.int16)
+        if pcm.size == 0:
+            return False
+        rms = float(np.sqrt(np.mean(pcm.astype(np.float32) ** 2)))
+        return rms >= self.threshold
+
+
+class StreamingTranscriber:
+    """Per-call streaming pipeline for one Media Streams socket.
+
+    feed() is called for every inbound media frame. Frames are kept in a ring
+    buffer; once VAD sees speech, the utterance is accumulated and a partial
+    transcript is requested every partial_every_ms. After silence_ms of
+    trailing silence the utterance is finalized and on_final(text) fires, so
+    the transcript is ready as soon as the caller stops talking.
+    Transcription runs on a background worker so the socket loop never blocks.
+    """
+
+    def __init__(self, transcribe: Callable[[np.ndarray], str], vad=None,
+                 on_partial: Optional[Callable[[str], None]] = None,
+                 on_final: Optional[Callable[[str], None]] = None,
+                 silence_ms: int = 600, partial_every_ms: int = 1000,
+                 preroll_ms: int = 200, max_utterance_ms: int = 15000,
+                 min_speech_ms: int = 100):
+        self._transcribe = transcribe
+        self.vad = vad or EnergyVAD()
+        self.on_partial = on_partial
+        self.on_final = on_final
+        self.silence_frames = max(1, silence_ms // FRAME_MS)
+        self.partial_every_frames = max(1, partial_every_ms // FRAME_MS)
+        self.min_speech_frames = max(1, min_speech_ms // FRAME_MS)
+        self.max_utterance_frames = max(1, max_utterance_ms // FRAME_MS)
+        self._preroll = collections.deque(maxlen=max(1, preroll_ms // FRAME_MS))
+        self._utterance = collections.deque(maxlen=self.max_utterance_frames)
+        self._in_speech = False
+        self._speech_frames = 0
+        self._silent_run = 0
+        self._since_partial = 0
+        self._pending = b""
+        self.partials = []
+        self.finals = []
+        self._jobs = queue.Queue()
+        self._partial_queued = False
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="stream-asr", daemon=True)
+        self._worker.start()
+
+    # ---- socket side ----
+    def feed(self, payload_b64: str):
+        """Add one base64 mu-law media payload"""
+        pcm = decode_mulaw(payload_b64).tobytes()
+        data = self._pending + pcm
+        step = FRAME_SAMPLES * 2
+        while len(data) >= step:
+            self._feed_frame(data[:step])
+            data = data[step:]
+        self._pending = data
+
+    def _feed_frame(self, frame: bytes):
+        try:
+            speech = bool(self.vad.is_speech(frame, SAMPLE_RATE))
+        except Exception:
+            speech = False
+
+        if not self._in_speech:
+            self._preroll.append(frame)
+            if speech:
+                self._in_speech = True
+                self._utterance.extend(self._preroll)
+                self._preroll.clear()
+                self._speech_frames = 1
+                self._silent_run = 0
+                self._since_partial = 0
+            return
+
+        self._utterance.append(frame)
+        if speech:
+            self._speech_frames += 1
+            self._silent_run = 0
+        else:
+            self._silent_run += 1
+
+        self._since_partial += 1
+        if self._silent_run >= self.silence_frames or len(self._utterance) >= self.max_utterance_frames:
+            self._end_utterance()
+        elif self._since_partial >= self.partial_every_frames:
+            self._since_partial = 0
+            self._queue_partial()
+
+    def _queue_partial(self):
+        with self._lock:
+            if self._partial_queued:
+                return  # a partial is already waiting; the next one will cover this audio
+            self._partial_queued = True
+        self._jobs.put(("partial", b"".join(self._utterance)))
+
+    def _end_utterance(self):
+        audio = b"".join(self._utterance)
+        enough = self._speech_frames >= self.min_speech_frames
+        self._utterance.clear()
+        self._in_speech = False
+        self._speech_frames = 0
+        self._silent_run = 0
+        self._since_partial = 0
+        if enough:
+            self._jobs.put(("final", audio))
+
+    def close(self, timeout: float = 10.0):
+        """Finalize any utterance in progress and wait for pending transcriptions"""
+        if self._in_speech:
+            self._end_utterance()
+        self._jobs.put(None)
+        self._worker.join(timeout)
+
+    # ---- worker side ----
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            kind, audio = job
+            if kind == "partial":
+                with self._lock:
+                    self._partial_queued = False
+            start = time.time()
+            try:
+                pcm = np.frombuffer(audio, dtype=np.int16)
+                text = (self._transcribe(pcm16_to_whisper(pcm)) or "").strip()
+            except Exception as e:
+                print(f"[STREAM ASR] {kind} transcription failed: {e}", flush=True)
+                continue
+            elapsed = time.time() - start
+            print(f"[STREAM ASR] {kind} ({elapsed:.3f}s): '{text}'", flush=True)
+            if kind == "partial":
+                self.partials.append(text)
+                if self.on_partial and text:
+                    self.on_partial(text)
+            else:
+                self.finals.append(text)
+                if self.on_final and text:
+                    self.on_final(text)
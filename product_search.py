@@ -0,0 +1,258 @@
+"""
+Product Web Search for AI Call Router
+Deadline-bounded web lookup for products no local tier could place: Google
+results are scored by domain and path, page titles are fetched concurrently
+with aiohttp (whatever arrived by the deadline is used, the rest cancelled),
+and every answer is cached on disk per product so an item is searched once
+"""
+
+import asyncio
+import html
+import json
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, List
+
+import aiohttp
+
+from grocery_departments import (
+    DAIRY_TERMS, FROZEN_TERMS, HEALTH_BEAUTY_TERMS, HOUSEHOLD_TERMS, MEAT_SEAFOOD_TERMS, PHARMACY_TERMS,
+    PRODUCE_TERMS, table_terms,
+)
+from term_matcher import build_matcher
+
+TERM_TABLES = {
+    "produce": PRODUCE_TERMS,
+    "dairy": DAIRY_TERMS,
+    "meat_seafood": MEAT_SEAFOOD_TERMS,
+    "frozen": FROZEN_TERMS,
+    "health_beauty": HEALTH_BEAUTY_TERMS,
+    "household": HOUSEHOLD_TERMS,
+    "pharmacy": PHARMACY_TERMS,
+}
+# table -> (department, points) when any of its terms appears in the product name / a page title
+NAME_WEIGHTS = {
+    "produce": ("Grocery", 3), "dairy": ("Grocery", 3), "meat_seafood": ("Grocery", 3), "frozen": ("Grocery", 3),
+    "health_beauty": ("Health & Beauty", 3), "household": ("Household", 3), "pharmacy": ("Health & Beauty", 4),
+}
+TITLE_WEIGHTS = {
+    "health_beauty": ("Health & Beauty", 4), "pharmacy": ("Health & Beauty", 5), "produce": ("Grocery", 3),
+    "dairy": ("Grocery", 3), "household": ("Household", 3),
+}
+# (department, points, keywords) matched against the result's domain / full URL
+DOMAIN_HINTS = [
+    ("Health & Beauty", 3, ["walgreens", "cvs", "riteaid", "rite-aid", "boots", "watsons", "pharmacy"]),
+    ("Grocery", 2, ["kroger", "albertsons", "safeway", "wegmans", "wholefoods", "whole-foods", "aldi", "foodlion",
+                    "publix", "grocery"]),
+    ("Household", 2, ["homedepot", "home-depot", "lowes", "hardware"]),
+]
+URL_HINTS = [
+    ("Health & Beauty", 4, ["pharmacy", "beauty", "health", "personal-care", "personal_care", "sexual",
+                            "family-planning", "lubricant", "condom", "feminine", "intimate"]),
+    ("Grocery", 3, ["grocery", "food", "pantry", "beverage", "produce", "dairy", "meat", "frozen"]),
+    ("Household", 3, ["clean", "laundry", "household", "cleaning", "paper", "detergent"]),
+]
+PERSONAL_CARE_WORDS = ["lubricant", "lube", "condom", "intimate", "sexual", "family planning", "feminine", "personal care"]
+DEPARTMENTS = ["Grocery", "Health & Beauty", "Household", "Customer Service"]
+
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title", re.I | re.S)
+
+
+class TermTables:
+    """Every *_TERMS table in one Aho-Corasick automaton, built once.
+
+    tables(text) is the set of table names with a term occurring anywhere in
+    text (substring match, as the per-page `term in text` scans it replaces).
+    """
+
+    def __init__(self, tables: Dict[str, str] = TERM_TABLES):
+        self._matcher = build_matcher((term, name) for name, table in tables.items() for term in table_terms(table))
+
+    def tables(self, text: str) -> set:
+        found = set()
+        for _start, _end, names in self._matcher.iter_matches((text or "").lower()):
+            found.update(names)
+        return found
+
+
+def page_title(raw: bytes) -> str:
+    m = _TITLE_RE.search(raw.decode("utf-8", errors="ignore"))
+    return " ".join(html.unescape(m.group(1)).split()).lower() if m else ""
+
+
+def score_results(product_name: str, urls: List[str], titles: Iterable[str], terms: TermTables) -> dict:
+    """Department guess from the product name, result URLs and whatever page titles were fetched"""
+    scores = dict.fromkeys(DEPARTMENTS, 0)
+    product_lower = product_name.lower()
+    for table in terms.tables(product_lower):
+        if table in NAME_WEIGHTS:
+            dept, points = NAME_WEIGHTS[table]
+            scores[dept] += points
+    for url in urls:
+        u = url.lower()
+        netloc = urllib.parse.urlparse(u).netloc
+        for dept, points, keys in DOMAIN_HINTS:
+            if any(k in netloc for k in keys):
+                scores[dept] += points
+        for dept, points, keys in URL_HINTS:
+            if any(k in u for k in keys):
+                scores[dept] += points
+    for title in titles:
+        for table in terms.tables(title):
+            if table in TITLE_WEIGHTS:
+                dept, points = TITLE_WEIGHTS[table]
+                scores[dept] += points
+
+    best = max(scores, key=scores.get)
+    if any(w in product_lower for w in PERSONAL_CARE_WORDS):
+        best = "Health & Beauty"
+        scores[best] += 5
+    confidence = min(scores[best] / 8, 0.95)
+    if confidence < 0.3:
+        best, confidence = "Customer Service", 0.1
+    return {"department": best, "confidence": confidence,
+            "description": f"Found information about {product_name} online"}
+
+
+class ProductSearcher:
+    """search(product) -> {'department', 'confidence', 'description'} within `deadline` seconds.
+
+    The Google query runs on a small thread pool (the client library is
+    blocking) and counts against the same deadline as the page fetches;
+    up to max_pages titles are fetched concurrently and any fetch still
+    running at the deadline is cancelled. A query that misses the deadline
+    keeps its thread until search_fn returns (give it its own timeout), so
+    when all max_searches threads are still busy the search is skipped
+    rather than queued. Answers go into `cache` (a ClassificationCache) as
+    JSON; failed searches and answers scored at the deadline are cached as
+    negative so they are retried after its negative TTL; skipped ones are
+    not cached at all.
+    """
+
+    def __init__(self, search_fn: Callable, cache=None, deadline: float = 3.0, max_results: int = 8,
+                 max_pages: int = 5, max_bytes: int = 64 * 1024, user_agent: str = "Mozilla/5.0",
+                 max_searches: int = 4):
+        self.search_fn = search_fn
+        self.cache = cache
+        self.deadline = deadline
+        self.max_results = max_results
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self.terms = TermTables()
+        self.max_searches = max(1, int(max_searches))
+        self._pool = ThreadPoolExecutor(max_workers=self.max_searches, thread_name_prefix="web-search")
+        self._searching = 0  # search_fn calls still running, including ones past their deadline
+        self._lock = threading.Lock()
+        self._stats = {"searches": 0, "cache_hits": 0, "deadline_hits": 0, "search_errors": 0, "search_busy": 0,
+                       "pages_fetched": 0, "pages_cancelled": 0, "total_ms": 0.0}
+
+    def _bump(self, **counts):
+        with self._lock:
+            for k, v in counts.items():
+                self._stats[k] += v
+
+    async def _title(self, session: aiohttp.ClientSession, url: str) -> str:
+        async with session.get(url, allow_redirects=True) as r:
+            if r.status >= 400:
+                return ""
+            head = b""
+            async for chunk in r.content.iter_chunked(8192):  # the <title> is near the top; stop there
+                head += chunk
+                if b"</title" in head.lower() or len(head) >= self.max_bytes:
+                    break
+            return page_title(head)
+
+    async def _fetch_titles(self, urls: List[str], deadline_at: float) -> List[str]:
+        remaining = deadline_at - time.monotonic()
+        if not urls or remaining <= 0:
+            return []
+        timeout = aiohttp.ClientTimeout(total=remaining)
+        async with aiohttp.ClientSession(timeout=timeout, headers={"User-Agent": self.user_agent}) as session:
+            tasks = [asyncio.ensure_future(self._title(session, u)) for u in urls]
+            done, pending = await asyncio.wait(tasks, timeout=remaining)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        titles = [t.result() for t in done if not t.cancelled() and t.exception() is None]
+        self._bump(pages_fetched=len(titles), pages_cancelled=len(pending))
+        return [t for t in titles if t]
+
+    def _google(self, query: str) -> List[str]:
+        try:
+            return list(islice(self.search_fn(query, num_results=self.max_results), self.max_results))
+        finally:
+            with self._lock:
+                self._searching -= 1
+
+    async def _search(self, product_name: str) -> dict:
+        deadline_at = time.monotonic() + self.deadline
+        query = f"{product_name} grocery store department"
+        with self._lock:
+            busy = self._searching >= self.max_searches
+            if not busy:
+                self._searching += 1
+            else:
+                self._stats["search_busy"] += 1
+        if busy:
+            print(f"[SEARCH ERROR] All {self.max_searches} search threads busy; skipping '{product_name}'")
+            return {"department": "Customer Service", "confidence": 0.1, "description": "Search busy", "skipped": True}
+        loop = asyncio.get_running_loop()
+        try:
+            urls = await asyncio.wait_for(loop.run_in_executor(self._pool, self._google, query), timeout=self.deadline)
+        except asyncio.TimeoutError:
+            self._bump(deadline_hits=1)
+            print(f"[SEARCH ERROR] Google search for '{product_name}' missed the {self.deadline}s deadline")
+            return {"department": "Customer Service", "confidence": 0.1, "description": "Search timed out", "failed": True}
+        except Exception as e:
+            self._bump(search_errors=1)
+            print(f"[SEARCH ERROR] Google search failed: {e}")
+            return {"department": "Customer Service", "confidence": 0.1, "description": "Search failed", "failed": True}
+        if not urls:
+            return {"department": "Customer Service", "confidence": 0.1, "description": "Unable to find information online"}
+        urls = urls[:self.max_pages]
+        titles = await self._fetch_titles(urls, deadline_at)
+        result = score_results(product_name, urls, titles, self.terms)
+        if time.monotonic() >= deadline_at:
+            self._bump(deadline_hits=1)
+            result["failed"] = True  # scored without every page: keep it only for the negative TTL
+        return result
+
+    def _run(self, product_name: str) -> dict:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self._search(product_name))
+        # Called from inside an event loop: run ours on a thread of its own instead
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            return ex.submit(asyncio.run, self._search(product_name)).result()
+
+    def search(self, product_name: str) -> dict:
+        key = (product_name or "").lower().strip()
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached:
+                self._bump(cache_hits=1)
+                return json.loads(cached)
+        start = time.time()
+        result = self._run(product_name)
+        self._bump(searches=1, total_ms=(time.time() - start) * 1000)
+        failed, skipped = result.pop("failed", False), result.pop("skipped", False)
+        if self.cache is not None and not skipped:
+            self.cache.set(key, json.dumps(result), negative=failed)
+        print(f"[SEARCH CLASSIFICATION] {product_name} -> {result['department']} "
+              f"(confidence: {result['confidence']:.2f}, {(time.time() - start) * 1000:.0f}ms)")
+        return result
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+        s["avg_ms"] = round(s.pop("total_ms") / s["searches"], 1) if s["searches"] else 0.0
+        s["deadline_s"] = self.deadline
+        s["cache"] = self.cache.get_stats() if self.cache is not None else None
+        return s
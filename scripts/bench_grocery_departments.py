@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark classify_grocery_department: compiled term automaton vs. the
+per-rule regex scan it replaced. Also checks both give identical answers.
+
+    python scripts/bench_grocery_departments.py [--rounds 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from grocery_departments import (  # noqa: E402
+    _classify_grocery_department_regex,
+    classify_grocery_department,
+)
+
+SAMPLES = [
+    "paper towels",
+    "i need some dish soap",
+    "where is the milk",
+    "fancy feast cat food",
+    "kit kat bars",
+    "reese's peanut butter cups",
+    "do you have a hammer",
+    "vitamin c gummies",
+    "organic bananas",
+    "great stuff spray foam for gaps and cracks",
+    "manic panic hair dye",
+    "uh yeah do you guys carry the blue mountain dew",
+    "xyzzy blorp",
+    "coca-cola",
+]
+
+
+def per_call_us(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for s in SAMPLES:
+            fn(s)
+    return (time.perf_counter() - start) / (rounds * len(SAMPLES)) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rounds", type=int, default=200)
+    args = ap.parse_args()
+
+    for s in SAMPLES:
+        new, old = classify_grocery_department(s), _classify_grocery_department_regex(s)
+        assert new == old, f"{s!r}: automaton={new} regex={old}"
+
+    before = per_call_us(_classify_grocery_department_regex, args.rounds)
+    after = per_call_us(classify_grocery_department, args.rounds)
+    print(f"samples={len(SAMPLES)} rounds={args.rounds}")
+    print(f"regex scan (before): {before:8.1f} us/call")
+    print(f"automaton  (after):  {after:8.1f} us/call")
+    print(f"speedup:             {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
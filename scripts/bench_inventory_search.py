@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark InventoryManager.search_inventory and "did you mean" suggestions:
+indexed lookups vs. the linear scans they replaced, on the simulated
+inventory scaled up to N SKUs. Also checks both find the same items.
+
+    python scripts/bench_inventory_search.py [--sizes 1000,10000,100000] [--rounds 50]
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import replace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from inventory_system import InventoryManager  # noqa: E402
+
+VARIANTS = ["Original", "Family Size", "Value Pack", "Low Sodium", "Organic", "Sugar Free",
+            "Extra Large", "Mini", "Spicy", "Honey", "Zero", "Classic", "Deluxe", "Lite"]
+
+HITS = [
+    "doritos nacho cheese",   # whole-name match
+    "tortilla",               # single word
+    "paper towels",
+    "stuff gaps",             # inner substring
+    "do you have dove body wash in stock",
+]
+MISSES = [
+    "tylenl",                 # misspelling -> suggestions
+    "xyzzy blorp",
+    "do you carry kombucha",
+]
+QUERIES = HITS + MISSES
+
+
+def scaled_inventory(n: int):
+    """_generate_simulated_inventory() repeated with variant names up to n SKUs"""
+    base = list(InventoryManager(data_source="none")._generate_simulated_inventory().values())
+    inventory = {}
+    i = 0
+    while len(inventory) < n:
+        item = base[i % len(base)]
+        round_no = i // len(base)
+        if round_no == 0:
+            clone = item
+        else:
+            variant = VARIANTS[round_no % len(VARIANTS)]
+            clone = replace(item, sku=f"{item.sku}-{round_no:05d}", name=f"{item.name} {variant} {round_no}")
+        inventory[clone.sku] = clone
+        i += 1
+    return inventory
+
+
+def build_manager(n: int) -> InventoryManager:
+    mgr = InventoryManager(data_source="none")
+    mgr.inventory = scaled_inventory(n)
+    mgr._build_search_index()
+    mgr._build_department_aisles()
+    return mgr
+
+
+def linear_search(mgr: InventoryManager, search_term: str) -> set:
+    """The pre-index search_inventory: word lookups plus a substring pass over every item"""
+    search_term = search_term.lower().strip()
+    found = set()
+    if search_term in mgr.inventory:
+        found.add(search_term)
+    for word in search_term.split():
+        if word in mgr.search_index:
+            found.update(mgr.search_index[word])
+    for sku, item in mgr.inventory.items():
+        if search_term in item.name.lower():
+            found.add(sku)
+        elif item.brand and search_term in item.brand.lower():
+            found.add(sku)
+    return found
+
+
+def linear_suggestions(mgr: InventoryManager, search_term: str) -> list:
+    """The pre-index suggestions: substring test against every indexed word"""
+    suggestions = []
+    for word in mgr.search_index.keys():
+        if search_term in word or word in search_term:
+            sample_sku = mgr.search_index[word][0]
+            suggestions.append(mgr.inventory[sample_sku].name)
+            if len(suggestions) >= 3:
+                break
+    return suggestions
+
+
+def per_call_ms(fn, queries, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for q in queries:
+            fn(q)
+    return (time.perf_counter() - start) * 1000 / (rounds * len(queries))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--rounds", type=int, default=50)
+    args = ap.parse_args()
+
+    print("per-call ms, old -> new (hits return every matching SKU, so they grow with the result size)")
+    print(f"{'SKUs':>8}  {'build ms':>9}  {'hit search':>18}  {'miss search':>18}  {'suggestions':>18}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        start = time.perf_counter()
+        mgr = build_manager(n)
+        build_ms = (time.perf_counter() - start) * 1000
+        for q in QUERIES:
+            new = {item.sku for item in mgr.search_inventory(q).items}
+            assert new == linear_search(mgr, q), q
+        rounds = max(1, args.rounds * 1000 // n)
+        cols = []
+        for queries in (HITS, MISSES):
+            old = per_call_ms(lambda q: linear_search(mgr, q), queries, rounds)
+            new = per_call_ms(mgr.search_inventory, queries, rounds)
+            cols.append(f"{old:>7.3f} -> {new:>7.3f}")
+        old = per_call_ms(lambda q: linear_suggestions(mgr, q.lower()), MISSES, rounds)
+        new = per_call_ms(lambda q: mgr._generate_search_suggestions(q.lower()), MISSES, rounds)
+        cols.append(f"{old:>7.3f} -> {new:>7.3f}")
+        print(f"{n:>8}  {build_ms:>9.0f}  " + "  ".join(cols))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark what the app does to a large audio fetch before the first byte
+leaves the worker: Python heap allocated and time spent in the request
+pipeline (view + after_request hooks) for a cached MP3 and a /static file.
+
+--legacy-hook re-installs the old body-sniffing after_request hook, with
+Werkzeug < 2.1 semantics (get_data() buffers passthrough file bodies instead
+of raising), for a before/after comparison.
+
+    OPENAI_API_KEY=x python scripts/bench_static_fetch.py [--mb 8] [--rounds 20] [--legacy-hook]
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from werkzeug.test import EnvironBuilder  # noqa: E402
+
+import app as app_module  # noqa: E402
+
+
+def install_legacy_hook():
+    def _force_twiml_xml(resp):
+        try:
+            resp.direct_passthrough = False
+            body = (resp.get_data(as_text=True) or "").lstrip()
+            if body.startswith("<?xml") or body.startswith("<Response"):
+                resp.mimetype = "text/xml"
+        except Exception:
+            pass
+        return resp
+
+    app_module.app.after_request(_force_twiml_xml)
+
+
+def fetch(path: str, headers=None):
+    """Run the WSGI app up to the point the server would start sending the body"""
+    env = EnvironBuilder(path=path, method="GET", headers=headers or {}).get_environ()
+    status = {}
+
+    def start_response(s, h, exc_info=None):
+        status["line"] = s
+
+    body = app_module.app.wsgi_app(env, start_response)
+    return status["line"], body
+
+
+def measure(path: str, rounds: int, headers=None):
+    times, peaks = [], []
+    for _ in range(rounds):
+        tracemalloc.start()
+        start = time.perf_counter()
+        line, body = fetch(path, headers)
+        times.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        if hasattr(body, "close"):
+            body.close()
+    times.sort()
+    return line, times[len(times) // 2], max(peaks)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=float, default=8.0, help="size of the test MP3")
+    ap.add_argument("--rounds", type=int, default=20)
+    ap.add_argument("--legacy-hook", action="store_true", help="measure the old sniffing hook")
+    args = ap.parse_args()
+    if args.legacy_hook:
+        install_legacy_hook()
+
+    payload = os.urandom(int(args.mb * 1024 * 1024))
+    name = f"bench_fetch_{os.getpid()}.mp3"
+    cache_path = os.path.join(app_module.app.static_folder, "tts_cache", name)
+    static_path = os.path.join(app_module.app.static_folder, name)
+    for p in (cache_path, static_path):
+        with open(p, "wb") as f:
+            f.write(payload)
+    try:
+        cases = [
+            ("tts_cache", f"/static/tts_cache/{name}", None),
+            ("tts_cache range", f"/static/tts_cache/{name}", {"Range": "bytes=0-65535"}),
+            ("static", f"/static/{name}", None),
+        ]
+        mode = "legacy sniffing hook" if args.legacy_hook else "typed TwiML responses"
+        print(f"{mode}: {args.mb:g} MB MP3, {args.rounds} rounds (median time to first byte, peak heap)")
+        for label, path, headers in cases:
+            line, ms, peak = measure(path, args.rounds, headers)
+            print(f"  {label:16s} {line:20s} {ms:8.2f} ms  {peak / 1024:10.1f} KiB")
+    finally:
+        for p in (cache_path, static_path):
+            try:
+                os.remove(p)
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    main()
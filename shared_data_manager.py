@@ -1,30 +1,42 @@
-import json
 import os
+import threading
 from datetime import datetime
 from typing import Dict, List, Any, Optional
-import threading
+
+from inventory_index import InventoryIndex
+from shared_data_store import DATA_TYPES, FrozenDict, FrozenList, create_shared_data_store, freeze, thaw  # noqa: F401
+
 
 class SharedDataManager:
-    """Manages shared data between the dashboard and voice app"""
+    """Manages shared data between the dashboard and voice app.
+
+    Storage is pluggable (shared_data_store): SHARED_DATA_BACKEND=json keeps
+    one JSON file per type in data_dir, =sqlite keeps everything in one WAL
+    database at SHARED_DATA_DB with row-level updates, importing the JSON
+    files the first time. Both processes must use the same backend.
+
+    Reads return read-only snapshots held in memory and revalidated at most
+    every check_interval seconds, so edits made by the other process show up
+    within that window; edits made through this instance are visible at
+    once. Callers that want to change what they read take thaw(...) first.
+    """
     
-    def __init__(self, data_dir="data"):
+    def __init__(self, data_dir="data", check_interval: Optional[float] = None,
+                 backend: Optional[str] = None, db_path: Optional[str] = None):
         self.data_dir = data_dir
-        self.lock = threading.Lock()
+        if check_interval is None:
+            check_interval = float(os.getenv("SHARED_DATA_CHECK_SEC", "1.0"))
+        if backend is None:
+            backend = os.getenv("SHARED_DATA_BACKEND", "json")
+        if db_path is None:
+            db_path = os.getenv("SHARED_DATA_DB", os.path.join("instance", "shared_data.db"))
+        self.store = create_shared_data_store(backend, data_dir, db_path, check_interval)
+        self.lock = self.store.lock
+        self._inventory_index = InventoryIndex()
+        self._index_lock = threading.Lock()
         
-        # Ensure data directory exists
-        os.makedirs(data_dir, exist_ok=True)
-        
-        # Initialize data files
-        self.files = {
-            'store_info': os.path.join(data_dir, 'store_info.json'),
-            'departments': os.path.join(data_dir, 'departments.json'),
-            'inventory': os.path.join(data_dir, 'inventory.json'),
-            'coupons': os.path.join(data_dir, 'coupons.json'),
-            'voice_templates': os.path.join(data_dir, 'voice_templates.json'),
-            'dialogue_templates': os.path.join(data_dir, 'dialogue_templates.json'),
-            'staff': os.path.join(data_dir, 'staff.json'),
-            'settings': os.path.join(data_dir, 'settings.json')
-        }
+        # JSON files (the json backend's storage, the sqlite backend's migration source)
+        self.files = {t: os.path.join(data_dir, f"{t}.json") for t in DATA_TYPES}
         
         # Initialize default data if files don't exist
         self._initialize_default_data()
@@ -33,7 +45,7 @@ class SharedDataManager:
         """Initialize default data if files don't exist"""
         
         # Default store info - using actual current voice app data
-        if not os.path.exists(self.files['store_info']):
+        if not self.store.exists('store_info'):
             # Get current store info from environment variables or use defaults
             store_name = os.getenv("STORE_NAME", "the store")
             store_hours = os.getenv("STORE_HOURS", "Mon–Sat 9am–9pm, Sun 10am–6pm")
@@ -65,7 +77,7 @@ class SharedDataManager:
             self._save_data('store_info', default_store_info)
         
         # Default departments - using actual current voice app departments
-        if not os.path.exists(self.files['departments']):
+        if not self.store.exists('departments'):
             default_departments = [
                 {
                     'id': 1,
@@ -143,7 +155,7 @@ class SharedDataManager:
             self._save_data('departments', default_departments)
         
         # Default inventory
-        if not os.path.exists(self.files['inventory']):
+        if not self.store.exists('inventory'):
             default_inventory = [
                 {
                     'id': 1,
@@ -182,7 +194,7 @@ class SharedDataManager:
             self._save_data('inventory', default_inventory)
         
         # Default coupons
-        if not os.path.exists(self.files['coupons']):
+        if not self.store.exists('coupons'):
             default_coupons = [
                 {
                     'id': 1,
@@ -199,7 +211,7 @@ class SharedDataManager:
             self._save_data('coupons', default_coupons)
         
         # Default voice templates
-        if not os.path.exists(self.files['voice_templates']):
+        if not self.store.exists('voice_templates'):
             default_templates = [
                 {
                     'id': 1,
@@ -221,7 +233,7 @@ class SharedDataManager:
             self._save_data('voice_templates', default_templates)
         
         # Default dialogue templates
-        if not os.path.exists(self.files['dialogue_templates']):
+        if not self.store.exists('dialogue_templates'):
             default_dialogue_templates = {
                 "general": {
                     "greet": "Thanks for calling. What can I help you find today?",
@@ -284,7 +296,7 @@ class SharedDataManager:
             self._save_data('dialogue_templates', default_dialogue_templates)
         
         # Default staff
-        if not os.path.exists(self.files['staff']):
+        if not self.store.exists('staff'):
             default_staff = [
                 {
                     'id': 1,
@@ -300,7 +312,7 @@ class SharedDataManager:
             self._save_data('staff', default_staff)
         
         # Default settings
-        if not os.path.exists(self.files['settings']):
+        if not self.store.exists('settings'):
             default_settings = {
                 'ai_model': 'gpt-4',
                 'voice_settings': {
@@ -317,19 +329,22 @@ class SharedDataManager:
             }
             self._save_data('settings', default_settings)
     
-    def _load_data(self, data_type: str) -> Any:
-        """Load data from JSON file"""
-        try:
-            with open(self.files[data_type], 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return [] if data_type in ['departments', 'inventory', 'coupons', 'voice_templates', 'staff'] else {}
+    def _load_data(self, data_type: str, mutable: bool = False) -> Any:
+        """Read-only snapshot of data_type, or a plain deep copy when mutable=True"""
+        return self.store.load(data_type, mutable)
     
     def _save_data(self, data_type: str, data: Any) -> None:
-        """Save data to JSON file"""
-        with self.lock:
-            with open(self.files[data_type], 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+        """Replace the stored value of data_type"""
+        self.store.save(data_type, data)
+
+    def invalidate(self, data_type: Optional[str] = None) -> None:
+        """Drop cached snapshots so the next read re-checks storage"""
+        self.store.invalidate(data_type)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        stats = self.store.get_stats()
+        stats["inventory_index"] = self._inventory_index.get_stats()
+        return stats
     
     # Store Info Methods
     def get_store_info(self) -> Dict[str, Any]:
@@ -338,6 +353,7 @@ class SharedDataManager:
     
     def update_store_info(self, store_info: Dict[str, Any]) -> None:
         """Update store information"""
+        store_info = thaw(store_info)
         store_info['updated_at'] = datetime.now().isoformat()
         self._save_data('store_info', store_info)
     
@@ -348,64 +364,62 @@ class SharedDataManager:
     
     def get_department_by_name(self, name: str) -> Optional[Dict[str, Any]]:
         """Get department by name"""
-        departments = self.get_departments()
-        for dept in departments:
-            if dept['name'].lower() == name.lower():
-                return dept
-        return None
+        return self.store.find_row('departments', 'name', name)
     
     def add_department(self, department: Dict[str, Any]) -> None:
         """Add a new department"""
-        departments = self.get_departments()
-        department['id'] = max([d['id'] for d in departments], default=0) + 1
         department['created_at'] = datetime.now().isoformat()
-        departments.append(department)
-        self._save_data('departments', departments)
+        self.store.insert_row('departments', department)
     
     def update_department(self, dept_id: int, department: Dict[str, Any]) -> bool:
         """Update a department"""
-        departments = self.get_departments()
-        for i, dept in enumerate(departments):
-            if dept['id'] == dept_id:
-                department['id'] = dept_id
-                department['created_at'] = dept['created_at']
-                departments[i] = department
-                self._save_data('departments', departments)
-                return True
-        return False
+        dept = self.store.get_row('departments', dept_id)
+        if dept is None:
+            return False
+        department['id'] = dept_id
+        department['created_at'] = dept['created_at']
+        return self.store.replace_row('departments', dept_id, department)
     
     # Inventory Methods
     def get_inventory(self) -> List[Dict[str, Any]]:
         """Get all inventory items"""
         return self._load_data('inventory')
     
-    def get_inventory_by_name(self, name: str) -> Optional[Dict[str, Any]]:
-        """Get inventory item by name"""
+    def get_inventory_index(self) -> InventoryIndex:
+        """Search index over the current inventory snapshot (re-synced only when it changed)"""
         inventory = self.get_inventory()
-        for item in inventory:
-            if name.lower() in item['name'].lower():
-                return item
-        return None
+        with self._index_lock:
+            self._inventory_index.sync(inventory)
+        return self._inventory_index
+
+    def search_inventory(self, query: str, fields=None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Inventory items whose name/brand/SKU/UPC contain query, best match first"""
+        index = self.get_inventory_index()
+        with self._index_lock:
+            return index.search(query, fields, limit)
+
+    def get_inventory_by_name(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get the best inventory item whose name contains name"""
+        matches = self.search_inventory(name, fields=('name',), limit=1)
+        return matches[0] if matches else None
+
+    def get_inventory_by_sku(self, sku: str) -> Optional[Dict[str, Any]]:
+        """Get inventory item by exact SKU (case-insensitive)"""
+        return self.store.find_row('inventory', 'sku', sku)
     
     def add_inventory_item(self, item: Dict[str, Any]) -> None:
         """Add a new inventory item"""
-        inventory = self.get_inventory()
-        item['id'] = max([i['id'] for i in inventory], default=0) + 1
         item['created_at'] = datetime.now().isoformat()
-        inventory.append(item)
-        self._save_data('inventory', inventory)
+        self.store.insert_row('inventory', item)
     
     def update_inventory_item(self, item_id: int, item: Dict[str, Any]) -> bool:
         """Update an inventory item"""
-        inventory = self.get_inventory()
-        for i, inv_item in enumerate(inventory):
-            if inv_item['id'] == item_id:
-                item['id'] = item_id
-                item['created_at'] = inv_item['created_at']
-                inventory[i] = item
-                self._save_data('inventory', inventory)
-                return True
-        return False
+        inv_item = self.store.get_row('inventory', item_id)
+        if inv_item is None:
+            return False
+        item['id'] = item_id
+        item['created_at'] = inv_item['created_at']
+        return self.store.replace_row('inventory', item_id, item)
     
     # Coupon Methods
     def get_coupons(self) -> List[Dict[str, Any]]:
@@ -414,11 +428,8 @@ class SharedDataManager:
     
     def add_coupon(self, coupon: Dict[str, Any]) -> None:
         """Add a new coupon"""
-        coupons = self.get_coupons()
-        coupon['id'] = max([c['id'] for c in coupons], default=0) + 1
         coupon['created_at'] = datetime.now().isoformat()
-        coupons.append(coupon)
-        self._save_data('coupons', coupons)
+        self.store.insert_row('coupons', coupon)
     
     # Voice Template Methods
     def get_voice_templates(self) -> List[Dict[str, Any]]:
@@ -435,31 +446,23 @@ class SharedDataManager:
     
     def add_voice_template(self, template: Dict[str, Any]) -> None:
         """Add a new voice template"""
-        templates = self.get_voice_templates()
-        template['id'] = max([t['id'] for t in templates], default=0) + 1
         template['created_at'] = datetime.now().isoformat()
-        templates.append(template)
-        self._save_data('voice_templates', templates)
+        self.store.insert_row('voice_templates', template)
     
     # Dialogue Template Methods
     def get_dialogue_templates(self) -> Dict[str, Any]:
         """Get all dialogue templates"""
         templates = self._load_data('dialogue_templates')
-        # Ensure critical keys exist (non-destructive merge)
-        changed = False
         # Pharmacy greeting prompt used by voice app
         pharm_defaults = {
             "pharmacy_greeting": "You're through to the pharmacy. I can help with prescription refills, checking if a prescription is ready, transfers, pharmacist questions, pharmacy hours and location, or medical supplies. Which would you like? You can say, for example, 'refill same as last time' or give your RX or phone number."
         }
-        if 'pharmacy' not in templates:
-            templates['pharmacy'] = {}
-            changed = True
-        for k, v in pharm_defaults.items():
-            if k not in templates['pharmacy']:
-                templates['pharmacy'][k] = v
-                changed = True
-        if changed:
-            self._save_data('dialogue_templates', templates)
+        # Ensure critical keys exist (non-destructive merge)
+        missing = {k: v for k, v in pharm_defaults.items() if k not in templates.get('pharmacy', {})}
+        if missing:
+            for k, v in missing.items():
+                self.store.set_entry('dialogue_templates', 'pharmacy', k, v)
+            templates = self._load_data('dialogue_templates')
         return templates
     
     def get_dialogue_template(self, category: str, key: str) -> Optional[str]:
@@ -469,17 +472,11 @@ class SharedDataManager:
     
     def update_dialogue_template(self, category: str, key: str, text: str) -> None:
         """Update a specific dialogue template"""
-        templates = self.get_dialogue_templates()
-        if category not in templates:
-            templates[category] = {}
-        templates[category][key] = text
-        self._save_data('dialogue_templates', templates)
+        self.store.set_entry('dialogue_templates', category, key, text)
     
     def update_dialogue_category(self, category: str, templates: Dict[str, str]) -> None:
         """Update all templates in a category"""
-        all_templates = self.get_dialogue_templates()
-        all_templates[category] = templates
-        self._save_data('dialogue_templates', all_templates)
+        self.store.set_section('dialogue_templates', category, templates)
     
     # Staff Methods
     def get_staff(self) -> List[Dict[str, Any]]:
@@ -488,38 +485,25 @@ class SharedDataManager:
 
     def add_staff(self, staff: Dict[str, Any]) -> Dict[str, Any]:
         """Add a new staff member and return it."""
-        staff_list = self.get_staff()
-        new_id = max([s.get('id', 0) for s in staff_list], default=0) + 1
-        staff['id'] = new_id
         staff['created_at'] = datetime.now().isoformat()
         if 'is_active' not in staff:
             staff['is_active'] = True
-        staff_list.append(staff)
-        self._save_data('staff', staff_list)
-        return staff
+        return self.store.insert_row('staff', staff)
 
     def update_staff(self, staff_id: int, updates: Dict[str, Any]) -> bool:
         """Update an existing staff member by id."""
-        staff_list = self.get_staff()
-        for i, s in enumerate(staff_list):
-            if int(s.get('id', 0)) == int(staff_id):
-                updated = dict(s)
-                updated.update({k: v for k, v in updates.items() if v is not None})
-                updated['id'] = s['id']
-                updated['created_at'] = s.get('created_at')
-                staff_list[i] = updated
-                self._save_data('staff', staff_list)
-                return True
-        return False
+        s = self.store.get_row('staff', staff_id)
+        if s is None:
+            return False
+        updated = thaw(s)
+        updated.update({k: v for k, v in updates.items() if v is not None})
+        updated['id'] = s['id']
+        updated['created_at'] = s.get('created_at')
+        return self.store.replace_row('staff', s['id'], updated)
 
     def delete_staff(self, staff_id: int) -> bool:
         """Delete a staff member by id."""
-        staff_list = self.get_staff()
-        new_list = [s for s in staff_list if int(s.get('id', 0)) != int(staff_id)]
-        if len(new_list) != len(staff_list):
-            self._save_data('staff', new_list)
-            return True
-        return False
+        return self.store.delete_row('staff', staff_id)
     
     # Settings Methods
     def get_settings(self) -> Dict[str, Any]:
@@ -528,6 +512,7 @@ class SharedDataManager:
     
     def update_settings(self, settings: Dict[str, Any]) -> None:
         """Update system settings"""
+        settings = thaw(settings)
         settings['updated_at'] = datetime.now().isoformat()
         self._save_data('settings', settings)
 
@@ -0,0 +1,481 @@
+"""
+Shared Data Storage for AI Call Router
+Backends for the dashboard/voice-app shared data: the original one-JSON-file-
+per-type layout, or a SQLite (WAL) database with row-level updates that both
+processes can write safely. Reads are served from read-only in-memory
+snapshots that are revalidated against a cheap version check
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+LIST_TYPES = ('departments', 'inventory', 'coupons', 'voice_templates', 'staff')
+SECTION_TYPES = ('dialogue_templates',)  # {section: {key: value}}
+DOCUMENT_TYPES = ('store_info', 'settings')
+DATA_TYPES = LIST_TYPES + SECTION_TYPES + DOCUMENT_TYPES
+
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("shared data snapshots are read-only; use thaw() for a mutable copy")
+
+
+class FrozenDict(dict):
+    """dict that refuses mutation; still a dict for json.dumps/jsonify/Jinja"""
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (dict, (thaw(self),))
+
+
+class FrozenList(list):
+    """list that refuses mutation"""
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (list, (thaw(self),))
+
+
+def freeze(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        return FrozenDict((k, freeze(v)) for k, v in obj.items())
+    if isinstance(obj, list):
+        return FrozenList(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """Deep, plain (mutable) copy of a snapshot"""
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+def empty_value(data_type: str) -> Any:
+    return [] if data_type in LIST_TYPES else {}
+
+
+def _as_id(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _same_id(a: Any, b: Any) -> bool:
+    a = _as_id(a)
+    return a is not None and a == _as_id(b)
+
+
+class SharedDataStore:
+    """Storage for the shared data types with snapshot-cached reads.
+
+    load() returns a read-only snapshot that is revalidated against
+    _version() at most every check_interval seconds, so writes from another
+    process show up within that window and writes through this store at
+    once. The row and section helpers below are generic read-modify-write
+    fallbacks; backends with real row storage override them.
+    """
+
+    backend = "base"
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = max(0.0, check_interval)
+        self.lock = threading.RLock()  # held across read-modify-write, and by save()
+        # data_type -> (version, snapshot, monotonic time of last check)
+        self._cache: Dict[str, tuple] = {}
+        self._stats = {"hits": 0, "stat_checks": 0, "loads": 0, "load_errors": 0}
+
+    # --- backend hooks ---
+    def exists(self, data_type: str) -> bool:
+        raise NotImplementedError
+
+    def _version(self, data_type: str) -> Any:
+        """Cheap token that changes whenever data_type is written (None if absent)"""
+        raise NotImplementedError
+
+    def _read(self, data_type: str) -> Any:
+        """Full plain value; raises ValueError if the stored data is unreadable"""
+        raise NotImplementedError
+
+    def save(self, data_type: str, data: Any) -> None:
+        """Replace the whole value of data_type"""
+        raise NotImplementedError
+
+    # --- snapshot cache ---
+    def load(self, data_type: str, mutable: bool = False) -> Any:
+        """Read-only snapshot of data_type, or a plain deep copy when mutable=True.
+
+        Mutable loads always re-check storage, so a read-modify-write starts
+        from the latest data rather than a snapshot up to check_interval old.
+        """
+        entry = self._cache.get(data_type)
+        now = time.monotonic()
+        if entry is not None and not mutable and now - entry[2] < self.check_interval:
+            self._stats["hits"] += 1
+            snapshot = entry[1]
+        else:
+            snapshot = self._revalidate(data_type, entry, now)
+        return thaw(snapshot) if mutable else snapshot
+
+    def _revalidate(self, data_type: str, entry: Optional[tuple], now: float) -> Any:
+        self._stats["stat_checks"] += 1
+        version = self._version(data_type)
+        if entry is not None and version is not None and version == entry[0]:
+            self._cache[data_type] = (version, entry[1], now)
+            return entry[1]
+        try:
+            snapshot = freeze(self._read(data_type))
+            self._stats["loads"] += 1
+        except ValueError as e:
+            # Writers replace data atomically, so this is a hand edit in
+            # progress or corrupt data: keep serving what we had
+            self._stats["load_errors"] += 1
+            print(f"[SHARED DATA] {data_type} is unreadable ({e}); keeping previous data")
+            snapshot = entry[1] if entry is not None else freeze(empty_value(data_type))
+            version = entry[0] if entry is not None else None
+        self._cache[data_type] = (version, snapshot, now)
+        return snapshot
+
+    def invalidate(self, data_type: Optional[str] = None) -> None:
+        """Drop cached snapshots so the next read re-checks storage"""
+        if data_type is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(data_type, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        s = dict(self._stats)
+        s["backend"] = self.backend
+        s["cached"] = sorted(self._cache)
+        s["check_interval_sec"] = self.check_interval
+        return s
+
+    # --- rows (list types, keyed by 'id') ---
+    def get_row(self, data_type: str, row_id: int) -> Optional[Dict[str, Any]]:
+        for row in self.load(data_type):
+            if _same_id(row.get('id'), row_id):
+                return row
+        return None
+
+    def find_row(self, data_type: str, field: str, value: str) -> Optional[Dict[str, Any]]:
+        """First row whose field equals value, case-insensitively"""
+        value = (value or '').lower()
+        for row in self.load(data_type):
+            if str(row.get(field) or '').lower() == value:
+                return row
+        return None
+
+    def insert_row(self, data_type: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Append row, assigning row['id'] = max id + 1; returns row"""
+        with self.lock:
+            rows = self.load(data_type, mutable=True)
+            row['id'] = max([_as_id(r.get('id')) or 0 for r in rows], default=0) + 1
+            rows.append(row)
+            self.save(data_type, rows)
+        return row
+
+    def replace_row(self, data_type: str, row_id: int, row: Dict[str, Any]) -> bool:
+        with self.lock:
+            rows = self.load(data_type, mutable=True)
+            for i, r in enumerate(rows):
+                if _same_id(r.get('id'), row_id):
+                    rows[i] = thaw(row)
+                    self.save(data_type, rows)
+                    return True
+        return False
+
+    def delete_row(self, data_type: str, row_id: int) -> bool:
+        with self.lock:
+            rows = self.load(data_type)
+            kept = [r for r in rows if not _same_id(r.get('id'), row_id)]
+            if len(kept) == len(rows):
+                return False
+            self.save(data_type, kept)
+        return True
+
+    # --- sections (dialogue templates) ---
+    def set_entry(self, data_type: str, section: str, key: str, value: Any) -> None:
+        with self.lock:
+            data = self.load(data_type, mutable=True)
+            data.setdefault(section, {})[key] = thaw(value)
+            self.save(data_type, data)
+
+    def set_section(self, data_type: str, section: str, entries: Dict[str, Any]) -> None:
+        with self.lock:
+            data = self.load(data_type, mutable=True)
+            data[section] = thaw(entries)
+            self.save(data_type, data)
+
+
+class JSONFileStore(SharedDataStore):
+    """One pretty-printed JSON file per type under data_dir (the original layout).
+
+    Writes replace files atomically; concurrent writers in different
+    processes can still lose each other's updates, use SQLite for that.
+    """
+
+    backend = "json"
+
+    def __init__(self, data_dir: str = "data", check_interval: float = 1.0):
+        super().__init__(check_interval)
+        self.data_dir = data_dir
+        os.makedirs(data_dir, exist_ok=True)
+        self.files = {t: os.path.join(data_dir, f"{t}.json") for t in DATA_TYPES}
+
+    def exists(self, data_type: str) -> bool:
+        return os.path.exists(self.files[data_type])
+
+    def _version(self, data_type: str) -> Optional[tuple]:
+        try:
+            st = os.stat(self.files[data_type])
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _read(self, data_type: str) -> Any:
+        try:
+            with open(self.files[data_type], 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return empty_value(data_type)
+
+    def save(self, data_type: str, data: Any) -> None:
+        """Write the file (tmp + os.replace) and refresh the snapshot"""
+        path = self.files[data_type]
+        text = json.dumps(data, indent=2, default=str)
+        with self.lock:
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w') as f:
+                f.write(text)
+            os.replace(tmp, path)
+            self._cache[data_type] = (self._version(data_type), freeze(json.loads(text)), time.monotonic())
+
+
+class SQLiteSharedDataStore(SharedDataStore):
+    """SQLite (WAL) store shared by the dashboard and voice-app processes.
+
+    List types are one row per item keyed by (kind, id), with name and sku
+    indexed; dialogue templates are one row per (section, key); store info
+    and settings are one JSON document each. Every write is a transaction
+    that also bumps the type's counter in `versions`, which is what readers
+    revalidate their snapshots against.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = "instance/shared_data.db", check_interval: float = 1.0):
+        super().__init__(check_interval)
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("CREATE TABLE IF NOT EXISTS versions (kind TEXT PRIMARY KEY, v INTEGER NOT NULL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS documents (kind TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            " kind TEXT NOT NULL, section TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " PRIMARY KEY (kind, section, key))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            " kind TEXT NOT NULL, id INTEGER NOT NULL, name TEXT, sku TEXT, data TEXT NOT NULL,"
+            " PRIMARY KEY (kind, id))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS rows_name ON rows(kind, name COLLATE NOCASE)")
+        conn.execute("CREATE INDEX IF NOT EXISTS rows_sku ON rows(kind, sku COLLATE NOCASE)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # autocommit mode; write transactions are opened explicitly
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _write(self, data_type: str) -> Iterator[sqlite3.Connection]:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute(
+                "INSERT INTO versions (kind, v) VALUES (?, 1) ON CONFLICT(kind) DO UPDATE SET v = v + 1",
+                (data_type,),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            self._cache.pop(data_type, None)
+
+    @staticmethod
+    def _row_params(data_type: str, row: Dict[str, Any]) -> tuple:
+        return (data_type, int(row['id']), row.get('name'), row.get('sku'), json.dumps(row, default=str))
+
+    def exists(self, data_type: str) -> bool:
+        return self._version(data_type) is not None
+
+    def _version(self, data_type: str) -> Optional[int]:
+        row = self._conn().execute("SELECT v FROM versions WHERE kind = ?", (data_type,)).fetchone()
+        return row[0] if row else None
+
+    def _read(self, data_type: str) -> Any:
+        conn = self._conn()
+        if data_type in LIST_TYPES:
+            cur = conn.execute("SELECT data FROM rows WHERE kind = ? ORDER BY id", (data_type,))
+            return [json.loads(d) for (d,) in cur]
+        if data_type in SECTION_TYPES:
+            out: Dict[str, Dict[str, Any]] = {}
+            cur = conn.execute("SELECT section, key, value FROM sections WHERE kind = ? ORDER BY rowid", (data_type,))
+            for section, key, value in cur:
+                out.setdefault(section, {})[key] = json.loads(value)
+            return out
+        row = conn.execute("SELECT data FROM documents WHERE kind = ?", (data_type,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def save(self, data_type: str, data: Any) -> None:
+        with self._write(data_type) as conn:
+            if data_type in LIST_TYPES:
+                conn.execute("DELETE FROM rows WHERE kind = ?", (data_type,))
+                ids = [_as_id(r.get('id')) for r in data]
+                next_id = max([i for i in ids if i is not None], default=0) + 1
+                seen = set()
+                for row, row_id in zip(data, ids):
+                    if row_id is None or row_id in seen:
+                        row_id, next_id = next_id, next_id + 1  # missing or duplicate id
+                    row = dict(row, id=row_id)
+                    seen.add(row_id)
+                    conn.execute("INSERT INTO rows (kind, id, name, sku, data) VALUES (?, ?, ?, ?, ?)",
+                                 self._row_params(data_type, row))
+            elif data_type in SECTION_TYPES:
+                conn.execute("DELETE FROM sections WHERE kind = ?", (data_type,))
+                for section, entries in (data or {}).items():
+                    for key, value in (entries or {}).items():
+                        conn.execute("INSERT INTO sections (kind, section, key, value) VALUES (?, ?, ?, ?)",
+                                     (data_type, section, key, json.dumps(value, default=str)))
+            else:
+                conn.execute("INSERT OR REPLACE INTO documents (kind, data) VALUES (?, ?)",
+                             (data_type, json.dumps(data, default=str)))
+
+    def get_row(self, data_type: str, row_id: int) -> Optional[Dict[str, Any]]:
+        row_id = _as_id(row_id)
+        if row_id is None:
+            return None
+        row = self._conn().execute("SELECT data FROM rows WHERE kind = ? AND id = ?",
+                                   (data_type, row_id)).fetchone()
+        return freeze(json.loads(row[0])) if row else None
+
+    def find_row(self, data_type: str, field: str, value: str) -> Optional[Dict[str, Any]]:
+        if field not in ('name', 'sku'):
+            return super().find_row(data_type, field, value)
+        row = self._conn().execute(
+            f"SELECT data FROM rows WHERE kind = ? AND {field} = ? COLLATE NOCASE ORDER BY id LIMIT 1",
+            (data_type, value or ''),
+        ).fetchone()
+        return freeze(json.loads(row[0])) if row else None
+
+    def insert_row(self, data_type: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        with self._write(data_type) as conn:
+            (max_id,) = conn.execute("SELECT MAX(id) FROM rows WHERE kind = ?", (data_type,)).fetchone()
+            row['id'] = (max_id or 0) + 1
+            conn.execute("INSERT INTO rows (kind, id, name, sku, data) VALUES (?, ?, ?, ?, ?)",
+                         self._row_params(data_type, row))
+        return row
+
+    def replace_row(self, data_type: str, row_id: int, row: Dict[str, Any]) -> bool:
+        row = dict(thaw(row), id=int(row_id))
+        with self._write(data_type) as conn:
+            cur = conn.execute("UPDATE rows SET name = ?, sku = ?, data = ? WHERE kind = ? AND id = ?",
+                               (row.get('name'), row.get('sku'), json.dumps(row, default=str), data_type, int(row_id)))
+        return cur.rowcount > 0
+
+    def delete_row(self, data_type: str, row_id: int) -> bool:
+        with self._write(data_type) as conn:
+            cur = conn.execute("DELETE FROM rows WHERE kind = ? AND id = ?", (data_type, int(row_id)))
+        return cur.rowcount > 0
+
+    def set_entry(self, data_type: str, section: str, key: str, value: Any) -> None:
+        with self._write(data_type) as conn:
+            conn.execute(
+                "INSERT INTO sections (kind, section, key, value) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(kind, section, key) DO UPDATE SET value = excluded.value",
+                (data_type, section, key, json.dumps(value, default=str)),
+            )
+
+    def set_section(self, data_type: str, section: str, entries: Dict[str, Any]) -> None:
+        with self._write(data_type) as conn:
+            conn.execute("DELETE FROM sections WHERE kind = ? AND section = ?", (data_type, section))
+            for key, value in (entries or {}).items():
+                conn.execute("INSERT INTO sections (kind, section, key, value) VALUES (?, ?, ?, ?)",
+                             (data_type, section, key, json.dumps(value, default=str)))
+
+    def import_json(self, data_dir: str, overwrite: bool = False) -> Dict[str, int]:
+        """Copy data_dir/<type>.json into the database.
+
+        Types already in the database are skipped unless overwrite=True, so
+        this is a one-shot migration that is safe to run on every start.
+        Returns {data_type: items imported}.
+        """
+        imported = {}
+        for data_type in DATA_TYPES:
+            path = os.path.join(data_dir, f"{data_type}.json")
+            if not os.path.exists(path) or (self.exists(data_type) and not overwrite):
+                continue
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except ValueError as e:
+                print(f"[SHARED DATA] Not migrating {path}: {e}")
+                continue
+            if not isinstance(data, type(empty_value(data_type))):
+                print(f"[SHARED DATA] Not migrating {path}: expected {type(empty_value(data_type)).__name__}")
+                continue
+            self.save(data_type, data)
+            imported[data_type] = len(data)
+        if imported:
+            print(f"[SHARED DATA] Migrated {data_dir}/*.json into {self.path}: {imported}")
+        return imported
+
+
+def create_shared_data_store(backend: str = "", data_dir: str = "data",
+                             sqlite_path: str = "instance/shared_data.db",
+                             check_interval: float = 1.0) -> SharedDataStore:
+    """Build the configured store.
+
+    backend is "json" (default) or "sqlite". The SQLite store imports any
+    data_dir/*.json type it does not have yet, so switching over keeps the
+    current data. Both processes must be configured with the same backend.
+    """
+    backend = (backend or "json").strip().lower()
+    if backend == "sqlite":
+        store = SQLiteSharedDataStore(sqlite_path, check_interval)
+        store.import_json(data_dir)
+        return store
+    if backend == "json":
+        return JSONFileStore(data_dir, check_interval)
+    raise ValueError(f"Unknown SHARED_DATA_BACKEND: {backend}")
@@ -0,0 +1,203 @@
+"""
+Single-flight execution for AI Call Router
+Coalesces concurrent work for the same key: inside a process followers wait
+for the leader's result, across worker processes on the host the leader
+holds a file lock so the others block and then find the finished file
+"""
+
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # non-POSIX: in-process coalescing only
+    fcntl = None
+
+
+class FileLock:
+    """Exclusive flock() on a lock file. handoff() keeps it held past the
+    single-flight call (e.g. for a stream still being written); whoever
+    takes it over must call release()."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._fd = None
+        self.handed_off = False
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, timeout: float, poll: float = 0.05) -> bool:
+        if fcntl is None or not self.path:
+            return False
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.time() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if _same_file(fd, self.path):
+                    self._fd = fd
+                    os.utime(self.path)  # last use, for SingleFlight.prune()
+                    return True
+                # prune() unlinked the file between our open and flock: lock the new one
+                os.close(fd)
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                continue
+            except BlockingIOError:
+                if time.time() >= deadline:
+                    os.close(fd)
+                    return False
+                time.sleep(poll)
+
+    def handoff(self) -> "FileLock":
+        self.handed_off = True
+        return self
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            finally:
+                os.close(fd)
+
+
+def _same_file(fd: int, path: str) -> bool:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    fst = os.fstat(fd)
+    return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """do(key, fn) runs fn(lock) once per key at a time.
+
+    Threads that arrive while a call is in flight get the leader's result
+    (or exception). When lock_dir is set, the leader first takes a lock
+    file of its own key there, which serializes the same key across
+    processes and nothing else; fn must therefore re-check for a result
+    another process produced. Lock files idle for `prune_age` seconds are
+    removed by prune(), which do() runs at most once per `prune_interval`.
+    """
+
+    def __init__(self, lock_dir: Optional[str] = None, timeout: float = 120.0,
+                 prune_age: float = 3600.0, prune_interval: float = 600.0):
+        self.timeout = timeout
+        self.prune_age = prune_age
+        self.prune_interval = prune_interval
+        if lock_dir and fcntl is None:
+            print("[SINGLE FLIGHT] fcntl unavailable; coalescing within this process only")
+            lock_dir = None
+        self.lock_dir = lock_dir
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._next_prune = time.time() + prune_interval
+        self._stats = {"leaders": 0, "coalesced": 0, "lock_waits": 0, "lock_timeouts": 0, "locks_pruned": 0}
+
+    def _lock_path(self, key: str) -> Optional[str]:
+        if not self.lock_dir:
+            return None
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.lock_dir, f"{digest}.lock")
+
+    def prune(self, max_age: Optional[float] = None) -> int:
+        """Remove lock files untouched for max_age seconds that nobody holds"""
+        if not self.lock_dir:
+            return 0
+        cutoff = time.time() - (self.prune_age if max_age is None else max_age)
+        removed = 0
+        try:
+            entries = list(os.scandir(self.lock_dir))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if not entry.name.endswith(".lock"):
+                continue
+            try:
+                if entry.stat().st_mtime > cutoff:
+                    continue
+                fd = os.open(entry.path, os.O_RDWR)
+            except OSError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                if _same_file(fd, entry.path):
+                    os.unlink(entry.path)  # waiters on the old inode notice and reopen (FileLock.acquire)
+                    removed += 1
+            except OSError:
+                pass  # held by a live call
+            finally:
+                os.close(fd)
+        with self._lock:
+            self._stats["locks_pruned"] += removed
+        return removed
+
+    def do(self, key: str, fn: Callable[[FileLock], object]):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+                leader = True
+            prune_due = self.lock_dir is not None and time.time() >= self._next_prune
+            if prune_due:
+                self._next_prune = time.time() + self.prune_interval
+        if prune_due:
+            self.prune()
+        if not leader:
+            if not call.done.wait(self.timeout):
+                raise TimeoutError(f"single-flight wait for {key} timed out")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        lock = FileLock(self._lock_path(key))
+        try:
+            start = time.time()
+            if lock.path and not lock.acquire(self.timeout):
+                with self._lock:
+                    self._stats["lock_timeouts"] += 1
+                print(f"[SINGLE FLIGHT] lock wait for {key} timed out; proceeding unlocked")
+            elif time.time() - start > 0.1:
+                with self._lock:
+                    self._stats["lock_waits"] += 1
+            call.result = fn(lock)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            if not lock.handed_off:
+                lock.release()
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["in_flight"] = len(self._calls)
+        s["cross_process"] = self.lock_dir is not None
+        return s
@@ -0,0 +1,238 @@
+"""
+Background Task Executor for AI Call Router
+One bounded, prioritized worker pool for reply preparation, routing and
+analytics, plus a timer wheel for delayed tasks
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Lower number runs first
+PRIORITY_CONFIRM = 0     # caller just said "yes" and is waiting on the final route
+PRIORITY_REPLY = 1       # caller is on hold for a reply
+PRIORITY_BACKGROUND = 5  # analytics / credit tracking, safe to shed
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised by submit() when the queue is full and nothing can be shed"""
+
+
+class _Task:
+    __slots__ = ("fn", "args", "kwargs", "priority", "name", "queued_at", "on_shed")
+
+    def __init__(self, fn, args, kwargs, priority, name, on_shed=None):
+        self.fn = fn
+        self.on_shed = on_shed
+        self.args = args
+        self.kwargs = kwargs
+        self.priority = priority
+        self.name = name
+        self.queued_at = time.time()
+
+
+class TimerWheel:
+    """Hashed timer wheel: one thread ticks every `tick` seconds and fires due callbacks.
+
+    Adding a timer is O(1) regardless of how many are pending, and no thread
+    sleeps per timer.
+    """
+
+    def __init__(self, tick: float = 0.5, slots: int = 256, name: str = "timer-wheel"):
+        self.tick = tick
+        self.slots: List[List[list]] = [[] for _ in range(slots)]
+        self.name = name
+        self._cursor = 0
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def add(self, delay: float, callback: Callable[[], None]):
+        """Fire callback (on the wheel thread) after roughly delay seconds"""
+        ticks = max(1, int(round(max(0.0, delay) / self.tick)))
+        with self._lock:
+            slot = (self._cursor + ticks) % len(self.slots)
+            rounds = (ticks - 1) // len(self.slots)
+            self.slots[slot].append([rounds, callback])
+            self._pending += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def stop(self):
+        self._stopped.set()
+
+    def _advance(self) -> List[Callable[[], None]]:
+        with self._lock:
+            self._cursor = (self._cursor + 1) % len(self.slots)
+            bucket = self.slots[self._cursor]
+            due, keep = [], []
+            for entry in bucket:
+                if entry[0] <= 0:
+                    due.append(entry[1])
+                else:
+                    entry[0] -= 1
+                    keep.append(entry)
+            self.slots[self._cursor] = keep
+            self._pending -= len(due)
+        return due
+
+    def _run(self):
+        next_tick = time.time() + self.tick
+        while not self._stopped.is_set():
+            delay = next_tick - time.time()
+            if delay > 0:
+                self._stopped.wait(delay)
+            next_tick += self.tick
+            for callback in self._advance():
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"[EXECUTOR] timer callback failed: {e}")
+
+
+class TaskExecutor:
+    """Fixed-size worker pool fed from a priority queue.
+
+    - max_workers threads are started lazily and reused.
+    - The queue holds at most max_queue tasks. When it is full, a submit
+      with a better priority than the worst queued task evicts that task
+      (analytics are shed before callers wait); otherwise ExecutorBusy.
+      A shed task's on_shed callback runs so its owner can fail it cleanly.
+    - schedule() runs a task after a delay via the timer wheel.
+    """
+
+    def __init__(self, max_workers: int = 8, max_queue: int = 200, name: str = "tasks",
+                 wrap: Optional[Callable[[Callable[[], None]], None]] = None):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(1, int(max_queue))
+        self.name = name
+        self._wrap = wrap  # e.g. run inside a Flask app context
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._running = 0
+        self.timers = TimerWheel(name=f"{name}-timers")
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "shed": 0,
+            "scheduled": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "total_run_ms": 0.0,
+        }
+
+    def submit(self, fn: Callable, *args, priority: int = PRIORITY_REPLY, name: str = "",
+               on_shed: Optional[Callable[[], None]] = None, **kwargs):
+        """Queue fn(*args, **kwargs); raises ExecutorBusy under backpressure"""
+        task = _Task(fn, args, kwargs, priority, name or getattr(fn, "__name__", "task"), on_shed)
+        shed = None
+        with self._cond:
+            if len(self._heap) >= self.max_queue:
+                worst = max(self._heap)
+                if worst[0] <= priority:
+                    self._stats["rejected"] += 1
+                    raise ExecutorBusy(f"{self.name} queue full ({self.max_queue})")
+                self._heap.remove(worst)
+                heapq.heapify(self._heap)
+                self._stats["shed"] += 1
+                shed = worst[2]
+                print(f"[EXECUTOR] queue full, shed {shed.name} (priority {worst[0]})")
+            heapq.heappush(self._heap, (priority, next(self._seq), task))
+            self._stats["submitted"] += 1
+            self._ensure_workers()
+            self._cond.notify()
+        if shed is not None and shed.on_shed is not None:
+            try:
+                shed.on_shed()
+            except Exception as e:
+                print(f"[EXECUTOR] on_shed for {shed.name} failed: {e}")
+
+    def schedule(self, delay: float, fn: Callable, *args, priority: int = PRIORITY_BACKGROUND,
+                 name: str = "", **kwargs):
+        """Submit fn after delay seconds (dropped with a log line if the pool is busy then)"""
+        def fire():
+            try:
+                self.submit(fn, *args, priority=priority, name=name, **kwargs)
+            except ExecutorBusy as e:
+                print(f"[EXECUTOR] delayed task {name or fn.__name__} dropped: {e}")
+
+        with self._cond:
+            self._stats["scheduled"] += 1
+        self.timers.add(delay, fire)
+
+    def _ensure_workers(self):
+        # caller holds self._cond; start a thread only when no idle one can take the work
+        idle = len(self._workers) - self._running
+        if len(self._heap) > idle and len(self._workers) < self.max_workers:
+            t = threading.Thread(target=self._worker, name=f"{self.name}-{len(self._workers)}", daemon=True)
+            self._workers.append(t)
+            t.start()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, task = heapq.heappop(self._heap)
+                self._running += 1
+                wait_ms = (time.time() - task.queued_at) * 1000
+                self._stats["total_wait_ms"] += wait_ms
+                self._stats["max_wait_ms"] = max(self._stats["max_wait_ms"], wait_ms)
+            start = time.time()
+            ok = True
+            try:
+                call = lambda: task.fn(*task.args, **task.kwargs)
+                if self._wrap:
+                    self._wrap(call)
+                else:
+                    call()
+            except Exception as e:
+                ok = False
+                print(f"[EXECUTOR] task {task.name} failed: {e}")
+            run_ms = (time.time() - start) * 1000
+            with self._cond:
+                self._running -= 1
+                self._stats["total_run_ms"] += run_ms
+                self._stats["completed" if ok else "failed"] += 1
+
+    def get_stats(self) -> Dict:
+        with self._cond:
+            s = dict(self._stats)
+            depth = {}
+            for priority, _, _ in self._heap:
+                depth[priority] = depth.get(priority, 0) + 1
+            running = self._running
+            queued = len(self._heap)
+            workers = len(self._workers)
+        started = s["completed"] + s["failed"]
+        return {
+            "name": self.name,
+            "max_workers": self.max_workers,
+            "workers": workers,
+            "running": running,
+            "queue_depth": queued,
+            "queue_max": self.max_queue,
+            "queue_depth_by_priority": depth,
+            "timers_pending": self.timers.pending,
+            "submitted": s["submitted"],
+            "completed": s["completed"],
+            "failed": s["failed"],
+            "rejected": s["rejected"],
+            "shed": s["shed"],
+            "scheduled": s["scheduled"],
+            "avg_wait_ms": round(s["total_wait_ms"] / started, 1) if started else 0.0,
+            "max_wait_ms": round(s["max_wait_ms"], 1),
+            "avg_run_ms": round(s["total_run_ms"] / started, 1) if started else 0.0,
+        }
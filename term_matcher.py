@@ -0,0 +1,106 @@
+"""
+Multi-pattern term matching for AI Call Router
+Aho-Corasick automaton that finds every occurrence of thousands of literal
+terms in one pass over the text, instead of one regex alternation per table
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def is_word_char(ch: str) -> bool:
+    """ASCII equivalent of regex \\w"""
+    return ch.isalnum() or ch == "_"
+
+
+def at_word_boundary(text: str, pos: int) -> bool:
+    """True where regex \\b would match at pos (ASCII text)"""
+    left = pos > 0 and is_word_char(text[pos - 1])
+    right = pos < len(text) and is_word_char(text[pos])
+    return left != right
+
+
+class AhoCorasick:
+    """Literal multi-pattern matcher.
+
+    add() patterns with a payload, then build() once (no adds after). iter_matches(text)
+    yields (start, end, payloads) for every occurrence, overlapping ones
+    included; end is exclusive. Matching is case-sensitive, so callers
+    lowercase both patterns and text.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, list]]] = [[]]  # state -> [(pattern_len, payloads)]
+        self._payloads: Dict[str, list] = {}
+        self._built = False
+
+    def add(self, pattern: str, payload):
+        if self._built:
+            raise RuntimeError("AhoCorasick.add() after build()")
+        if not pattern:
+            return
+        if pattern not in self._payloads:
+            self._payloads[pattern] = []
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][ch] = nxt
+                state = nxt
+            self._out[state].append((len(pattern), self._payloads[pattern]))
+        self._payloads[pattern].append(payload)
+
+    def build(self) -> "AhoCorasick":
+        """Compute failure links (BFS) and merge outputs along them"""
+        if self._built:
+            return self
+        queue = deque()
+        for nxt in self._goto[0].values():
+            self._fail[nxt] = 0
+            queue.append(nxt)
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+        return self
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, list]]:
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for plen, payloads in out[state]:
+                yield i + 1 - plen, i + 1, payloads
+
+    def iter_word_matches(self, text: str) -> Iterator[Tuple[int, int, list]]:
+        """Only matches that regex \\bpattern\\b would accept"""
+        for start, end, payloads in self.iter_matches(text):
+            if at_word_boundary(text, start) and at_word_boundary(text, end):
+                yield start, end, payloads
+
+
+def build_matcher(terms: Iterable[Tuple[str, object]]) -> AhoCorasick:
+    """Build an automaton from (pattern, payload) pairs"""
+    ac = AhoCorasick()
+    for pattern, payload in terms:
+        ac.add(pattern, payload)
+    return ac.build()
@@ -0,0 +1,68 @@
+from asr_repair import PhoneticMatcher, bounded_levenshtein, phonetic_key
+from grocery_departments import department_vocabulary
+
+VOCAB = [("charger", "allow"), ("carhartt", "repair"), ("doritos", "inventory"), ("tylenol", "inventory"),
+         ("phone charger", "department"), ("cheddar", "department"), ("cheese", "department"),
+         ("half and half", "department"), ("banana", "department"), ("silk", "department")]
+
+
+def test_phonetic_key_and_bounded_distance():
+    assert phonetic_key("car hard") == phonetic_key("carhartt")
+    assert phonetic_key("fone") == phonetic_key("phone")
+    assert phonetic_key("doritoz") == phonetic_key("Doritos")
+    assert phonetic_key("milk") != phonetic_key("silk")
+    assert bounded_levenshtein("kitten", "sitting", 5) == 3
+    assert bounded_levenshtein("kitten", "sitting", 1) == 2  # gave up past the bound
+    assert bounded_levenshtein("a", "abcdef", 2) == 3
+
+
+def test_repairs_garbled_items():
+    matcher = PhoneticMatcher(VOCAB)
+    matcher.add("nike", "nike shoes", source="brand")
+    cases = {
+        "do you have doritoz": "doritos",
+        "car hard": "carhartt",
+        "i need some tylenl": "tylenol",
+        "fone charger": "phone charger",
+        "where's the cheddar chease": "cheddar cheese",
+        "half and half please": "half and half",
+        "nikey": "nike shoes",
+    }
+    for heard, expected in cases.items():
+        repair = matcher.repair(heard)
+        assert repair.text == expected, heard
+        assert repair.confidence >= 0.85, heard
+
+
+def test_unknown_words_keep_low_confidence():
+    matcher = PhoneticMatcher(VOCAB)
+    assert matcher.repair("do you carry kombucha") == ("kombucha", 0.0, [])
+    partial = matcher.repair("banana blorp")
+    assert partial.text == "banana blorp" and 0 < partial.confidence < 0.8
+    assert matcher.lookup("milk") is None  # one letter from "silk" is not enough for a short word
+    assert matcher.repair("hi thanks okay").text == ""
+
+
+def test_department_vocabulary():
+    vocab = department_vocabulary()
+    assert vocab["bananas"] == "Produce"
+    assert vocab["chip"] == vocab["chips"]  # "chips?" alternatives expand to both spellings
+    assert not any(term.startswith("#") or "\n" in term for term in vocab)
+
+
+def test_repair_transcript_skips_llm_for_local_match(monkeypatch):
+    import app as app_module
+
+    class NoLLM:
+        class chat:
+            class completions:
+                @staticmethod
+                def create(**kwargs):
+                    raise AssertionError("LLM called")
+
+    monkeypatch.setattr(app_module, "client", NoLLM)
+    assert app_module.repair_transcript("do you have doritoz") == "doritos"
+    assert app_module.repair_transcript("hi there thanks") == "unclear"
+    # Below the threshold the LLM backstop still runs (and its failure still yields "unclear")
+    assert app_module.repair_transcript("do you carry kombucha") == "unclear"
+    assert app_module.ASR_REPAIR_STATS["llm"] >= 1
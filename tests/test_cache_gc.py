@@ -0,0 +1,105 @@
+import os
+import time
+
+import pytest
+
+from cache_gc import POOL_DURABLE, POOL_EPHEMERAL, POOL_RECORDING, CacheGC, classify_file, referenced_assets
+
+UUID = "09e6d687-63fb-4b75-ae1e-13485c7a44b6"
+
+
+def _touch(path, size, age):
+    path.write_bytes(b"x" * size)
+    t = time.time() - age
+    os.utime(path, (t, t))
+    return path
+
+
+def test_classify_file():
+    assert classify_file(f"last_call_{UUID}.wav") == POOL_RECORDING
+    assert classify_file(f"confirm_{UUID}.mp3") == POOL_EPHEMERAL
+    assert classify_file(f"info_hours_{UUID}.mp3") == POOL_EPHEMERAL
+    assert classify_file("tts_1a2b3c4d.mp3") == POOL_EPHEMERAL
+    assert classify_file("c0ffee00c0ffee00.mp3") == POOL_DURABLE
+    assert classify_file("prewarm_e77ca6846239b794.mp3") == POOL_DURABLE
+    for protected in ("holdy_mid.mp3", "greet.mp3", "last_call.wav", "cache_stats.json"):
+        assert classify_file(protected) is None
+
+
+def test_age_sweep_of_recordings_and_call_audio(tmp_path):
+    old_rec = _touch(tmp_path / f"last_call_{UUID}.wav", 10, age=3 * 3600)
+    new_rec = _touch(tmp_path / "last_call_11111111-2222-3333-4444-555555555555.wav", 10, age=60)
+    greet = _touch(tmp_path / "greet.mp3", 10, age=30 * 86400)
+    gc = CacheGC([str(tmp_path)], max_age={POOL_RECORDING: 3600})
+    report = gc.run()
+    assert not old_rec.exists() and new_rec.exists() and greet.exists()
+    assert report["pools"][POOL_RECORDING]["expired"] == 1
+    assert report["reclaimed_bytes"] == 10
+
+
+def test_lru_eviction_under_budget_spares_recent_hits(tmp_path):
+    names = [f"{i:016x}.mp3" for i in range(4)]
+    for i, n in enumerate(names):
+        _touch(tmp_path / n, 100, age=7200 - i)  # names[0] has the oldest mtime
+    deleted = []
+    gc = CacheGC([str(tmp_path)], budgets={POOL_DURABLE: 250}, on_delete=deleted.append)
+    gc.record_access(names[0])  # recently played, so keep it
+    report = gc.run()
+    assert (tmp_path / names[0]).exists()
+    assert not (tmp_path / names[1]).exists() and not (tmp_path / names[2]).exists()
+    assert report["pools"][POOL_DURABLE]["bytes_after"] == 200
+    assert sorted(os.path.basename(p) for p in deleted) == [names[1], names[2]]
+
+
+def test_lfu_policy_keeps_popular_files(tmp_path):
+    a, b = "a" * 16 + ".mp3", "b" * 16 + ".mp3"
+    _touch(tmp_path / a, 100, age=7200)
+    _touch(tmp_path / b, 100, age=7200)
+    gc = CacheGC([str(tmp_path)], budgets={POOL_DURABLE: 100}, policy="lfu")
+    for _ in range(3):
+        gc.record_access(a)
+    gc.record_access(b)
+    gc.run()
+    assert (tmp_path / a).exists() and not (tmp_path / b).exists()
+
+
+def test_min_age_and_dry_run(tmp_path):
+    fresh = _touch(tmp_path / f"confirm_{UUID}.mp3", 500, age=5)
+    old = _touch(tmp_path / "tts_1a2b3c4d.mp3", 500, age=3600)
+    gc = CacheGC([str(tmp_path)], budgets={POOL_EPHEMERAL: 100}, min_age=600)
+    report = gc.run(dry_run=True)
+    assert report["pools"][POOL_EPHEMERAL]["evicted"] == 1 and old.exists()
+    gc.run()
+    assert fresh.exists() and not old.exists()
+
+
+def test_assets_referenced_by_code_are_never_evicted(tmp_path):
+    import app as app_module
+
+    protected = referenced_assets([app_module.__file__])
+    assert "1a99e9963544b45c.mp3" in protected  # /result's fallback greeting
+    assert classify_file("1a99e9963544b45c.mp3", protected) is None
+    pinned = _touch(tmp_path / "1a99e9963544b45c.mp3", 500, age=30 * 86400)
+    CacheGC([str(tmp_path)], budgets={POOL_DURABLE: 0}, protected=protected).run()
+    assert pinned.exists()
+
+
+def test_hits_from_another_worker_count_as_recency(tmp_path):
+    hot, cold = _touch(tmp_path / ("a" * 16 + ".mp3"), 100, age=7200), _touch(tmp_path / ("b" * 16 + ".mp3"), 100, age=3600)
+    CacheGC([str(tmp_path)]).record_access(str(hot))  # e.g. a play in another worker: bumps the file's mtime
+    CacheGC([str(tmp_path)], budgets={POOL_DURABLE: 100}, min_age=0).run()
+    assert hot.exists() and not cold.exists()
+
+
+def test_bad_policy():
+    with pytest.raises(ValueError):
+        CacheGC([], policy="random")
+
+
+def test_gc_endpoint_dry_run():
+    from app import app
+
+    r = app.test_client().post("/cache/gc?dry_run=1")
+    assert r.status_code == 200
+    data = r.get_json(force=True)
+    assert data["dry_run"] is True and "reclaimed_bytes" in data
@@ -0,0 +1,81 @@
+import time
+from types import SimpleNamespace
+
+from classification_cache import ClassificationCache
+
+
+def test_lru_evicts_oldest_and_counts_hits():
+    cache = ClassificationCache(path="", maxsize=2)
+    cache.set("milk", "Grocery")
+    cache.set("hammer", "Home and Garden")
+    assert cache.get("MILK ") == "Grocery"  # normalized; milk is now most recent
+    cache.set("dog food", "Pet Supplies")  # evicts hammer
+    assert cache.get("hammer") is None
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_negative_entries_expire_quickly():
+    cache = ClassificationCache(path="", ttl=60, negative_ttl=0)
+    cache.set("widget", "Customer Service", negative=True)
+    time.sleep(0.01)
+    assert cache.get("widget") is None
+    cache.set("widget", "Electronics")
+    assert cache.get("widget") == "Electronics"
+
+
+def test_disk_tier_shared_between_workers(tmp_path):
+    path = str(tmp_path / "cls.db")
+    worker_a = ClassificationCache(path)
+    worker_b = ClassificationCache(path)
+    worker_a.set("fancy feast", "Pet Supplies")
+    assert worker_b.get("fancy feast") == "Pet Supplies"
+    assert worker_b.get("fancy feast") == "Pet Supplies"
+    stats = worker_b.get_stats()
+    assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1
+
+
+def test_namespace_isolates_prompt_versions(tmp_path):
+    path = str(tmp_path / "cls.db")
+    ClassificationCache(path, namespace="v1").set("catnip", "Grocery")
+    assert ClassificationCache(path, namespace="v2").get("catnip") is None
+
+
+def _fake_openai(answer=None, error=None):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if error:
+            raise error
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))), calls
+
+
+def test_classifier_does_not_pin_errors(monkeypatch):
+    import app as app_module
+
+    cache = ClassificationCache(path="", negative_ttl=0)
+    monkeypatch.setattr(app_module, "AI_CLASSIFICATION_CACHE", cache)
+
+    broken, _ = _fake_openai(error=RuntimeError("timeout"))
+    monkeypatch.setattr(app_module, "client", broken)
+    assert app_module.classify_product_with_ai("Kong chew toy") == "Customer Service"
+
+    time.sleep(0.01)
+    good, calls = _fake_openai(answer="Pet Supplies")
+    monkeypatch.setattr(app_module, "client", good)
+    assert app_module.classify_product_with_ai("Kong chew toy") == "Pet Supplies"
+    assert app_module.classify_product_with_ai("kong chew toy") == "Pet Supplies"
+    assert len(calls) == 1
+
+
+def test_cache_stats_endpoint():
+    from app import app
+
+    r = app.test_client().get("/classify/cache/stats")
+    assert r.status_code == 200
+    assert "hit_ratio" in r.get_json(force=True)
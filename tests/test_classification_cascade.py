@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+
+from classification_cache import ClassificationCache
+from classification_cascade import ClassificationCascade, Tier
+from grocery_departments import classify_grocery_department, classify_grocery_department_scored
+
+
+def _fixed(answer, calls, name):
+    def classify(text):
+        calls.append(name)
+        return answer
+    return classify
+
+
+def test_stops_at_first_confident_tier():
+    calls = []
+    cascade = ClassificationCascade([
+        Tier("rules", _fixed(("Dairy", 0.6), calls, "rules"), 0.85),
+        Tier("cache", _fixed(None, calls, "cache"), 0.9),
+        Tier("llm", _fixed(("Grocery", 0.9), calls, "llm"), 0.5),
+        Tier("web", _fixed(("Deli", 0.7), calls, "web"), 0.0),
+    ])
+    result = cascade.classify("oat milk")
+    assert (result.department, result.tier) == ("Grocery", "llm")
+    assert calls == ["rules", "cache", "llm"]
+    assert not result.ran("web")
+
+    tiers = cascade.get_stats()["tiers"]
+    assert tiers["rules"]["answered"] == 1 and tiers["rules"]["accepted"] == 0
+    assert tiers["rules"]["agreement"] == 0.0  # said Dairy, the LLM settled on Grocery
+    assert tiers["llm"]["hit_rate"] == 1.0 and tiers["web"]["calls"] == 0
+
+
+def test_falls_back_to_best_answer_and_survives_errors():
+    def broken(text):
+        raise RuntimeError("api down")
+
+    cascade = ClassificationCascade([
+        Tier("rules", lambda t: ("Produce", 0.55), 0.85),
+        Tier("model", lambda t: ("Grocery", 0.7), 0.8, applies=lambda t: False),
+        Tier("llm", broken, 0.5),
+    ])
+    result = cascade.classify("dragon fruit")
+    assert (result.department, result.confidence, result.tier) == ("Produce", 0.55, "rules")
+    stats = cascade.get_stats()
+    assert stats["tiers"]["llm"]["errors"] == 1
+    assert stats["tiers"]["model"]["calls"] == 0
+    assert stats["tiers"]["rules"]["agreement"] is None  # nothing settled it
+
+    assert ClassificationCascade([Tier("rules", lambda t: None, 0.85)]).classify("xyzzy").department is None
+
+
+def test_rule_confidence_tracks_specificity():
+    for text in ["milk", "chicken feed", "paper towels", "iphone charger", "xyzzy", "organic whole milk"]:
+        assert classify_grocery_department_scored(text)[0] == classify_grocery_department(text), text
+    assert classify_grocery_department_scored("milk")[1] >= 0.9
+    assert classify_grocery_department_scored("chicken feed")[1] < classify_grocery_department_scored("chicken")[1]
+    assert classify_grocery_department_scored("xyzzy") == (None, 0.0)
+
+
+def test_common_items_skip_the_llm(monkeypatch):
+    import app as app_module
+
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Toys & Games"))])
+
+    monkeypatch.setattr(app_module, "client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(app_module, "AI_CLASSIFICATION_CACHE", ClassificationCache(path=""))
+    assert app_module.classify_department_with_internet_fallback("milk") == ("Dairy", False)
+    assert calls == []
+
+    assert app_module.classify_department_with_internet_fallback("twenty sided dice") == ("Toys & Games", False)
+    assert app_module.classify_department_with_internet_fallback("Twenty sided dice") == ("Toys & Games", False)
+    assert len(calls) == 1  # second answer came from the cache tier
+
+    r = app_module.app.test_client().get("/classify/stats")
+    assert r.status_code == 200 and "cache" in r.get_json()["tiers"]
+
+
+def test_cached_customer_service_is_not_re_asked(monkeypatch):
+    import app as app_module
+
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise RuntimeError("api down")
+
+    monkeypatch.setattr(app_module, "client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    monkeypatch.setattr(app_module, "AI_CLASSIFICATION_CACHE", ClassificationCache(path=""))
+    monkeypatch.setattr(app_module, "should_use_internet_search", lambda text: False)
+    for _ in range(3):
+        assert app_module.classify_department_with_internet_fallback("zorblax widget")[0] == "Customer Service"
+    assert len(calls) == 1  # the failure's negative entry holds until its TTL runs out
+
+    app_module.AI_CLASSIFICATION_CACHE.set("gift card balance", "Customer Service")  # a real answer
+    app_module.classify_department_with_internet_fallback("gift card balance")
+    assert len(calls) == 1
+
+
+def test_tier_threshold_overrides_are_validated(capsys):
+    import app as app_module
+
+    defaults = {"rules": 0.85, "llm": 0.5}
+    parsed = app_module.parse_tier_thresholds('{"rules": "0.7", "llm": "high", "bogus": 1}', defaults)
+    assert parsed == {"rules": 0.7, "llm": 0.5}
+    assert app_module.parse_tier_thresholds("{not json", defaults) == defaults
+    out = capsys.readouterr().out
+    assert "unknown tier 'bogus'" in out and "'high'" in out and "not valid JSON" in out
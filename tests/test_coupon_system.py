@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import coupon_system
+from coupon_system import Coupon, CouponManager, CouponQuery, handle_coupon_query
+
+
+class _FakeShared:
+    def __init__(self, coupons):
+        self.coupons = coupons
+
+    def get_coupons(self):
+        return self.coupons
+
+
+def _manager(monkeypatch, shared_rows=None):
+    shared = _FakeShared(shared_rows or [])
+    monkeypatch.setattr(CouponManager, "_shared_coupons", lambda self: shared.coupons)
+    return CouponManager(), shared
+
+
+def test_index_matches_words_not_substrings(monkeypatch):
+    manager, _ = _manager(monkeypatch)
+    def ids(**kwargs):
+        return [c.id for c in manager.search_coupons(CouponQuery(query_type="item_specific", **kwargs))]
+
+    assert ids(item="cereal") and ids(item="cereals") == ids(item="cereal")
+    assert ids(category="produce") == ids(category="Produce")
+    toilet = [c.id for c in manager.search_coupons(CouponQuery(item="toilet paper", query_type="item_specific"))]
+    assert "AUTO002" not in toilet  # "oil" is not a word of "toilet paper"
+    general = manager.search_coupons(CouponQuery())
+    assert len(general) == len(manager.coupons)
+
+
+def test_active_set_follows_validity_boundaries(monkeypatch):
+    manager, _ = _manager(monkeypatch)
+    now = datetime.now()
+    manager.coupons.append(Coupon(id="SOON", name="Kumquat", description="", discount_type="dollar_off",
+                                  discount_value=1.0, valid_from=now + timedelta(seconds=0.2),
+                                  valid_until=now + timedelta(seconds=0.4), applicable_items=["kumquat"]))
+    manager._reindex(now)
+    query = CouponQuery(item="kumquat", query_type="item_specific")
+    assert manager.search_coupons(query) == []
+    reindexes = manager.get_stats()["reindexes"]
+
+    monkeypatch.setattr(coupon_system, "datetime", _Clock(now + timedelta(seconds=0.3)))
+    assert [c.id for c in manager.search_coupons(query)] == ["SOON"]
+    monkeypatch.setattr(coupon_system, "datetime", _Clock(now + timedelta(seconds=0.5)))
+    assert manager.search_coupons(query) == []
+    manager.search_coupons(query)
+    assert manager.get_stats()["reindexes"] == reindexes + 2  # once per boundary, not per query
+
+
+class _Clock:
+    def __init__(self, now):
+        self._now = now
+
+    def now(self):
+        return self._now
+
+    def __getattr__(self, name):
+        return getattr(datetime, name)
+
+
+def test_reloads_when_dashboard_coupons_change(monkeypatch):
+    manager, shared = _manager(monkeypatch)
+    query = CouponQuery(item="kombucha", query_type="item_specific")
+    assert manager.search_coupons(query) == []
+    shared.coupons = [
+        {"id": 7, "code": "BUCHA", "description": "$1 off kombucha", "discount_type": "fixed", "discount_value": 1,
+         "is_store_wide": False, "is_active": True, "expires_at": (datetime.now() + timedelta(days=1)).isoformat()},
+        {"id": 8, "code": "OFF", "description": "kombucha", "is_store_wide": False, "is_active": False},
+        {"id": 9, "code": "OLD", "description": "kombucha", "is_store_wide": False, "expires_at": "2024-12-31T23:59:59"},
+    ]
+    found = manager.search_coupons(query)
+    assert [(c.id, c.discount_type, c.code) for c in found] == [("DASH7", "dollar_off", "BUCHA")]
+    assert manager.get_stats()["reloads"] == 2
+
+
+def test_handle_coupon_query_uses_shared_manager(monkeypatch):
+    calls = []
+    original = coupon_system.coupon_manager.search_coupons
+    monkeypatch.setattr(coupon_system.coupon_manager, "search_coupons", lambda q: calls.append(q) or original(q))
+    response = handle_coupon_query("Do you have any coupons for milk?")
+    assert "coupon" in response.lower() and calls[0].item == "milk"
+    assert handle_coupon_query("where is the milk") is None
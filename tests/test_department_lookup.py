@@ -0,0 +1,101 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from classification_cache import ClassificationCache
+from department_lookup import DepartmentLookup, build_lookup
+
+ITEMS = [("Fancy Feast", "inventory"), ("fancy feast ", "terms"), ("board games", "terms"), ("widget", "terms")]
+ANSWERS = {"fancy feast": "Pet Supplies", "board games": "Toys & Games"}
+
+
+def _lookup(tmp_path, prompt_version="v2"):
+    return DepartmentLookup(str(tmp_path / "lookup.db"), prompt_version=prompt_version, check_interval=0)
+
+
+def test_build_activates_and_serves(tmp_path):
+    lookup = _lookup(tmp_path)
+    assert lookup.get("fancy feast") is None and not (tmp_path / "lookup.db").exists()  # reads never create the file
+
+    report = build_lookup(lookup, ITEMS, ANSWERS.get, rate=1000)
+    assert (report["pending"], report["classified"], report["unknown"], report["activated"]) == (3, 2, 1, True)
+    assert lookup.get("Fancy Feast") == "Pet Supplies"
+    assert lookup.get("widget") is None  # unknowns are left for the live path
+    assert _lookup(tmp_path, prompt_version="v3").get("fancy feast") is None  # other prompt versions don't see it
+    assert lookup.get_stats()["entries"] == 2
+
+
+def test_interrupted_build_resumes_without_reclassifying(tmp_path):
+    lookup = _lookup(tmp_path)
+    calls = []
+
+    def classify(product):
+        calls.append(product)
+        return ANSWERS.get(product)
+
+    first = build_lookup(lookup, ITEMS, classify, concurrency=1, rate=1000, limit=1)
+    assert first["activated"] is False and lookup.get("fancy feast") is None  # partial builds are not served
+    second = build_lookup(lookup, ITEMS, classify, rate=1000)
+    assert second["version"] == first["version"] and second["already_done"] == 1
+    assert sorted(calls) == ["board games", "fancy feast", "widget"]
+    assert lookup.get("board games") == "Toys & Games"
+
+
+def test_fresh_build_replaces_and_prunes_old_versions(tmp_path):
+    lookup = _lookup(tmp_path)
+    versions = []
+    for dept in ["Grocery", "Deli", "Bakery"]:
+        versions.append(build_lookup(lookup, ITEMS[:1], lambda p, d=dept: d, rate=1000, fresh=True)["version"])
+        time.sleep(1.1)  # versions are timestamped to the second
+    assert lookup.get("fancy feast") == "Bakery"
+    assert [(v["version"], v["status"]) for v in lookup.versions()] == [(versions[1], "retired"), (versions[2], "active")]
+
+
+def test_concurrency_is_bounded(tmp_path):
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def classify(product):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return "Grocery"
+
+    items = [(f"item {i}", "terms") for i in range(20)]
+    report = build_lookup(_lookup(tmp_path), items, classify, concurrency=3, rate=1000, flush_every=4)
+    assert report["classified"] == 20 and peak[0] <= 3
+
+
+def test_classify_product_with_ai_uses_lookup_first(tmp_path, monkeypatch):
+    import app as app_module
+
+    def no_llm(**kwargs):
+        raise AssertionError("LLM called")
+
+    lookup = DepartmentLookup(str(tmp_path / "lookup.db"), prompt_version=app_module.AI_CLASSIFY_PROMPT_VERSION, check_interval=0)
+    build_lookup(lookup, [("twelve sided dice", "inventory")], lambda p: "Toys & Games", rate=1000)
+    monkeypatch.setattr(app_module, "DEPARTMENT_LOOKUP", lookup)
+    monkeypatch.setattr(app_module, "AI_CLASSIFICATION_CACHE", ClassificationCache(path=""))
+    monkeypatch.setattr(app_module, "client", SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=no_llm))))
+    assert app_module.classify_product_with_ai("Twelve Sided Dice") == "Toys & Games"
+    assert app_module.classify_department_with_internet_fallback("twelve sided dice") == ("Toys & Games", False)
+    stats = app_module.app.test_client().get("/classify/stats").get_json()
+    assert stats["tiers"]["catalog"]["accepted"] >= 1 and stats["catalog_lookup"]["hits"] >= 2
+
+
+def test_ctrl_c_saves_answers_and_skips_queued_calls(tmp_path):
+    lookup = _lookup(tmp_path)
+    calls = []
+
+    def classify(product):
+        calls.append(product)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return "Grocery"
+
+    items = [(f"item {i}", "terms") for i in range(50)]
+    report = build_lookup(lookup, items, classify, concurrency=1, rate=1000, flush_every=100)
+    assert report["interrupted"] and not report["activated"] and len(calls) < 10
+    assert len(lookup.done(report["version"])) == 2  # the unflushed answers were written
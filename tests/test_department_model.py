@@ -0,0 +1,100 @@
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import department_model
+from classification_cache import ClassificationCache
+from department_model import DEPARTMENTS, DepartmentModel, Example, confirmed_route_examples, term_table_examples
+
+LLM_LABELS = [("purina cat food", "Pet Supplies"), ("fancy feast", "Pet Supplies"), ("dog treats", "Pet Supplies"),
+              ("rotisserie chicken", "Deli"), ("deli turkey", "Deli"), ("board games", "Toys & Games")]
+
+
+@pytest.fixture(scope="module")
+def model():
+    examples = term_table_examples() + [Example(t, d, 3.0, "llm") for t, d in LLM_LABELS]
+    return DepartmentModel(DEPARTMENTS).fit(examples)
+
+
+def test_predicts_catalog_terms_and_llm_labels(model):
+    dept, confidence = model.predict("whole milk")
+    assert dept == "Grocery" and confidence >= 0.8
+    assert model.predict("iphone charger")[0] == "Electronics"
+    assert model.predict("fancy feast")[0] == "Pet Supplies"  # only LLM labels teach this department
+    assert model.predict("!!!") is None
+
+
+def test_unseen_words_get_low_confidence(model):
+    for text in ["qwrtp zzkv", "blorp"]:
+        assert model.predict(text)[1] < 0.5, text
+
+
+def test_save_load_round_trip(model, tmp_path):
+    path = str(tmp_path / "model.npz")
+    model.save(path)
+    loaded = DepartmentModel.load(path)
+    assert loaded.classes == model.classes and loaded.meta["sources"] == {"terms": len(term_table_examples()), "llm": 6}
+    for text in ["whole milk", "garden hose", "fancy feast"]:
+        assert loaded.predict(text)[0] == model.predict(text)[0]
+        assert loaded.predict(text)[1] == pytest.approx(model.predict(text)[1], abs=0.01)
+
+
+def test_evaluate_reports_accuracy_at_threshold(model):
+    report = model.evaluate([Example(t, d) for t, d in LLM_LABELS], threshold=0.5)
+    assert report["examples"] == 6 and report["accuracy"] >= 0.8
+    assert report["per_class"]["Pet Supplies"]["examples"] == 3
+    assert 0 < report["coverage"] <= 1
+
+
+def test_training_sources(tmp_path):
+    cache = ClassificationCache(str(tmp_path / "cls.db"), namespace="v2")
+    cache.set("fancy feast", "Pet Supplies")
+    cache.set("widget", "Customer Service", negative=True)
+    ClassificationCache(str(tmp_path / "cls.db"), namespace="v1").set("old answer", "Grocery")
+    assert list(cache.items()) == [("fancy feast", "Pet Supplies")]
+
+    routes = tmp_path / "routes.jsonl"
+    routes.write_text("\n".join([json.dumps({"item": "sourdough", "department": "Bakery"}),
+                                 json.dumps({"item": "kale", "department": "Produce"}),  # mapped to Grocery
+                                 json.dumps({"item": "canoe", "department": "Sporting Goods"}),  # no counterpart
+                                 "not json"]))
+    assert [(e.text, e.department) for e in confirmed_route_examples(str(routes))] == [
+        ("sourdough", "Bakery"), ("kale", "Grocery")]
+
+
+def test_cli_train_and_evaluate(tmp_path, monkeypatch, capsys):
+    db = str(tmp_path / "cls.db")
+    cache = ClassificationCache(db, namespace="v2")
+    for text, dept in LLM_LABELS * 2:
+        cache.set(text, dept)
+    out = str(tmp_path / "model.npz")
+    common = ["--cache", db, "--namespace", "v2"]
+    monkeypatch.setattr(sys, "argv", ["department_model.py", "train", "--out", out, "--epochs", "3",
+                                      "--routes", str(tmp_path / "none.jsonl")] + common)
+    department_model.main()
+    monkeypatch.setattr(sys, "argv", ["department_model.py", "evaluate", "--model", out] + common)
+    department_model.main()
+    assert '"accuracy"' in capsys.readouterr().out
+
+
+def test_cascade_uses_loaded_model(monkeypatch):
+    import app as app_module
+
+    def no_llm(text):
+        raise AssertionError("LLM called")
+
+    monkeypatch.setattr(app_module, "LOCAL_DEPARTMENT_MODEL", SimpleNamespace(predict=lambda text: ("Toys & Games", 0.93)))
+    monkeypatch.setattr(app_module, "AI_CLASSIFICATION_CACHE", ClassificationCache(path=""))
+    monkeypatch.setattr(app_module, "_ask_llm_for_department", no_llm)
+    assert app_module.classify_department_with_internet_fallback("twelve sided dice") == ("Toys & Games", False)
+
+
+def test_confirmed_routes_are_logged(tmp_path, monkeypatch):
+    import app as app_module
+
+    path = tmp_path / "instance" / "routes.jsonl"
+    monkeypatch.setattr(app_module, "CONFIRMED_ROUTES_PATH", str(path))
+    app_module.record_confirmed_route("Sourdough Loaf ", "Bakery")
+    assert [(e.text, e.department) for e in confirmed_route_examples(str(path))] == [("sourdough loaf", "Bakery")]
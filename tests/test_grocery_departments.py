@@ -0,0 +1,48 @@
+import random
+import re
+
+from grocery_departments import (
+    ALL_GROCERY_DEPT_RULES,
+    GROCERY_DEPT_RULES,
+    _classify_grocery_department_regex,
+    classify_grocery_department,
+)
+
+
+def _rule_terms():
+    terms = set()
+    for rx, _ in ALL_GROCERY_DEPT_RULES:
+        for alt in re.split(r"\||\n", rx.pattern):
+            alt = alt.strip().strip("\\b()").strip()
+            if alt and not alt.startswith("#"):
+                terms.add(alt)
+    return sorted(terms)
+
+
+def test_known_items():
+    assert classify_grocery_department("paper towels") == "Household"
+    assert classify_grocery_department("kit kat bars") == "Grocery"
+    assert classify_grocery_department("manic panic hair dye") == "Health & Beauty"
+    assert classify_grocery_department("xyzzy blorp") is None
+
+
+def test_automaton_matches_regex_scan_on_every_term():
+    for term in _rule_terms():
+        assert classify_grocery_department(term) == _classify_grocery_department_regex(term), term
+
+
+def test_automaton_matches_regex_scan_on_raw_alternatives():
+    # The term tables are spliced into the regex verbatim, newlines and comments included
+    for rx, _ in GROCERY_DEPT_RULES:
+        for alt in rx.pattern[3:-3].split("|"):
+            assert classify_grocery_department(alt) == _classify_grocery_department_regex(alt), alt
+
+
+def test_automaton_matches_regex_scan_on_phrases():
+    rng = random.Random(7)
+    terms = _rule_terms()
+    filler = ["i need", "where is the", "do you have", "for my cat", "uh",
+              "coca-cola", "m&m's", "kit-kat", "café", "jalapeño", "!"]
+    for _ in range(2000):
+        text = " ".join(rng.choice(terms + filler) for _ in range(rng.randint(1, 4)))
+        assert classify_grocery_department(text) == _classify_grocery_department_regex(text), text
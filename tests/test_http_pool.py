@@ -0,0 +1,80 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_pool import HttpPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    connections = set()
+
+    class Counting(_Handler):
+        def setup(self):
+            super().setup()
+            connections.add(self.client_address)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Counting)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", connections
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_calls_reuse_pooled_connections(stub_server):
+    base, connections = stub_server
+    pool = HttpPool(pool_size=4)
+    with ThreadPoolExecutor(max_workers=4) as ex:
+        codes = list(ex.map(lambda i: pool.get("github", f"{base}/page/{i}").status_code, range(80)))
+    assert codes == [200] * 80
+    assert len(connections) <= 4
+
+    host = pool.get_stats()["hosts"][base]
+    assert host["requests"] == 80
+    assert host["connections_opened"] == len(connections)
+    assert host["connections_reused"] >= 76
+    pool.close()
+
+
+def test_service_timeouts_and_overrides():
+    pool = HttpPool(timeouts={"elevenlabs": [2, 45]})
+    assert pool.timeout("elevenlabs") == (2, 45)
+    assert pool.timeout("elevenlabs", read=10) == (2, 10)
+    assert pool.timeout("unknown") == pool.default_timeout
+
+
+def test_errors_are_counted_per_service():
+    pool = HttpPool()
+    with pytest.raises(Exception):
+        pool.get("twilio", "http://127.0.0.1:9/unreachable")
+    assert pool.get_stats()["services"]["twilio"]["errors"] == 1
+
+
+def test_session_count_is_capped(stub_server):
+    base, _ = stub_server
+    pool = HttpPool(max_hosts=2)
+    urls = [base, base.replace("127.0.0.1", "localhost"), "http://127.0.0.2:9"]
+    first = pool.session(urls[0])
+    pool.session(urls[1])
+    pool.session(urls[0])  # recently used: kept
+    pool.session(urls[2])
+    assert set(pool.get_stats()["hosts"]) == {urls[0].lower(), urls[2].lower()}
+    assert pool.session(urls[0]) is first
+    pool.close()
@@ -0,0 +1,83 @@
+import random
+
+import inventory_system
+from inventory_index import InventoryIndex
+from shared_data_manager import SharedDataManager
+
+WORDS = ["milk", "whole", "oat", "bread", "wheat", "chips", "nacho", "cheese", "cat", "food",
+         "organic", "banana", "tortilla", "salsa", "dish", "soap", "paper", "towels"]
+
+
+def _catalog(n, seed=7):
+    rng = random.Random(seed)
+    return [{"id": i, "name": " ".join(rng.sample(WORDS, 3)).title(), "sku": f"SKU{i:05d}",
+             "brand": rng.choice(["Acme", "Best Choice", ""]), "upc": f"0{i:011d}"}
+            for i in range(1, n + 1)]
+
+
+def _scan(rows, q, fields=("name", "brand", "sku", "upc")):
+    q = q.lower()
+    return {r["id"] for r in rows if any(q in str(r.get(f) or "").lower() for f in fields)}
+
+
+def test_search_matches_linear_scan():
+    rows = _catalog(500)
+    index = InventoryIndex()
+    index.sync(rows)
+    for q in ["milk", "at fo", "sku0012", "00000000042", "ch", "best choice", "xyz", "MILK OAT"]:
+        assert {r["id"] for r in index.search(q)} == _scan(rows, q), q
+        assert {r["id"] for r in index.search(q, fields=("name",))} == _scan(rows, q, ("name",)), q
+
+
+def test_ranking_prefers_exact_then_prefix_then_word():
+    rows = [
+        {"id": 1, "name": "Oatmilk Creamer"},
+        {"id": 2, "name": "Chocolate Milk Shake"},
+        {"id": 3, "name": "Milk"},
+        {"id": 4, "name": "Milk Bone Dog Treats"},
+        {"id": 5, "name": "Buttermilk"},
+    ]
+    index = InventoryIndex()
+    index.sync(rows)
+    assert [r["id"] for r in index.search("milk")] == [3, 4, 2, 5, 1]
+    assert index.search("milk", limit=1)[0]["id"] == 3
+
+
+def test_sync_reindexes_only_changes():
+    rows = _catalog(200)
+    index = InventoryIndex()
+    assert index.sync(rows)
+    assert not index.sync(rows)
+    base = index.stats["reindexed"]
+
+    edited = [dict(r) for r in rows]  # new snapshot objects, same content
+    edited[10]["name"] = "Blue Corn Tortilla Chips"
+    del edited[20]
+    edited.append({"id": 999, "name": "Fresh Salsa", "sku": "SAL999"})
+    assert index.sync(edited)
+    assert index.stats["reindexed"] - base == 2
+    assert len(index) == 200
+    assert [r["id"] for r in index.search("blue corn")] == [11]
+    assert not index.search("sku00021")
+    assert index.search("sal999")[0]["name"] == "Fresh Salsa"
+
+
+def test_token_search():
+    index = InventoryIndex()
+    index.sync([{"id": 1, "name": "Tortilla Chips"}, {"id": 2, "name": "Nacho Cheese Tortilla Chips"}])
+    assert [r["id"] for r in index.search_tokens("nacho tortilla chips")] == [2, 1]
+
+
+def test_shared_lookup_paths_use_one_index(tmp_path, monkeypatch):
+    sdm = SharedDataManager(data_dir=str(tmp_path), backend="json", check_interval=60)
+    monkeypatch.setattr(inventory_system, "shared_data", sdm, raising=False)
+    provider = inventory_system.JSONProvider()
+    provider._has_shared = True
+
+    assert sdm.get_inventory_by_name("cat food")["sku"] == "PET001"
+    assert sdm.get_inventory_index().stats["syncs"] == 1
+    sdm.add_inventory_item({"name": "Cat Food Pouches", "sku": "PET002", "price": 1.25})
+    assert [i["sku"] for i in provider.search_items("cat food")] == ["PET002", "PET001"]  # prefix match ranks first
+    assert provider.get_item_by_sku("pet002")["price_cents"] == 125
+    assert sdm.get_inventory_index().stats["syncs"] == 2
+    assert sdm.get_inventory_index().stats["reindexed"] == 4
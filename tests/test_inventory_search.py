@@ -0,0 +1,59 @@
+from dataclasses import replace
+
+from inventory_index import TermIndex
+from inventory_system import InventoryManager
+
+
+def _linear(mgr, term):
+    term = term.lower().strip()
+    found = {w for word in term.split() for w in mgr.search_index.get(word, ())}
+    for sku, item in mgr.inventory.items():
+        if term in item.name.lower() or (item.brand and term in item.brand.lower()):
+            found.add(sku)
+    return found
+
+
+def _manager(copies=1):
+    mgr = InventoryManager()
+    base = list(mgr.inventory.values())
+    for k in range(1, copies):
+        for item in base:
+            clone = replace(item, sku=f"{item.sku}-{k}", name=f"{item.name} Value Pack {k}",
+                            brand="Acme" if k % 2 else "")
+            mgr.inventory[clone.sku] = clone
+    mgr._build_search_index()
+    return mgr
+
+
+def test_finds_same_items_as_linear_scan():
+    mgr = _manager(copies=25)
+    for q in ["doritos nacho cheese", "tortilla", "stuff gaps", "acme", "value pack 7",
+              "do you have dove body wash in stock", "ch", "xyzzy"]:
+        assert {i.sku for i in mgr.search_inventory(q).items} == _linear(mgr, q), q
+
+
+def test_ranking_and_sku_lookup():
+    mgr = _manager()
+    result = mgr.search_inventory("dove")
+    assert [i.name for i in result.items] == ["Dove Body Wash", "Dove Deodorant"]  # tie: catalog order
+    assert mgr.search_inventory("do you have dove body wash").items[0].name == "Dove Body Wash"
+    assert mgr.search_inventory("groc004").items[0].name == "Lindor Truffles"
+    assert mgr.search_inventory("WD-40").total_count == 1
+
+
+def test_did_you_mean_suggestions():
+    mgr = _manager()
+    assert mgr.search_inventory("tylenl").suggestions == ["Tylenol Extra Strength"]
+    assert mgr.search_inventory("doritoz").suggestions[0] == "Doritos Nacho Cheese"
+    assert "Charmin Toilet Paper" in mgr.search_inventory("toiletries").suggestions  # contains "toilet"
+    assert mgr.search_inventory("xyzzy blorp").suggestions == []
+
+
+def test_term_index():
+    terms = TermIndex(["chocolate", "chips", "cheddar", "cheese", "tortilla"])
+    assert terms.containing("che") == {"cheddar", "cheese"}
+    assert terms.containing("ch") == {"chocolate", "chips", "cheddar", "cheese"}
+    assert terms.contained_in("tortilla chips") == {"tortilla", "chips"}
+    assert terms.complete("ch") == ["chips", "cheese", "cheddar", "chocolate"]
+    assert terms.similar("chedar")[0][0] == "cheddar"
+    assert terms.similar("zzz") == []
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from job_store import MemoryJobStore, SQLiteJobStore, create_job_store
+
+
+def _stores(tmp_path):
+    return [MemoryJobStore(), SQLiteJobStore(str(tmp_path / "jobs.db"))]
+
+
+def test_set_get_update_delete(tmp_path):
+    for store in _stores(tmp_path):
+        assert store.get("job:a") is None
+        store.set("job:a", {"status": "working"})
+        assert store.update("job:a", {"reply_url": "u"}) == {"status": "working", "reply_url": "u"}
+        assert store.get("job:a") == {"status": "working", "reply_url": "u"}
+        store.delete("job:a")
+        assert store.get("job:a") is None
+
+
+def test_ttl_expiry(tmp_path):
+    for store in _stores(tmp_path):
+        store.set("job:t", {"status": "done"}, ttl=0)
+        time.sleep(0.01)
+        assert store.get("job:t") is None
+        # update of an expired key starts from an empty dict
+        assert store.update("job:t", {"polls": 1}) == {"polls": 1}
+
+
+def test_sqlite_shared_between_workers(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    worker_a = SQLiteJobStore(path)
+    worker_b = SQLiteJobStore(path)
+    worker_a.set("job:x", {"status": "working"})
+    worker_b.update("job:x", {"status": "done", "reply_url": "https://x/y.mp3"})
+    assert worker_a.get("job:x") == {"status": "done", "reply_url": "https://x/y.mp3"}
+
+
+def test_sqlite_concurrent_updates_are_merged(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+    store.set("job:m", {})
+
+    def worker(i):
+        store.update("job:m", {f"k{i}": i})
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.get("job:m") == {f"k{i}": i for i in range(20)}
+
+
+def test_factory(tmp_path):
+    assert create_job_store().backend == "memory"
+    assert create_job_store("sqlite", sqlite_path=str(tmp_path / "j.db")).backend == "sqlite"
+    with pytest.raises(ValueError):
+        create_job_store("redis")
+    with pytest.raises(ValueError):
+        create_job_store("bogus")
+
+
+def test_result_reads_job_written_by_another_worker(tmp_path, monkeypatch):
+    import app as app_module
+
+    path = str(tmp_path / "jobs.db")
+    monkeypatch.setattr(app_module, "_job_store", SQLiteJobStore(path))
+    other_worker = SQLiteJobStore(path)
+    other_worker.set("job:shared1", {"status": "done", "reply_url": "https://example.com/r.mp3"})
+
+    r = app_module.app.test_client().post("/result?job=shared1")
+    xml = r.get_data(as_text=True)
+    assert "https://example.com/r.mp3" in xml
+    assert "<Hangup" in xml
+
+
+def test_wait_for_wakes_on_completion(tmp_path):
+    for store in _stores(tmp_path):
+        store.set("job:w", {"status": "working"})
+
+        def finish():
+            time.sleep(0.05)
+            store.update("job:w", {"status": "done", "reply_url": "u"})
+
+        threading.Thread(target=finish).start()
+        t0 = time.time()
+        state = store.wait_for("job:w", lambda s: s.get("status") == "done", timeout=5)
+        assert state == {"status": "done", "reply_url": "u"}
+        assert time.time() - t0 < 1.0
+
+
+def test_wait_for_times_out(tmp_path):
+    for store in _stores(tmp_path):
+        store.set("job:slow", {"status": "working"})
+        assert store.wait_for("job:slow", lambda s: s.get("status") == "done", timeout=0.05) is None
+
+
+def test_sqlite_wait_sees_write_from_another_worker(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    waiter = SQLiteJobStore(path)
+    writer = SQLiteJobStore(path)
+    waiter.set("job:x2", {"status": "working"})
+    threading.Timer(0.05, writer.update, args=("job:x2", {"status": "done"})).start()
+    assert waiter.wait_for("job:x2", lambda s: s.get("status") == "done", timeout=2) == {"status": "done"}
+
+
+def test_result_long_poll_plays_reply_without_redirect(monkeypatch):
+    import app as app_module
+
+    store = MemoryJobStore()
+    monkeypatch.setattr(app_module, "_job_store", store)
+    store.set("job:lp1", {"status": "working"})
+    threading.Timer(0.1, store.update, args=("job:lp1", {"status": "done", "reply_url": "https://example.com/fast.mp3"})).start()
+
+    r = app_module.app.test_client().post("/result?job=lp1")
+    xml = r.get_data(as_text=True)
+    assert "https://example.com/fast.mp3" in xml
+    assert "<Redirect" not in xml
+
+
+def test_result_long_poll_falls_back_to_redirect(monkeypatch):
+    import app as app_module
+
+    store = MemoryJobStore()
+    monkeypatch.setattr(app_module, "_job_store", store)
+    monkeypatch.setattr(app_module, "RESULT_WAIT_SEC", 0.05)
+    store.set("job:lp2", {"status": "working"})
+
+    xml = app_module.app.test_client().post("/result?job=lp2").get_data(as_text=True)
+    assert "<Redirect" in xml
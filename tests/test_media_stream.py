@@ -0,0 +1,95 @@
+import base64
+
+import numpy as np
+
+from media_stream import (
+    FRAME_SAMPLES,
+    StreamingTranscriber,
+    decode_mulaw,
+    pcm16_to_whisper,
+)
+
+# 0xFF is mu-law silence; alternating 0x00/0x80 is a full-scale square wave
+SILENCE = base64.b64encode(b"\xff" * FRAME_SAMPLES).decode()
+LOUD = base64.b64encode(b"\x00\x80" * (FRAME_SAMPLES // 2)).decode()
+
+
+def test_decode_mulaw():
+    pcm = decode_mulaw(base64.b64encode(b"\xff\x7f\x00\x80").decode())
+    assert pcm.dtype == np.int16
+    assert list(pcm) == [0, 0, -32124, 32124]
+
+
+def test_upsample_doubles_rate():
+    audio = pcm16_to_whisper(np.array([0, 16384, -16384], dtype=np.int16))
+    assert audio.dtype == np.float32
+    assert audio.size == 6
+    assert abs(audio[2] - 0.5) < 1e-6
+
+
+def test_final_transcript_on_end_of_utterance():
+    heard = []
+    finals = []
+
+    def fake_asr(audio):
+        heard.append(audio.size)
+        return "paper towels"
+
+    t = StreamingTranscriber(fake_asr, on_final=finals.append,
+                             silence_ms=200, partial_every_ms=10000)
+    for _ in range(10):
+        t.feed(SILENCE)
+    for _ in range(25):  # 500 ms of speech
+        t.feed(LOUD)
+    for _ in range(10):  # 200 ms of trailing silence ends the utterance
+        t.feed(SILENCE)
+    t.close()
+
+    assert finals == ["paper towels"]
+    assert len(heard) == 1
+    # speech + preroll + trailing silence, upsampled to 16 kHz
+    assert heard[0] >= 25 * FRAME_SAMPLES * 2
+
+
+def test_partials_while_speaking_and_close_flushes():
+    partials = []
+    finals = []
+    t = StreamingTranscriber(lambda audio: "milk", on_partial=partials.append,
+                             on_final=finals.append, silence_ms=600, partial_every_ms=200)
+    for _ in range(30):
+        t.feed(LOUD)
+    t.close()
+    assert partials and all(p == "milk" for p in partials)
+    assert finals == ["milk"]
+
+
+def test_silence_only_produces_nothing():
+    calls = []
+    t = StreamingTranscriber(lambda audio: calls.append(1) or "x")
+    for _ in range(50):
+        t.feed(SILENCE)
+    t.close()
+    assert calls == []
+
+
+def test_reply_path_uses_streamed_transcript(monkeypatch):
+    import time
+
+    import app as app_module
+
+    call_sid = f"CA{time.time_ns()}"
+    stream = app_module._stream_transcriber(call_sid, lambda audio: ("paper towels", "en", 0.99))
+    for payload in [SILENCE] * 5 + [LOUD] * 25 + [SILENCE] * 40:
+        stream.feed(payload)
+    stream.close()
+
+    replies = []
+    monkeypatch.setattr(app_module, "MEDIA_STREAM_ASR", True)
+    monkeypatch.setattr(app_module, "STREAM_FINAL_WAIT_SEC", 0.05)
+    monkeypatch.setattr(app_module, "download_twilio_recording", lambda *a: replies.append("downloaded"))
+    monkeypatch.setattr(app_module, "prepare_reply", lambda job_id, wav, base, transcript=None: replies.append(transcript))
+    app_module.prepare_reply_from_recording("job-1", "https://api.twilio.com/rec", "", call_sid)
+    assert replies == [("paper towels", "en", 0.99)]
+    app_module.prepare_reply_from_recording("job-2", "https://api.twilio.com/rec", "", call_sid)
+    assert replies[1:] == ["downloaded", None]  # each utterance is consumed once
+    assert app_module.take_stream_transcript(call_sid) is None
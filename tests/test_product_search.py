@@ -0,0 +1,115 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from classification_cache import ClassificationCache
+from product_search import ProductSearcher, TermTables, page_title, score_results
+
+
+class _Pages(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(2)
+        body = f"<html><head><title>{self.path.strip('/').replace('-', ' ')} &amp; more</title></head></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Pages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_term_tables_split_multiline_tables():
+    terms = TermTables()
+    assert terms.tables("raspberry jam") >= {"produce"}  # sits on its own line inside PRODUCE_TERMS
+    assert "pharmacy" in terms.tables("insulin pen needles")
+    assert terms.tables("xyzzy") == set()
+
+
+def test_scoring_matches_the_inline_rules():
+    terms = TermTables()
+    result = score_results("toothpaste", ["https://www.cvs.com/shop/health/toothpaste"], ["crest toothpaste & more"], terms)
+    assert result["department"] == "Health & Beauty" and result["confidence"] == 0.95
+    assert score_results("xyzzy", ["https://example.com/x"], [], terms)["department"] == "Customer Service"
+    assert page_title(b"<html><TITLE>\n Fresh &amp; Easy </TITLE>") == "fresh & easy"
+
+
+def test_deadline_keeps_fast_pages_and_cancels_the_rest(site):
+    searcher = ProductSearcher(lambda q, num_results: iter([f"{site}/fresh-raspberry", f"{site}/slow-page"]),
+                               deadline=0.5)
+    start = time.monotonic()
+    result = searcher.search("mystery fruit")
+    assert time.monotonic() - start < 1.5
+    assert result["department"] == "Grocery"  # only the fast page's title scored
+    stats = searcher.get_stats()
+    assert (stats["pages_fetched"], stats["pages_cancelled"], stats["deadline_hits"]) == (1, 1, 1)
+
+
+def test_results_are_cached_and_failures_retried(tmp_path, site):
+    calls = []
+
+    def search(query, num_results):
+        calls.append(query)
+        if "broken" in query:
+            raise RuntimeError("rate limited")
+        return iter([f"{site}/shampoo"])
+
+    cache = ClassificationCache(str(tmp_path / "search.db"), namespace="web-v1", negative_ttl=0)
+    searcher = ProductSearcher(search, cache=cache, deadline=1.0)
+    first = searcher.search("Salon Wash")
+    assert ProductSearcher(search, cache=cache).search("salon wash ") == first  # another worker, same disk cache
+    assert len(calls) == 1
+
+    assert searcher.search("broken thing")["description"] == "Search failed"
+    time.sleep(0.01)
+    searcher.search("broken thing")
+    assert len(calls) == 3  # negative entries expire, so the failure is retried
+
+
+def test_slow_google_search_is_bounded():
+    def hangs(query, num_results):
+        time.sleep(1)
+        return iter([])
+
+    start = time.monotonic()
+    result = ProductSearcher(hangs, deadline=0.2).search("anything")
+    assert time.monotonic() - start < 0.8 and result["department"] == "Customer Service"
+
+
+def test_stuck_searches_do_not_starve_later_ones(tmp_path):
+    release = threading.Event()
+
+    def hangs(query, num_results):
+        release.wait(5)
+        return iter([])
+
+    cache = ClassificationCache(str(tmp_path / "search.db"), namespace="web-v1")
+    searcher = ProductSearcher(hangs, cache=cache, deadline=0.1, max_searches=1)
+    try:
+        assert searcher.search("first")["description"] == "Search timed out"
+        start = time.monotonic()
+        assert searcher.search("second")["description"] == "Search busy"
+        assert time.monotonic() - start < 0.1 and cache.get("second") is None  # not cached as a failure
+    finally:
+        release.set()
+    time.sleep(0.05)
+    assert searcher.search("second")["description"] == "Unable to find information online"
+
+
+def test_answers_scored_at_the_deadline_are_negative_cached(tmp_path, site):
+    cache = ClassificationCache(str(tmp_path / "search.db"), namespace="web-v1", negative_ttl=0)
+    searcher = ProductSearcher(lambda q, num_results: iter([f"{site}/slow-page"]), cache=cache, deadline=0.3)
+    searcher.search("mystery fruit")
+    time.sleep(0.01)
+    assert cache.get("mystery fruit") is None
@@ -0,0 +1,102 @@
+import copy
+import json
+import os
+import time
+
+import pytest
+
+from shared_data_manager import FrozenDict, SharedDataManager, thaw
+
+
+@pytest.fixture
+def sdm(tmp_path):
+    return SharedDataManager(data_dir=str(tmp_path), check_interval=60, backend="json")
+
+
+def _rewrite(path, data):
+    """Write like another process would, making sure the stat key changes"""
+    before = os.stat(path).st_mtime_ns
+    with open(path, "w") as f:
+        json.dump(data, f)
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+
+
+def test_reads_are_served_from_one_snapshot(sdm):
+    first = sdm.get_store_info()
+    assert sdm.get_store_info() is first
+    assert sdm.get_cache_stats()["hits"] >= 1
+
+
+def test_snapshots_are_read_only_but_serializable(sdm):
+    info = sdm.get_store_info()
+    with pytest.raises(TypeError):
+        info["name"] = "x"
+    with pytest.raises(TypeError):
+        sdm.get_departments().append({})
+    with pytest.raises(TypeError):
+        sdm.get_dialogue_templates()["general"].pop("greet")
+    assert json.loads(json.dumps(info))["name"] == info["name"]
+    copied = copy.deepcopy(info)
+    copied["name"] = "x"
+    assert type(copied) is dict
+
+
+def test_own_writes_are_visible_immediately(sdm):
+    sdm.update_dialogue_template("general", "anything_else", "Anything more?")
+    assert sdm.get_dialogue_template("general", "anything_else") == "Anything more?"
+    sdm.add_department({"name": "Floral", "phone_extension": "110", "is_active": True})
+    assert sdm.get_department_by_name("floral")["id"] == 10
+    settings = thaw(sdm.get_settings())
+    settings["ai_model"] = "gpt-4o"
+    sdm.update_settings(settings)
+    assert sdm.get_settings()["ai_model"] == "gpt-4o"
+
+
+def test_other_process_edits_seen_after_check_interval(tmp_path):
+    sdm = SharedDataManager(data_dir=str(tmp_path), check_interval=0.05, backend="json")
+    assert sdm.get_store_info()["name"]
+    _rewrite(sdm.files["store_info"], {"name": "Edited Elsewhere"})
+    time.sleep(0.06)
+    assert sdm.get_store_info()["name"] == "Edited Elsewhere"
+
+
+def test_unchanged_file_is_not_reparsed(tmp_path):
+    sdm = SharedDataManager(data_dir=str(tmp_path), check_interval=0, backend="json")
+    first = sdm.get_inventory()
+    loads = sdm.get_cache_stats()["loads"]
+    assert sdm.get_inventory() is first
+    assert sdm.get_cache_stats()["loads"] == loads
+
+
+def test_invalidate_forces_recheck(sdm):
+    sdm.get_store_info()
+    _rewrite(sdm.files["store_info"], {"name": "Pushed"})
+    assert sdm.get_store_info()["name"] != "Pushed"  # within check_interval
+    sdm.invalidate()
+    assert sdm.get_store_info()["name"] == "Pushed"
+
+
+def test_corrupt_file_keeps_previous_snapshot(sdm):
+    name = sdm.get_store_info()["name"]
+    path = sdm.files["store_info"]
+    with open(path, "w") as f:
+        f.write('{"name": "half wr')
+    sdm.invalidate()
+    assert sdm.get_store_info() == {}  # nothing to fall back on
+    sdm.update_store_info({"name": name})
+    with open(path, "w") as f:
+        f.write('{"name": "half wr')
+    os.utime(path, ns=(1, 1))
+    sdm.store.check_interval = 0
+    assert sdm.get_store_info()["name"] == name
+    assert sdm.get_cache_stats()["load_errors"] == 2
+
+
+def test_mutators_accept_snapshots(sdm):
+    info = sdm.get_store_info()
+    sdm.update_store_info(info)
+    assert isinstance(sdm.get_store_info(), FrozenDict)
+    assert sdm.update_staff(1, {"role": "Lead"})
+    assert sdm.get_staff()[0]["role"] == "Lead"
+    assert sdm.delete_staff(1)
+    assert sdm.get_staff() == []
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from shared_data_manager import SharedDataManager
+from shared_data_store import JSONFileStore, SQLiteSharedDataStore, create_shared_data_store
+
+
+def _sqlite_manager(tmp_path, **kwargs):
+    return SharedDataManager(data_dir=str(tmp_path / "data"), backend="sqlite",
+                             db_path=str(tmp_path / "shared.db"), check_interval=0, **kwargs)
+
+
+def test_migrates_json_files_once(tmp_path):
+    legacy = SharedDataManager(data_dir=str(tmp_path / "data"), backend="json", check_interval=0)
+    legacy.add_department({"name": "Floral", "phone_extension": "110", "is_active": True})
+    legacy.update_dialogue_template("coupons", "sms_body", "Custom body")
+
+    sdm = _sqlite_manager(tmp_path)
+    assert isinstance(sdm.store, SQLiteSharedDataStore)
+    for getter in ("get_store_info", "get_departments", "get_inventory", "get_coupons",
+                   "get_voice_templates", "get_dialogue_templates", "get_staff", "get_settings"):
+        assert getattr(sdm, getter)() == getattr(legacy, getter)(), getter
+    assert list(sdm.get_dialogue_templates()) == list(legacy.get_dialogue_templates())
+
+    sdm.update_dialogue_template("coupons", "sms_body", "Edited in SQLite")
+    reopened = _sqlite_manager(tmp_path)
+    assert reopened.get_dialogue_template("coupons", "sms_body") == "Edited in SQLite"
+
+
+def test_row_level_updates(tmp_path):
+    sdm = _sqlite_manager(tmp_path)
+    item = {"name": "Oat Milk", "sku": "OAT001", "price": 4.49, "is_active": True}
+    sdm.add_inventory_item(item)
+    assert item["id"] == 4
+    assert sdm.store.find_row("inventory", "sku", "oat001")["name"] == "Oat Milk"
+    created = sdm.get_inventory()[-1]["created_at"]
+
+    assert sdm.update_inventory_item(4, {"name": "Oat Milk (Half Gallon)", "sku": "OAT001", "price": 3.99})
+    assert sdm.get_inventory()[-1] == {"name": "Oat Milk (Half Gallon)", "sku": "OAT001", "price": 3.99,
+                                       "id": 4, "created_at": created}
+    assert not sdm.update_inventory_item(99, {"name": "Missing"})
+    assert sdm.get_department_by_name("deli")["id"] == 3
+    assert sdm.update_staff(1, {"role": "Lead", "email": None})
+    assert sdm.get_staff()[0]["email"] == "john.smith@store.com"
+    assert sdm.delete_staff(1) and not sdm.delete_staff(1)
+
+
+def test_lookups_use_indexes(tmp_path):
+    store = SQLiteSharedDataStore(str(tmp_path / "shared.db"))
+    conn = store._conn()
+    for field, index in (("name", "rows_name"), ("sku", "rows_sku")):
+        plan = conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT data FROM rows WHERE kind = ? AND {field} = ? COLLATE NOCASE",
+            ("inventory", "x"),
+        ).fetchall()
+        assert any(index in row[-1] for row in plan), plan
+    plan = conn.execute("EXPLAIN QUERY PLAN UPDATE rows SET data = ? WHERE kind = ? AND id = ?",
+                        ("{}", "inventory", 1)).fetchall()
+    assert any("PRIMARY KEY" in row[-1] or "autoindex" in row[-1] for row in plan), plan
+
+
+def test_two_processes_share_writes(tmp_path):
+    a = _sqlite_manager(tmp_path)
+    b = _sqlite_manager(tmp_path)
+    b.get_settings()
+    a.update_settings({"ai_model": "gpt-4o"})
+    assert b.get_settings()["ai_model"] == "gpt-4o"
+
+    def add(sdm, n):
+        for i in range(n):
+            sdm.add_coupon({"code": f"T{threading.get_ident()}-{i}", "is_active": True})
+
+    threads = [threading.Thread(target=add, args=(m, 20)) for m in (a, b)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = [c["id"] for c in a.get_coupons()]
+    assert len(ids) == 41 and len(set(ids)) == 41
+
+
+def test_full_save_repairs_missing_and_duplicate_ids(tmp_path):
+    store = SQLiteSharedDataStore(str(tmp_path / "shared.db"))
+    store.save("staff", [{"id": 2, "name": "A"}, {"name": "B"}, {"id": 2, "name": "C"}])
+    assert [(s["id"], s["name"]) for s in store.load("staff")] == [(2, "A"), (3, "B"), (4, "C")]
+
+
+def test_unknown_backend(tmp_path):
+    assert isinstance(create_shared_data_store("json", str(tmp_path)), JSONFileStore)
+    with pytest.raises(ValueError):
+        create_shared_data_store("postgres", str(tmp_path))
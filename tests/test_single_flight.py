@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import app as app_module
+from app import TTSCacheManager
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    sf = SingleFlight()
+    calls = []
+
+    def work(lock):
+        calls.append(1)
+        time.sleep(0.1)
+        return "audio.mp3"
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        results = list(ex.map(lambda _: sf.do("k", work), range(8)))
+    assert results == ["audio.mp3"] * 8
+    assert len(calls) == 1
+    assert sf.get_stats()["coalesced"] == 7
+
+
+def test_followers_see_leader_error():
+    sf = SingleFlight()
+    started = threading.Event()
+
+    def boom(lock):
+        started.set()
+        time.sleep(0.05)
+        raise ValueError("synthesis failed")
+
+    errors = []
+
+    def follower():
+        started.wait(1)
+        try:
+            sf.do("k", lambda lock: "unexpected")
+        except ValueError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=follower)
+    t.start()
+    with pytest.raises(ValueError):
+        sf.do("k", boom)
+    t.join()
+    assert len(errors) == 1
+
+
+def test_lock_file_serializes_separate_workers(tmp_path):
+    # Two SingleFlight instances on one lock dir behave like two worker processes
+    out = tmp_path / "line.mp3"
+    worker_a, worker_b = SingleFlight(str(tmp_path / "locks")), SingleFlight(str(tmp_path / "locks"))
+    synthesized = []
+
+    def synthesize(lock):
+        if out.exists():
+            return "cached"
+        synthesized.append(1)
+        time.sleep(0.1)
+        out.write_bytes(b"mp3")
+        return "synthesized"
+
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        a = ex.submit(worker_a.do, "key", synthesize)
+        time.sleep(0.02)
+        b = ex.submit(worker_b.do, "key", synthesize)
+        assert sorted([a.result(), b.result()]) == ["cached", "synthesized"]
+    assert len(synthesized) == 1
+
+
+def test_handed_off_lock_held_until_released(tmp_path):
+    worker_a, worker_b = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    held = []
+    worker_a.do("key", lambda lock: held.append(lock.handoff()))
+    got = []
+    t = threading.Thread(target=lambda: got.append(worker_b.do("key", lambda lock: time.time())))
+    t.start()
+    time.sleep(0.1)
+    released_at = time.time()
+    held[0].release()
+    t.join(2)
+    assert got and got[0] >= released_at
+
+
+def test_unrelated_keys_do_not_share_a_lock(tmp_path):
+    worker_a, worker_b = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    held = []
+    worker_a.do("streaming line", lambda lock: held.append(lock.handoff()))
+    try:
+        start = time.time()
+        assert worker_b.do("other line", lambda lock: lock.held) is True
+        assert time.time() - start < 0.5 and worker_b.get_stats()["lock_timeouts"] == 0
+    finally:
+        held[0].release()
+
+
+def test_prune_removes_idle_lock_files_only(tmp_path):
+    sf = SingleFlight(str(tmp_path))
+    sf.do("old", lambda lock: None)
+    held = []
+    sf.do("busy", lambda lock: held.append(lock.handoff()))
+    for name in os.listdir(tmp_path):
+        os.utime(tmp_path / name, (0, 0))
+    assert sf.prune() == 1 and os.listdir(tmp_path) == [os.path.basename(held[0].path)]
+    held[0].release()
+    assert sf.do("old", lambda lock: lock.held) is True  # recreated on demand
+
+
+def test_concurrent_tts_line_url_synthesizes_once_under_canonical_name(tmp_path, monkeypatch):
+    mgr = TTSCacheManager(cache_dir=str(tmp_path), flush_delay=3600)
+    monkeypatch.setattr(app_module, "CACHE_MANAGER", mgr)
+    monkeypatch.setattr(app_module, "TTS_FLIGHTS", SingleFlight(str(tmp_path / "locks")))
+    calls = []
+
+    def fake_tts(text, filename=None, job_id=None, service="TTS"):
+        calls.append(filename)
+        time.sleep(0.1)
+        path = os.path.join(str(tmp_path), os.path.basename(filename))
+        with open(path, "wb") as f:
+            f.write(b"mp3")
+        return path
+
+    monkeypatch.setattr(app_module, "elevenlabs_tts_to_file", fake_tts)
+
+    def fetch(_):
+        with app_module.app.test_request_context("/"):
+            return app_module.tts_line_url("Aisle seven, next to the bread.", stream=False)
+
+    with ThreadPoolExecutor(max_workers=6) as ex:
+        urls = list(ex.map(fetch, range(6)))
+    key = mgr.get_cache_key("Aisle seven, next to the bread.")
+    assert calls == [f"tts_cache/{key}.mp3"]
+    assert all(u and u.endswith(f"{key}.mp3") for u in urls)
+    assert sorted(p for p in os.listdir(tmp_path) if p.endswith(".mp3")) == [f"{key}.mp3"]
@@ -0,0 +1,156 @@
+import threading
+import time
+
+import pytest
+
+from task_executor import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_CONFIRM,
+    PRIORITY_REPLY,
+    ExecutorBusy,
+    TaskExecutor,
+    TimerWheel,
+)
+
+
+def _block_single_worker(ex):
+    gate = threading.Event()
+    started = threading.Event()
+
+    def blocker():
+        started.set()
+        gate.wait(5)
+
+    ex.submit(blocker)
+    assert started.wait(2)
+    return gate
+
+
+def _drain(ex, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        st = ex.get_stats()
+        if st["queue_depth"] == 0 and st["running"] == 0:
+            return st
+        time.sleep(0.01)
+    raise AssertionError("executor did not drain")
+
+
+def test_priorities_run_confirm_first():
+    ex = TaskExecutor(max_workers=1, max_queue=10)
+    gate = _block_single_worker(ex)
+    order = []
+    ex.submit(order.append, "analytics", priority=PRIORITY_BACKGROUND)
+    ex.submit(order.append, "reply", priority=PRIORITY_REPLY)
+    ex.submit(order.append, "confirm", priority=PRIORITY_CONFIRM)
+    gate.set()
+    _drain(ex)
+    assert order == ["confirm", "reply", "analytics"]
+
+
+def test_pool_size_is_bounded():
+    ex = TaskExecutor(max_workers=3, max_queue=50)
+    peak = [0]
+    active = [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+
+    for _ in range(20):
+        ex.submit(work)
+    st = _drain(ex)
+    assert peak[0] <= 3
+    assert st["workers"] <= 3
+    assert st["completed"] == 20
+
+
+def test_backpressure_sheds_analytics_then_rejects():
+    ex = TaskExecutor(max_workers=1, max_queue=2)
+    gate = _block_single_worker(ex)
+    ran = []
+    ex.submit(ran.append, "a1", priority=PRIORITY_BACKGROUND)
+    ex.submit(ran.append, "r1", priority=PRIORITY_REPLY)
+    # full: a reply evicts the queued analytics task
+    ex.submit(ran.append, "r2", priority=PRIORITY_REPLY)
+    # full of replies: another reply is refused
+    with pytest.raises(ExecutorBusy):
+        ex.submit(ran.append, "r3", priority=PRIORITY_REPLY)
+    gate.set()
+    st = _drain(ex)
+    assert ran == ["r1", "r2"]
+    assert st["shed"] == 1 and st["rejected"] == 1
+
+
+def test_shed_reply_is_reported_to_its_owner():
+    ex = TaskExecutor(max_workers=1, max_queue=1)
+    gate = _block_single_worker(ex)
+    failed = []
+    ex.submit(lambda: None, priority=PRIORITY_REPLY, on_shed=lambda: failed.append("job-1"))
+    ex.submit(lambda: None, priority=PRIORITY_CONFIRM)  # evicts the queued reply
+    assert failed == ["job-1"]
+    gate.set()
+    _drain(ex)
+
+
+def test_shed_job_state_is_set_to_error(monkeypatch):
+    import app as app_module
+
+    states = {}
+    monkeypatch.setattr(app_module, "_job_set", lambda job_id, **kw: states.setdefault(job_id, kw))
+    ex = TaskExecutor(max_workers=1, max_queue=1)
+    monkeypatch.setattr(app_module, "EXECUTOR", ex)
+    gate = _block_single_worker(ex)
+    assert app_module._submit_job("job-2", lambda: None)
+    ex.submit(lambda: None, priority=PRIORITY_CONFIRM)
+    assert states["job-2"] == {"status": "error", "error": "shed"}
+    gate.set()
+    _drain(ex)
+
+
+def test_failed_task_is_counted_and_worker_survives():
+    ex = TaskExecutor(max_workers=1)
+    ex.submit(lambda: 1 / 0)
+    done = []
+    ex.submit(done.append, 1)
+    st = _drain(ex)
+    assert done == [1]
+    assert st["failed"] == 1 and st["completed"] == 1
+
+
+def test_timer_wheel_fires_in_order():
+    wheel = TimerWheel(tick=0.01, slots=4)  # delays longer than one lap exercise rounds
+    fired = []
+    start = time.time()
+    wheel.add(0.12, lambda: fired.append(("late", time.time() - start)))
+    wheel.add(0.02, lambda: fired.append(("early", time.time() - start)))
+    deadline = time.time() + 2
+    while len(fired) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    wheel.stop()
+    assert [name for name, _ in fired] == ["early", "late"]
+    assert fired[1][1] >= 0.1
+    assert wheel.pending == 0
+
+
+def test_schedule_submits_after_delay():
+    ex = TaskExecutor(max_workers=1)
+    ex.timers.tick = 0.01
+    ran = threading.Event()
+    ex.schedule(0.03, ran.set)
+    assert ex.get_stats()["timers_pending"] == 1
+    assert ran.wait(2)
+
+
+def test_executor_stats_endpoint():
+    from app import app
+
+    r = app.test_client().get("/executor/stats")
+    assert r.status_code == 200
+    data = r.get_json(force=True)
+    assert {"queue_depth", "running", "avg_wait_ms", "rejected"} <= set(data)
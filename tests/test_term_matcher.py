@@ -0,0 +1,32 @@
+from term_matcher import AhoCorasick, at_word_boundary, build_matcher
+
+
+def test_finds_overlapping_matches():
+    ac = build_matcher([("he", 1), ("she", 2), ("his", 3), ("hers", 4)])
+    found = sorted((s, e, tuple(p)) for s, e, p in ac.iter_matches("ushers"))
+    assert found == [(1, 4, (2,)), (2, 4, (1,)), (2, 6, (4,))]
+
+
+def test_duplicate_patterns_share_payloads():
+    ac = build_matcher([("milk", "Dairy"), ("milk", "Grocery")])
+    assert [p for _, _, p in ac.iter_matches("milk")] == [["Dairy", "Grocery"]]
+    assert len(ac) == 1
+
+
+def test_word_matches_respect_boundaries():
+    ac = build_matcher([("pop", 1), ("corn", 2), ("popcorn", 3)])
+    got = sorted(p[0] for _, _, p in ac.iter_word_matches("popcorn and pop"))
+    assert got == [1, 3]
+    assert at_word_boundary("a b", 1) and not at_word_boundary("ab", 1)
+
+
+def test_add_after_build_is_rejected():
+    ac = AhoCorasick()
+    ac.add("a", 1)
+    ac.build()
+    try:
+        ac.add("b", 2)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
@@ -0,0 +1,138 @@
+import json
+import os
+import time
+
+import app as app_module
+from app import TTSCacheManager
+
+
+def _mgr(tmp_path, **kw):
+    return TTSCacheManager(cache_dir=str(tmp_path), flush_delay=kw.pop("flush_delay", 3600))
+
+
+def test_index_built_from_one_scan_and_hits_never_touch_disk(tmp_path, monkeypatch):
+    seed = TTSCacheManager.__new__(TTSCacheManager)
+    key = seed.get_cache_key("Hello there")
+    (tmp_path / f"{key}.mp3").write_bytes(b"mp3")
+    mgr = _mgr(tmp_path)
+    mgr.access_hook = app_module.CacheGC([str(tmp_path)]).record_access
+
+    def no_disk(*args, **kwargs):
+        raise AssertionError(f"unexpected disk access: {args}")
+
+    monkeypatch.setattr(app_module.os, "scandir", no_disk)
+    monkeypatch.setattr(app_module.os.path, "exists", no_disk)
+    monkeypatch.setattr(app_module.os, "stat", no_disk)
+    assert mgr.get_cached_file("Hello there").endswith(f"{key}.mp3")
+    assert mgr.find_cached_path("Hello there").endswith(f"{key}.mp3")
+    assert mgr.stats["cache_hits"] == 1
+
+
+def test_stale_hit_is_dropped_and_its_text_returned(tmp_path):
+    mgr = _mgr(tmp_path)
+    key = mgr.get_cache_key("Hello there")
+    path = tmp_path / f"{key}.mp3"
+    path.write_bytes(b"mp3")
+    mgr.refresh_index()
+    assert mgr.get_cached_file("Hello there")
+    os.remove(path)  # e.g. another worker's GC, before our next rescan
+    assert mgr.stale_hit(str(path)) == "Hello there"
+    assert mgr.get_cached_file("Hello there") is None and mgr.get_stats()["indexed_files"] == 0
+
+
+def test_served_stale_hit_is_resynthesized(monkeypatch):
+    text = f"Stale line {time.time_ns()}"
+    mgr = app_module.CACHE_MANAGER
+    name = f"{mgr.get_cache_key(text)}.mp3"
+    full = os.path.join(app_module.app.static_folder, "tts_cache", name)
+    mgr.index_add(full)  # indexed, but the file is gone
+    assert mgr.find_cached_path(text)
+    calls = []
+
+    def fake_tts(text, filename=None, job_id=None, service="TTS"):
+        calls.append(text)
+        with open(full, "wb") as f:
+            f.write(b"fresh")
+        return full
+
+    monkeypatch.setattr(app_module, "ELEVENLABS_API_KEY", "")  # no streaming: synthesize to file
+    monkeypatch.setattr(app_module, "elevenlabs_tts_to_file", fake_tts)
+    try:
+        resp = app_module.app.test_client().get(f"/static/tts_cache/{name}")
+        assert resp.status_code == 200 and resp.data == b"fresh" and calls == [text]
+    finally:
+        if os.path.exists(full):
+            os.remove(full)
+
+
+def test_busy_stats_lock_defers_the_write(tmp_path):
+    from single_flight import FileLock
+
+    mgr = _mgr(tmp_path)
+    mgr.record_tts_call(7)
+    held = FileLock(str(tmp_path / "cache_stats.json.lock"))
+    assert held.acquire(timeout=1)
+    mgr.stats_lock_timeout = 0.05
+    try:
+        mgr._save_stats()
+        assert not (tmp_path / "cache_stats.json").exists() and mgr._deltas["tts_calls"] == 1
+    finally:
+        held.release()
+    mgr.flush_stats()
+    assert json.loads((tmp_path / "cache_stats.json").read_text())["tts_calls"] == 1
+
+
+def test_workers_stats_are_merged_not_overwritten(tmp_path):
+    a, b = _mgr(tmp_path), _mgr(tmp_path)
+    a.get_cached_file("x")
+    a.get_cached_file("y")
+    b.get_cached_file("z")
+    b.record_tts_call(10)
+    a.flush_stats()
+    b.flush_stats()
+    a.flush_stats()  # nothing new: must not double count
+    saved = json.loads((tmp_path / "cache_stats.json").read_text())
+    assert (saved["cache_misses"], saved["tts_calls"], saved["total_chars_synthesized"]) == (3, 1, 10)
+    assert a.get_stats()["cache_misses"] == 3
+
+
+def test_lookups_do_not_write_stats_synchronously(tmp_path):
+    mgr = _mgr(tmp_path)
+    for _ in range(5):
+        mgr.get_cached_file("nothing cached")
+    assert mgr.stats["cache_misses"] == 5
+    assert not (tmp_path / "cache_stats.json").exists()
+
+    mgr.flush_stats()
+    saved = json.loads((tmp_path / "cache_stats.json").read_text())
+    assert saved["cache_misses"] == 5
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
+
+
+def test_background_flush(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module.EXECUTOR.timers, "tick", 0.01)
+    mgr = _mgr(tmp_path, flush_delay=0.02)
+    mgr.record_tts_call(42)
+    deadline = time.time() + 3
+    stats_file = tmp_path / "cache_stats.json"
+    while not stats_file.exists() and time.time() < deadline:
+        time.sleep(0.02)
+    assert json.loads(stats_file.read_text())["total_chars_synthesized"] == 42
+
+
+def test_cache_file_and_invalidate_keep_index_current(tmp_path):
+    mgr = _mgr(tmp_path)
+    src = tmp_path / "gen.mp3"
+    src.write_bytes(b"audio")
+    mgr.cache_file("Aisle five", str(src))
+    assert mgr.find_cached_path("Aisle five")
+    mgr.invalidate("Aisle five")
+    assert mgr.find_cached_path("Aisle five") is None
+
+
+def test_file_from_another_worker_is_found_on_miss(tmp_path):
+    mgr = _mgr(tmp_path)
+    key = mgr.get_cache_key("Other worker")
+    (tmp_path / f"{key}.mp3").write_bytes(b"mp3")
+    assert mgr.get_cached_file("Other worker")
+    assert mgr.get_stats()["indexed_files"] == 1
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import app as app_module
+from app import TTSCacheManager
+from tts_prewarm import PrewarmEngine, PrewarmItem, TokenBucket
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start >= 0.18
+
+
+def test_engine_bounds_concurrency_and_reports_progress():
+    active, peak, synthesized = [0], [0], []
+    lock = threading.Lock()
+
+    def synthesize(item):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        if item.text == "bad":
+            raise RuntimeError("quota")
+        synthesized.append(item.text)
+        return True
+
+    engine = PrewarmEngine(synthesize, lambda item: item.text.startswith("cached"),
+                           workers=3, rate=1000, burst=1000)
+    items = [PrewarmItem(f"line {i}", source="common") for i in range(12)]
+    items += [PrewarmItem("line 0", source="common"), PrewarmItem("cached a"), PrewarmItem("bad", source="x")]
+    assert engine.start(items)
+    assert not engine.start(items)  # one run at a time
+    assert engine.wait(5)
+
+    p = engine.get_progress()
+    assert peak[0] <= 3
+    assert p["total"] == 14 and p["completed"] == 14 and p["percent"] == 100.0
+    assert (p["synthesized"], p["cached"], p["failed"]) == (12, 1, 1)
+    assert p["by_source"]["x"] == {"total": 1, "failed": 1}
+    assert not p["running"] and len(synthesized) == 12
+
+
+def test_engine_char_budget():
+    engine = PrewarmEngine(lambda item: True, lambda item: False, workers=1, rate=1000, burst=1000, max_chars=10)
+    engine.start([PrewarmItem("12345"), PrewarmItem("67890"), PrewarmItem("over budget")])
+    engine.wait(5)
+    p = engine.get_progress()
+    assert (p["synthesized"], p["skipped_budget"], p["chars"]) == (2, 1, 10)
+
+
+def test_manifest_covers_all_languages_and_store_info():
+    items = app_module.build_prewarm_manifest()
+    texts = {i.text for i in items}
+    for messages in app_module.MESSAGES.values():
+        assert set(messages.values()) <= texts
+    assert {i.source for i in items} >= {"system", "messages:en", "messages:es", "common", "store_info"}
+    assert all("{" not in i.text for i in items)
+
+
+def test_prewarm_probe_does_not_touch_cache_stats(tmp_path, monkeypatch):
+    mgr = TTSCacheManager(cache_dir=str(tmp_path), flush_delay=3600)
+    monkeypatch.setattr(app_module, "CACHE_MANAGER", mgr)
+    before = dict(mgr.stats)
+    assert not app_module._prewarm_is_cached(PrewarmItem("Never synthesized line"))
+    assert mgr.stats == before
+
+
+def test_prewarm_endpoint_reports_progress(monkeypatch):
+    monkeypatch.setattr(app_module, "ELEVENLABS_API_KEY", "")
+    resp = app_module.app.test_client().post("/tts/prewarm")
+    assert resp.status_code == 200
+    assert resp.get_json()["started"] is False
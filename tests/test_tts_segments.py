@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from tts_segments import Segment, TemplateSegmenter, concat_mp3
+
+
+def test_split_confirm_line_keeps_prefix_static():
+    seg = TemplateSegmenter(["Got it—did you say: {item}?"])
+    assert seg.split("Got it—did you say: paper towels?") == [
+        Segment("Got it—did you say:", True),
+        Segment("paper towels?", False),
+    ]
+    assert seg.split("Thanks for calling.") is None
+
+
+def test_multi_slot_template_and_longest_wins():
+    seg = TemplateSegmenter([
+        "{item} is in {where}.",
+        "I don't see any specific {department} coupons for {item} right now.",
+    ])
+    parts = seg.split("I don't see any specific Dairy coupons for yogurt right now.")
+    assert [p.static for p in parts] == [True, False, True, False, True]
+    assert parts[1].text == "Dairy" and parts[3].text == "yogurt"
+
+
+def test_templates_without_slots_are_ignored():
+    seg = TemplateSegmenter(["Thanks for calling!"])
+    assert len(seg) == 0
+
+
+def test_concat_mp3_strips_inner_id3(tmp_path):
+    id3 = b"ID3\x03\x00\x00\x00\x00\x00\x02ab"  # 10-byte header + 2-byte body
+    a, b = tmp_path / "a.mp3", tmp_path / "b.mp3"
+    a.write_bytes(id3 + b"AAAA")
+    b.write_bytes(id3 + b"BBBB")
+    out = concat_mp3([str(a), str(b)], str(tmp_path / "out.mp3"))
+    assert open(out, "rb").read() == id3 + b"AAAA" + b"BBBB"
+
+
+def test_only_dynamic_slot_is_synthesized_after_warmup(tmp_path, monkeypatch):
+    import app as app_module
+
+    mgr = app_module.TTSCacheManager(cache_dir=str(tmp_path), flush_delay=3600)
+    monkeypatch.setattr(app_module, "CACHE_MANAGER", mgr)
+    synthesized = []
+
+    def fake_tts(text, filename=None, job_id=None, service="TTS"):
+        synthesized.append(text)
+        path = os.path.join(str(tmp_path), "gen_" + os.path.basename(filename or "x.mp3"))
+        with open(path, "wb") as f:
+            f.write(text.encode())
+        return path
+
+    monkeypatch.setattr(app_module, "elevenlabs_tts_to_file", fake_tts)
+    prefix = app_module.msg("confirm_prefix", "en")
+    with app_module.app.test_request_context("/"):
+        first = app_module.tts_stitched_url(f"{prefix} milk?")
+        second = app_module.tts_stitched_url(f"{prefix} paper towels?")
+
+    assert first and second
+    assert synthesized == [prefix, "milk?", "paper towels?"]
+    stitched = mgr.find_cached_path(f"{prefix} paper towels?")
+    assert open(stitched, "rb").read() == (prefix + "paper towels?").encode()
+
+
+def test_twiml_play_tts_emits_one_play_per_segment(tmp_path, monkeypatch):
+    import app as app_module
+    from twilio.twiml.voice_response import VoiceResponse
+
+    monkeypatch.setattr(app_module, "ELEVENLABS_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "tts_line_url", lambda text, *a, **k: f"https://x/{len(text)}.mp3")
+    vr = VoiceResponse()
+    with app_module.app.test_request_context("/"):
+        app_module.twiml_play_tts(vr, app_module.msg("confirm_prefix", "en") + " eggs?")
+    assert str(vr).count("<Play>") == 2
+
+
+def test_twiml_play_tts_prefers_whole_line_cache(tmp_path, monkeypatch):
+    import app as app_module
+    from twilio.twiml.voice_response import VoiceResponse
+
+    text = app_module.msg("confirm_prefix", "en") + " eggs?"
+    mgr = app_module.TTSCacheManager(cache_dir=str(tmp_path), flush_delay=3600)
+    (tmp_path / f"{mgr.get_cache_key(text)}.mp3").write_bytes(b"stitched")
+    monkeypatch.setattr(app_module, "CACHE_MANAGER", mgr)
+    monkeypatch.setattr(app_module, "ELEVENLABS_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "tts_segment_urls", lambda *a, **k: pytest.fail("segmented a cached line"))
+    vr = VoiceResponse()
+    with app_module.app.test_request_context("/"):
+        app_module.twiml_play_tts(vr, text)
+    assert str(vr).count("<Play>") == 1
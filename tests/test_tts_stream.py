@@ -0,0 +1,126 @@
+import os
+import threading
+import time
+import uuid
+
+import app as app_module
+from app import TTSCacheManager
+from tts_stream import FAILED_SUFFIX, StreamRegistry, follow_part, part_files
+
+
+def test_reader_follows_writer_until_commit(tmp_path):
+    reg = StreamRegistry()
+    sf = reg.start(str(tmp_path / "line.mp3"))
+    sf.write(b"aaaa")
+    assert sf.wait_for_data(1)
+    reader = sf.iter_bytes(chunk_size=2)
+    got = [next(reader)]
+
+    def finish():
+        time.sleep(0.05)
+        sf.write(b"bbbb")
+        reg.commit(sf)
+
+    threading.Thread(target=finish).start()
+    got.extend(reader)
+    assert b"".join(got) == b"aaaabbbb"
+    assert (tmp_path / "line.mp3").read_bytes() == b"aaaabbbb"
+    assert not os.path.exists(sf.part_path)
+    assert reg.get(str(tmp_path / "line.mp3")) is None
+    assert reg.get_stats()["committed"] == 1
+
+
+def test_abort_removes_partial_file(tmp_path):
+    reg = StreamRegistry()
+    sf = reg.start(str(tmp_path / "bad.mp3"))
+    assert reg.start(str(tmp_path / "bad.mp3")) is None  # one writer per path
+    reg.abort(sf, "boom")
+    assert not sf.wait_for_data(0.01)
+    assert not os.path.exists(sf.part_path) and not (tmp_path / "bad.mp3").exists()
+    assert list(sf.iter_bytes()) == []
+    assert (tmp_path / ("bad.mp3" + FAILED_SUFFIX)).exists()
+    reg.commit(reg.start(str(tmp_path / "bad.mp3")))  # a later successful stream clears the marker
+    assert not (tmp_path / ("bad.mp3" + FAILED_SUFFIX)).exists()
+
+
+def test_other_process_follows_part_file_on_disk(tmp_path):
+    writer = StreamRegistry()  # stands in for another worker: this process' registry doesn't know the stream
+    path = str(tmp_path / "line.mp3")
+    sf = writer.start(path)
+    sf.write(b"aaaa")
+    [part] = part_files(path)
+    reader = follow_part(path, part, chunk_size=2, poll=0.01)
+    got = [next(reader)]
+
+    def finish():
+        time.sleep(0.05)
+        sf.write(b"bbbb")
+        writer.commit(sf)
+
+    threading.Thread(target=finish).start()
+    got.extend(reader)
+    assert b"".join(got) == b"aaaabbbb" and part_files(path) == []
+
+
+class _FakeStream:
+    def __init__(self, chunks, gate):
+        self.chunks, self.gate = chunks, gate
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=None):
+        yield self.chunks[0]
+        self.gate.wait(5)
+        yield from self.chunks[1:]
+
+
+def test_reply_url_served_before_synthesis_finishes(tmp_path, monkeypatch):
+    gate = threading.Event()
+    chunks = [b"ID3first", b"-second", b"-third"]
+    monkeypatch.setattr(app_module, "ELEVENLABS_API_KEY", "test-key")
+    monkeypatch.setattr(app_module, "CACHE_MANAGER", TTSCacheManager(cache_dir=str(tmp_path), flush_delay=3600))
+    monkeypatch.setattr(app_module.HTTP, "post", lambda *a, **k: _FakeStream(chunks, gate))
+
+    text = f"Streaming test line {uuid.uuid4()}"
+    rel = f"tts_cache/{app_module._tts_cache_filename_for(text)}"
+    out_path = os.path.join(app_module.app.static_folder, rel)
+    try:
+        with app_module.app.test_request_context("/"):
+            url = app_module.tts_line_url(text, None, None, "job-1", "Final Response")
+        assert url.endswith(f"/static/{rel}")
+        assert not os.path.exists(out_path)  # still synthesizing
+
+        threading.Timer(0.05, gate.set).start()
+        resp = app_module.app.test_client().get(f"/static/{rel}")
+        assert resp.status_code == 200 and resp.mimetype == "audio/mpeg"
+        assert resp.data == b"".join(chunks)
+
+        deadline = time.time() + 2
+        while app_module.TTS_STREAMS.get(out_path) is not None and time.time() < deadline:
+            time.sleep(0.01)
+        with open(out_path, "rb") as f:
+            assert f.read() == b"".join(chunks)
+    finally:
+        gate.set()
+        if os.path.exists(out_path):
+            os.remove(out_path)
+
+
+def test_failed_stream_url_plays_fallback_not_404():
+    name = f"{uuid.uuid4().hex[:16]}.mp3"
+    path = os.path.join(app_module.app.static_folder, "tts_cache", name)
+    reg = StreamRegistry()
+    reg.abort(reg.start(path), "elevenlabs 500")
+    try:
+        resp = app_module.app.test_client().get(f"/static/tts_cache/{name}")
+        assert resp.status_code == 200 and resp.mimetype == "audio/mpeg" and resp.data
+        assert app_module.app.test_client().get(f"/static/tts_cache/{uuid.uuid4().hex[:16]}.mp3").status_code == 404
+    finally:
+        os.remove(path + FAILED_SUFFIX)
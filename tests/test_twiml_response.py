@@ -0,0 +1,40 @@
+import os
+
+from werkzeug.wrappers import Response as BaseResponse
+
+import app as app_module
+from app import TwiMLResponse, xml_response
+
+
+def test_xml_response_is_typed_twiml():
+    resp = xml_response("<Response><Say>hi</Say></Response>")
+    assert isinstance(resp, TwiMLResponse)
+    assert resp.headers["Content-Type"] == "text/xml; charset=utf-8"
+
+
+def test_twiml_route_served_as_xml():
+    resp = app_module.app.test_client().get("/tw_xml_canary")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/xml"
+    assert b"xml canary ok" in resp.data
+
+
+def test_audio_fetch_never_reads_body(monkeypatch):
+    name = f"test_zero_copy_{os.getpid()}.mp3"
+    path = os.path.join(app_module.app.static_folder, "tts_cache", name)
+    with open(path, "wb") as f:
+        f.write(b"\xff\xfb" * 4096)
+
+    reads = []
+    real_get_data = BaseResponse.get_data
+    monkeypatch.setattr(BaseResponse, "get_data", lambda self, *a, **k: reads.append(1) or real_get_data(self, *a, **k))
+    try:
+        with app_module.app.test_request_context(f"/static/tts_cache/{name}"):
+            resp = app_module.app.full_dispatch_request()
+        assert resp.status_code == 200
+        assert resp.mimetype == "audio/mpeg"
+        assert resp.direct_passthrough
+        assert reads == []
+        resp.close()
+    finally:
+        os.remove(path)
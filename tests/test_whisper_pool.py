@@ -0,0 +1,67 @@
+import threading
+import time
+
+from whisper_pool import WhisperModelPool
+
+
+def test_model_loaded_once_and_reused():
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return object()
+
+    pool = WhisperModelPool(loader, max_concurrent=2)
+    seen = set()
+    for _ in range(5):
+        pool.transcribe(lambda m: (seen.add(id(m)), "en", 1.0))
+    assert len(loads) == 1
+    assert len(seen) == 1
+    stats = pool.get_stats()
+    assert stats["loaded"] is True
+    assert stats["transcriptions"] == 5
+
+
+def test_concurrency_is_bounded():
+    pool = WhisperModelPool(lambda: "model", max_concurrent=2)
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def decode(model):
+        with lock:
+            active.append(1)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.05)
+        with lock:
+            active.pop()
+        return "hi", "en", 1.0
+
+    threads = [threading.Thread(target=pool.transcribe, args=(decode,)) for _ in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 2
+    stats = pool.get_stats()
+    assert stats["transcriptions"] == 6
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0
+    # Callers beyond the first two had to queue for a slot
+    assert stats["max_wait_ms"] > 0
+    assert stats["avg_decode_ms"] >= 40
+
+
+def test_decode_error_releases_slot():
+    pool = WhisperModelPool(lambda: "model", max_concurrent=1)
+
+    def boom(model):
+        raise RuntimeError("bad audio")
+
+    try:
+        pool.transcribe(boom)
+    except RuntimeError:
+        pass
+    assert pool.transcribe(lambda m: ("ok", "en", 1.0)) == ("ok", "en", 1.0)
+    stats = pool.get_stats()
+    assert stats["errors"] == 1 and stats["transcriptions"] == 1
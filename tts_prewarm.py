@@ -0,0 +1,187 @@
+"""
+TTS Prewarm Engine for AI Call Router
+Synthesizes a manifest of known phrases in the background with bounded
+concurrency and a token-bucket rate limit, and reports progress
+"""
+
+import collections
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+
+class PrewarmItem(NamedTuple):
+    text: str
+    filename: Optional[str] = None  # fixed tts_cache/ name; None = canonical cache key
+    source: str = ""                # manifest section, for progress reporting
+
+
+class TokenBucket:
+    """rate tokens per second, up to capacity; acquire() blocks until a token is free"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(0.001, float(rate))
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0, stop: Optional[threading.Event] = None) -> bool:
+        """Take tokens, sleeping as needed; False if stop was set while waiting"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if stop is not None:
+                if stop.wait(wait):
+                    return False
+            else:
+                time.sleep(wait)
+
+
+class PrewarmEngine:
+    """Runs one prewarm at a time on `workers` background threads.
+
+    is_cached(item) must be a side-effect-free probe (no hit/miss stats);
+    synthesize(item) returns something truthy on success. Items are
+    de-duplicated by (text, filename); each synthesis takes one bucket
+    token, and the run stops synthesizing once max_chars is spent.
+    """
+
+    def __init__(self, synthesize: Callable[[PrewarmItem], object], is_cached: Callable[[PrewarmItem], bool],
+                 workers: int = 3, rate: float = 2.0, burst: float = 4.0, max_chars: Optional[int] = None):
+        self.synthesize = synthesize
+        self.is_cached = is_cached
+        self.workers = max(1, int(workers))
+        self.bucket = TokenBucket(rate, burst)
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        self._queue = collections.deque()
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._done.set()
+        self._progress = self._new_progress(0)
+
+    @staticmethod
+    def _new_progress(total: int) -> Dict:
+        return {
+            "running": False,
+            "total": total,
+            "completed": 0,
+            "cached": 0,
+            "synthesized": 0,
+            "failed": 0,
+            "skipped_budget": 0,
+            "chars": 0,
+            "by_source": {},
+            "errors": [],
+            "started_at": None,
+            "finished_at": None,
+        }
+
+    def start(self, items: Iterable[PrewarmItem]) -> bool:
+        """Queue a run in the background; False if one is already running"""
+        seen, unique = set(), []
+        for item in items:
+            key = (item.text.strip(), item.filename)
+            if item.text.strip() and key not in seen:
+                seen.add(key)
+                unique.append(item)
+        with self._lock:
+            if self._progress["running"]:
+                return False
+            self._queue = collections.deque(unique)
+            self._progress = self._new_progress(len(unique))
+            self._progress["running"] = True
+            self._progress["started_at"] = time.time()
+            self._stop.clear()
+            self._done.clear()
+            n = min(self.workers, len(unique)) or 1
+            self._threads = [threading.Thread(target=self._worker, name=f"tts-prewarm-{i}", daemon=True)
+                             for i in range(n)]
+        print(f"[PREWARM] Starting {len(unique)} phrases on {n} workers")
+        for t in self._threads:
+            t.start()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def stop(self):
+        self._stop.set()
+
+    def _next(self) -> Optional[PrewarmItem]:
+        with self._lock:
+            return self._queue.popleft() if self._queue and not self._stop.is_set() else None
+
+    def _record(self, item: PrewarmItem, outcome: str, chars: int = 0, error: str = ""):
+        with self._lock:
+            p = self._progress
+            p["completed"] += 1
+            p[outcome] += 1
+            p["chars"] += chars
+            src = p["by_source"].setdefault(item.source or "other", {"total": 0, "failed": 0})
+            src["total"] += 1
+            if outcome == "failed":
+                src["failed"] += 1
+                p["errors"] = (p["errors"] + [f"{item.text[:40]}: {error}"])[-10:]
+
+    def _budget_left(self, chars: int) -> bool:
+        if self.max_chars is None:
+            return True
+        with self._lock:
+            if self._progress["chars"] + chars > self.max_chars:
+                return False
+            self._progress["chars"] += chars  # reserve
+            return True
+
+    def _worker(self):
+        while True:
+            item = self._next()
+            if item is None:
+                break
+            try:
+                if self.is_cached(item):
+                    self._record(item, "cached")
+                    continue
+                if not self._budget_left(len(item.text)):
+                    self._record(item, "skipped_budget")
+                    continue
+                reserved = len(item.text) if self.max_chars is not None else 0
+                if not self.bucket.acquire(stop=self._stop):
+                    break
+                ok = self.synthesize(item)
+                self._record(item, "synthesized" if ok else "failed", len(item.text) - reserved if ok else 0,
+                             "" if ok else "synthesis returned nothing")
+            except Exception as e:
+                self._record(item, "failed", error=str(e))
+        with self._lock:
+            self._threads = [t for t in self._threads if t is not threading.current_thread()]
+            last = not self._threads
+            if last:
+                self._progress["running"] = False
+                self._progress["finished_at"] = time.time()
+        if last:
+            p = self.get_progress()
+            print(f"[PREWARM] Done: {p['synthesized']} synthesized, {p['cached']} already cached, "
+                  f"{p['failed']} failed, {p['chars']:,} chars in {p['elapsed_sec']}s")
+            self._done.set()
+
+    def get_progress(self) -> Dict:
+        with self._lock:
+            p = dict(self._progress)
+            p["by_source"] = {k: dict(v) for k, v in p["by_source"].items()}
+            p["errors"] = list(p["errors"])
+        end = p["finished_at"] or time.time()
+        p["elapsed_sec"] = round(end - p["started_at"], 1) if p["started_at"] else 0.0
+        p["percent"] = round(100.0 * p["completed"] / p["total"], 1) if p["total"] else 100.0
+        return p
@@ -0,0 +1,118 @@
+"""
+Segmented TTS for AI Call Router
+Splits lines built from known templates into fixed fragments (synthesized
+once and cached) and the small dynamic slot, and stitches MP3 segments
+"""
+
+import os
+import re
+from typing import Iterable, List, NamedTuple, Optional
+
+_SLOT = re.compile(r"\{(\w+)\}")
+
+
+class Segment(NamedTuple):
+    text: str
+    static: bool
+
+
+class TemplateSegmenter:
+    """Registry of "{slot}" templates.
+
+    split(text) returns the segments of the first (longest) template the text
+    matches, or None. Static pieces with no letters or digits (punctuation,
+    spaces) are folded into the neighbouring slot so no clip is just "?".
+    """
+
+    def __init__(self, templates: Iterable[str] = ()):
+        self._templates = {}  # template -> (parts, compiled regex)
+        self._order: List[str] = []  # longest template first
+        for t in templates:
+            self.register(t)
+
+    def register(self, template: str) -> bool:
+        template = (template or "").strip()
+        if not template or template in self._templates:
+            return False
+        parts = _SLOT.split(template)
+        if len(parts) < 3:
+            return False  # no slot: the whole line is static and cached as-is
+        rx = []
+        for i, part in enumerate(parts):
+            if i % 2:
+                rx.append(f"(?P<s{i}>.+?)")
+            else:
+                words = part.split()
+                rx.append(r"\s*" + r"\s+".join(re.escape(w) for w in words) + r"\s*" if words else r"\s*")
+        self._templates[template] = (parts, re.compile("^" + "".join(rx) + "$", re.I | re.S))
+        self._order = sorted(self._templates, key=len, reverse=True)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def split(self, text: str) -> Optional[List[Segment]]:
+        text = (text or "").strip()
+        if not text:
+            return None
+        for template in self._order:
+            parts, rx = self._templates[template]
+            m = rx.match(text)
+            if not m:
+                continue
+            raw = []
+            for i, part in enumerate(parts):
+                if i % 2:
+                    raw.append(Segment(m.group(f"s{i}"), False))
+                elif part:
+                    raw.append(Segment(part, True))
+            return _fold_punctuation(raw)
+        return None
+
+
+def static_fragments(template: str) -> List[str]:
+    """Fixed pieces of a "{slot}" template as split() returns them (what to prewarm)"""
+    parts = _SLOT.split((template or "").strip())
+    if len(parts) < 3:
+        return []
+    return [p.strip() for p in parts[0::2] if any(c.isalnum() for c in p)]
+
+
+def _fold_punctuation(segments: List[Segment]) -> List[Segment]:
+    out: List[Segment] = []
+    carry = ""
+    for seg in segments:
+        if seg.static and not any(c.isalnum() for c in seg.text):
+            if out and not out[-1].static:
+                out[-1] = Segment(out[-1].text + seg.text, False)
+            else:
+                carry += seg.text
+            continue
+        if carry and not seg.static:
+            seg = Segment(carry + seg.text, False)
+            carry = ""
+        out.append(seg)
+    return [Segment(s.text.strip(), s.static) for s in out if s.text.strip()]
+
+
+def _strip_id3(data: bytes, keep_head: bool, keep_tail: bool) -> bytes:
+    if not keep_head and data[:3] == b"ID3" and len(data) >= 10:
+        size = ((data[6] & 0x7F) << 21) | ((data[7] & 0x7F) << 14) | ((data[8] & 0x7F) << 7) | (data[9] & 0x7F)
+        data = data[10 + size:]
+    if not keep_tail and len(data) >= 128 and data[-128:-125] == b"TAG":
+        data = data[:-128]
+    return data
+
+
+def concat_mp3(paths: List[str], out_path: str) -> str:
+    """Join MP3 files frame-wise (ID3 tags kept only at the ends); atomic write"""
+    chunks = []
+    for i, p in enumerate(paths):
+        with open(p, "rb") as f:
+            chunks.append(_strip_id3(f.read(), keep_head=(i == 0), keep_tail=(i == len(paths) - 1)))
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        for c in chunks:
+            f.write(c)
+    os.replace(tmp, out_path)
+    return out_path
@@ -0,0 +1,206 @@
+"""
+Streaming TTS files for AI Call Router
+Synthesis chunks are appended to a .part file while readers follow it, so a
+reply can be played from the first chunk; commit() renames the finished file
+into place atomically. Other worker processes find the .part on disk and
+follow it the same way; a failed stream leaves a ".failed" marker so its
+URL can be answered with fallback audio instead of a 404
+"""
+
+import glob
+import os
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+FAILED_SUFFIX = ".failed"
+
+
+def part_files(path: str) -> list:
+    """In-flight .part files for path, from any process"""
+    return glob.glob(f"{glob.escape(path)}.*.part")
+
+
+def stream_failed(path: str) -> bool:
+    return os.path.exists(path + FAILED_SUFFIX)
+
+
+def follow_part(path: str, part_path: str, chunk_size: int = 16384, idle_timeout: float = 30.0,
+                poll: float = 0.05) -> Iterator[bytes]:
+    """Yield a .part another process is writing until it is renamed to path, removed, or stalls"""
+    try:
+        f = open(part_path, "rb")
+    except FileNotFoundError:
+        try:
+            f = open(path, "rb")  # committed between lookup and open
+        except FileNotFoundError:
+            return
+    with f:
+        idle_since = time.time()
+        while True:
+            data = f.read(chunk_size)
+            if data:
+                idle_since = time.time()
+                yield data
+                continue
+            if not os.path.exists(part_path):
+                # Renamed into place (our handle is the same inode) or aborted: drain what is left
+                rest = f.read()
+                if rest:
+                    yield rest
+                return
+            if time.time() - idle_since > idle_timeout:
+                return  # writer stalled; end the response
+            time.sleep(poll)
+
+
+class StreamingFile:
+    """A cache file being written chunk by chunk.
+
+    Writes go to "<path>.<pid>.part"; commit() renames it to path, abort()
+    deletes it. Readers opened before commit keep reading the same inode,
+    so a rename mid-read is invisible to them.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.part_path = f"{path}.{os.getpid()}.part"
+        self.size = 0
+        self.done = False
+        self.failed = False
+        self.error: Optional[str] = None
+        self.started_at = time.time()
+        self.first_chunk_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._clear_failed()
+        self._f = open(self.part_path, "wb")
+
+    def _clear_failed(self):
+        try:
+            os.remove(self.path + FAILED_SUFFIX)
+        except OSError:
+            pass
+
+    def write(self, chunk: bytes):
+        if not chunk:
+            return
+        self._f.write(chunk)
+        self._f.flush()
+        with self._cond:
+            if self.first_chunk_at is None:
+                self.first_chunk_at = time.time()
+            self.size += len(chunk)
+            self._cond.notify_all()
+
+    def commit(self):
+        self._f.close()
+        os.replace(self.part_path, self.path)
+        with self._cond:
+            self.done = True
+            self._cond.notify_all()
+
+    def abort(self, error: str = ""):
+        try:
+            self._f.close()
+            os.remove(self.part_path)
+        except OSError:
+            pass
+        try:
+            # The URL may already be handed out; tell every worker's serving route it won't appear
+            with open(self.path + FAILED_SUFFIX, "w") as marker:
+                marker.write(error)
+        except OSError:
+            pass
+        with self._cond:
+            self.failed = True
+            self.error = error
+            self._cond.notify_all()
+
+    def wait_for_data(self, timeout: float) -> bool:
+        """Block until the first chunk, completion or failure; True if audio is available"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while not (self.size or self.done or self.failed):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            return bool(self.size) and not self.failed
+
+    def iter_bytes(self, chunk_size: int = 16384, idle_timeout: float = 30.0) -> Iterator[bytes]:
+        """Yield the file from the start, following the writer until it commits or fails"""
+        try:
+            f = open(self.part_path, "rb")
+        except FileNotFoundError:
+            try:
+                f = open(self.path, "rb")  # committed between lookup and open
+            except FileNotFoundError:
+                return  # aborted
+        with f:
+            while True:
+                data = f.read(chunk_size)
+                if data:
+                    yield data
+                    continue
+                with self._cond:
+                    if self.done or self.failed:
+                        finished = True
+                    else:
+                        finished = False
+                        size = self.size
+                        self._cond.wait(idle_timeout)
+                        if self.size == size and not (self.done or self.failed):
+                            return  # writer stalled; end the response
+                if finished:
+                    rest = f.read()
+                    if rest:
+                        yield rest
+                    return
+
+
+class StreamRegistry:
+    """Active StreamingFiles by final path, shared by writers and the serving route"""
+
+    def __init__(self):
+        self._active: Dict[str, StreamingFile] = {}
+        self._lock = threading.Lock()
+        self._stats = {"started": 0, "committed": 0, "failed": 0, "first_chunks": 0, "total_first_chunk_ms": 0.0}
+
+    def start(self, path: str) -> Optional[StreamingFile]:
+        """New StreamingFile for path, or None if one is already in flight"""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._active:
+                return None
+            sf = StreamingFile(path)
+            self._active[path] = sf
+            self._stats["started"] += 1
+            return sf
+
+    def get(self, path: str) -> Optional[StreamingFile]:
+        return self._active.get(os.path.abspath(path))
+
+    def commit(self, sf: StreamingFile):
+        sf.commit()
+        self._finish(sf, ok=True)
+
+    def abort(self, sf: StreamingFile, error: str = ""):
+        sf.abort(error)
+        self._finish(sf, ok=False)
+
+    def _finish(self, sf: StreamingFile, ok: bool):
+        with self._lock:
+            if self._active.get(sf.path) is sf:
+                del self._active[sf.path]
+            self._stats["committed" if ok else "failed"] += 1
+            if sf.first_chunk_at is not None:
+                self._stats["first_chunks"] += 1
+                self._stats["total_first_chunk_ms"] += (sf.first_chunk_at - sf.started_at) * 1000
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            s = dict(self._stats)
+            s["active"] = len(self._active)
+        n = s.pop("first_chunks")
+        s["avg_first_chunk_ms"] = round(s.pop("total_first_chunk_ms") / n, 1) if n else 0.0
+        return s
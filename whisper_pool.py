@@ -0,0 +1,131 @@
+"""
+Whisper Model Pool for AI Call Router
+Keeps a warm, process-wide Whisper model and bounds concurrent decoders
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class WhisperModelPool:
+    """Shared Whisper model with a bounded number of concurrent decoders.
+
+    The model is loaded once per process (at worker start via warm(), or lazily
+    on the first transcription) and reused for every call. At most
+    max_concurrent transcriptions decode at the same time; extra callers wait
+    for a free slot, and that wait is reported separately from decode time.
+    """
+
+    def __init__(self, loader: Callable[[], Any], max_concurrent: int = 1, name: str = "whisper"):
+        self.name = name
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._loader = loader
+        self._model = None
+        self._load_error: Optional[Exception] = None
+        self._load_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "load_seconds": 0.0,
+            "transcriptions": 0,
+            "errors": 0,
+            "in_flight": 0,
+            "waiting": 0,
+            "total_wait_ms": 0.0,
+            "max_wait_ms": 0.0,
+            "total_decode_ms": 0.0,
+            "max_decode_ms": 0.0,
+        }
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def warm(self):
+        """Load the model if it is not loaded yet; returns the model."""
+        if self._model is not None:
+            return self._model
+        with self._load_lock:
+            if self._model is None:
+                start = time.time()
+                try:
+                    self._model = self._loader()
+                    self._load_error = None
+                except Exception as e:
+                    self._load_error = e
+                    print(f"[ASR POOL] Failed to load {self.name}: {e}")
+                    raise
+                self.stats["load_seconds"] = round(time.time() - start, 3)
+                print(f"[ASR POOL] Loaded {self.name} in {self.stats['load_seconds']:.3f}s (max_concurrent={self.max_concurrent})")
+        return self._model
+
+    def warm_async(self) -> threading.Thread:
+        """Load the model in the background so worker start is not blocked."""
+        def _run():
+            try:
+                self.warm()
+            except Exception:
+                pass
+        t = threading.Thread(target=_run, name=f"{self.name}-warm", daemon=True)
+        t.start()
+        return t
+
+    def transcribe(self, decode: Callable[[Any], Tuple[str, str, float]]) -> Tuple[str, str, float]:
+        """Run decode(model) in a free decoder slot and record wait/decode timing.
+
+        decode must fully consume any lazy segment generator before returning,
+        so the slot is held for the whole decode.
+        """
+        model = self.warm()
+
+        wait_start = time.time()
+        with self._stats_lock:
+            self.stats["waiting"] += 1
+        self._slots.acquire()
+        wait_ms = (time.time() - wait_start) * 1000.0
+        with self._stats_lock:
+            self.stats["waiting"] -= 1
+            self.stats["in_flight"] += 1
+
+        decode_start = time.time()
+        ok = False
+        try:
+            result = decode(model)
+            ok = True
+            return result
+        finally:
+            decode_ms = (time.time() - decode_start) * 1000.0
+            self._slots.release()
+            with self._stats_lock:
+                self.stats["in_flight"] -= 1
+                if ok:
+                    self.stats["transcriptions"] += 1
+                else:
+                    self.stats["errors"] += 1
+                self.stats["total_wait_ms"] += wait_ms
+                self.stats["max_wait_ms"] = max(self.stats["max_wait_ms"], wait_ms)
+                self.stats["total_decode_ms"] += decode_ms
+                self.stats["max_decode_ms"] = max(self.stats["max_decode_ms"], decode_ms)
+            print(f"[ASR POOL] {self.name} wait={wait_ms:.1f}ms decode={decode_ms:.1f}ms")
+
+    def get_stats(self) -> Dict:
+        """Get pool statistics (queue wait vs. decode time)"""
+        with self._stats_lock:
+            s = dict(self.stats)
+        done = s["transcriptions"] + s["errors"]
+        return {
+            "model": self.name,
+            "loaded": self.loaded,
+            "load_error": str(self._load_error) if self._load_error else None,
+            "max_concurrent": self.max_concurrent,
+            "load_seconds": s["load_seconds"],
+            "transcriptions": s["transcriptions"],
+            "errors": s["errors"],
+            "in_flight": s["in_flight"],
+            "waiting": s["waiting"],
+            "avg_wait_ms": round(s["total_wait_ms"] / done, 1) if done else 0.0,
+            "max_wait_ms": round(s["max_wait_ms"], 1),
+            "avg_decode_ms": round(s["total_decode_ms"] / done, 1) if done else 0.0,
+            "max_decode_ms": round(s["max_decode_ms"], 1),
+        }